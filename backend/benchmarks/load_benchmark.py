@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+End-to-end load and latency benchmark for the API.
+
+Drives a running server with async httpx and a mixed workload that runs
+concurrently for --duration seconds:
+
+  registration_burst   every virtual delegate POSTs a registration at once,
+                       as when registration opens
+  email_check_typing   users typing their email address, one availability
+                       check per keystroke after a short debounce
+  dashboard_polling    admins polling the list and stats endpoints
+  bulk_admin_updates   admins confirming registrations and verifying payments
+
+The database is seeded directly with a tools/synthetic_data.py preset first.
+Every virtual user sends its own X-Forwarded-For address; run the server with
+RATE_LIMIT_PROXY_HOPS=1 so rate limits apply per virtual user rather than to
+the whole benchmark. 4xx/429/503 responses are counted per endpoint but kept
+out of the latency percentiles only if --exclude-errors is given.
+
+Reports throughput and p50/p95/p99 per endpoint, writes JSON with --output
+and, with --baseline, exits non-zero when an endpoint's p95 regressed by more
+than --tolerance.
+
+With --in-process the app is imported and driven through httpx's ASGI
+transport on the in-memory storage backend instead: no server, no database,
+so the numbers isolate handler, validation and middleware CPU cost.
+
+Run from the backend directory (server on :8001 using the same database):
+    python -m benchmarks.load_benchmark --base-url http://localhost:8001 \\
+        --mongo-url mongodb://localhost:27017 --db kicon_bench --duration 30 --output bench.json
+    python -m benchmarks.load_benchmark --in-process --preset 10k --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from pymongo import MongoClient
+
+from tools.synthetic_data import PRESETS, load, load_repositories
+
+
+class Recorder:
+    """Latency samples and status counts per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[Tuple[float, bool]]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.latencies[label].append((time.perf_counter() - started, status.startswith("2")))
+        self.statuses[label][status] += 1
+        return response
+
+    def report(self, elapsed: float, exclude_errors: bool) -> dict:
+        endpoints = {}
+        for label, samples in sorted(self.latencies.items()):
+            statuses = dict(self.statuses[label])
+            ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+            values = sorted(seconds for seconds, ok in samples if ok or not exclude_errors)
+            endpoints[label] = {
+                "requests": len(samples),
+                "ok": ok,
+                "statuses": statuses,
+                "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": _percentile_ms(values, 0.50),
+                "p95_ms": _percentile_ms(values, 0.95),
+                "p99_ms": _percentile_ms(values, 0.99),
+                "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+            }
+        return endpoints
+
+
+def _percentile_ms(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+
+def _client_ip(rng: random.Random) -> str:
+    return f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def registration_payload(index: int, rng: random.Random) -> dict:
+    return {
+        "fullName": f"Dr. Bench Delegate {index}",
+        "gender": rng.choice(["male", "female"]),
+        "dateOfBirth": f"{rng.randint(1960, 1995)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T00:00:00",
+        "nationality": "Indian",
+        "passportNumber": f"B{rng.randint(1000000, 9999999)}",
+        "passportExpiry": "2031-06-30T00:00:00",
+        "mobile": f"+91{rng.randint(7000000000, 9999999999)}",
+        "email": f"bench.{uuid.uuid4().hex[:12]}@example.com",
+        "specialty": rng.choice(["dermatology", "dentistry", "cosmetology", "other"]),
+        "yearsOfPractice": rng.randint(1, 30),
+        "clinicName": "Benchmark Skin & Smile Clinic",
+        "clinicAddress": "42 MG Road, Bengaluru, Karnataka 560001",
+        "designation": "Consultant",
+        "interests": ["Dental Equipment"],
+        "foodPreference": rng.choice(["vegetarian", "non-vegetarian", "both"]),
+        "emergencyContact": f"+91{rng.randint(7000000000, 9999999999)}",
+        "termsAccepted": True,
+    }
+
+
+def load_ids(db, limit: int = 5000) -> dict:
+    return {
+        "registrations": [doc["id"] for doc in db.registrations.find({}, {"id": 1, "_id": 0}).limit(limit)],
+        "payments": [doc["id"] for doc in db.payments.find({}, {"id": 1, "_id": 0}).limit(limit)],
+    }
+
+
+async def registration_burst(client, recorder: Recorder, rng: random.Random, delegates: int):
+    async def delegate(index: int):
+        await recorder.request(client, "POST /api/registrations", "POST", "/api/registrations",
+                               json=registration_payload(index, rng), headers={"X-Forwarded-For": _client_ip(rng)})
+
+    await asyncio.gather(*(delegate(index) for index in range(delegates)))
+
+
+async def email_check_typing(client, recorder: Recorder, rng: random.Random, users: int, deadline: float):
+    async def user():
+        headers = {"X-Forwarded-For": _client_ip(rng)}
+        while time.monotonic() < deadline:
+            email = f"dr.{uuid.uuid4().hex[:8]}@clinic.example.com"
+            # Availability check fires once the address looks complete, on every keystroke after that
+            for length in range(email.index("@") + 5, len(email) + 1):
+                if time.monotonic() >= deadline:
+                    return
+                await recorder.request(client, "GET /api/registrations/email/{email}", "GET",
+                                       f"/api/registrations/email/{email[:length]}", headers=headers)
+                await asyncio.sleep(rng.uniform(0.08, 0.2))
+
+    await asyncio.gather(*(user() for _ in range(users)))
+
+
+DASHBOARD_REQUESTS = [
+    ("GET /api/registrations", "/api/registrations?limit=100"),
+    ("GET /api/registrations/stats/summary", "/api/registrations/stats/summary"),
+    ("GET /api/payments", "/api/payments?limit=50"),
+    ("GET /api/payments/stats/summary", "/api/payments/stats/summary"),
+    ("GET /api/contacts", "/api/contacts?limit=50"),
+    ("GET /api/contacts/stats/summary", "/api/contacts/stats/summary"),
+]
+
+
+async def dashboard_polling(client, recorder: Recorder, rng: random.Random, admins: int, interval: float,
+                            deadline: float, headers: dict):
+    async def admin():
+        while time.monotonic() < deadline:
+            await asyncio.gather(*(
+                recorder.request(client, label, "GET", url, headers=headers) for label, url in DASHBOARD_REQUESTS
+            ))
+            await asyncio.sleep(interval * rng.uniform(0.8, 1.2))
+
+    await asyncio.gather(*(admin() for _ in range(admins)))
+
+
+async def bulk_admin_updates(client, recorder: Recorder, rng: random.Random, admins: int, ids: dict,
+                             deadline: float, headers: dict):
+    async def admin():
+        while time.monotonic() < deadline:
+            if ids["registrations"]:
+                await recorder.request(
+                    client, "PUT /api/registrations/{registration_id}", "PUT",
+                    f"/api/registrations/{rng.choice(ids['registrations'])}",
+                    json={"registrationStatus": "confirmed", "paymentStatus": rng.choice(["advance_paid", "full_paid"])},
+                    headers=headers
+                )
+            if ids["payments"]:
+                await recorder.request(
+                    client, "PUT /api/payments/{payment_id}", "PUT",
+                    f"/api/payments/{rng.choice(ids['payments'])}",
+                    json={"payment_status": rng.choice(["partial", "completed"]), "verified_by": "bench-admin"},
+                    headers=headers
+                )
+            # In-process nothing suspends; let the other workloads run between updates
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(admin() for _ in range(admins)))
+
+
+async def run_benchmark(args, ids: dict, transport: Optional[httpx.AsyncBaseTransport] = None) -> dict:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    headers = {"X-Admin-Key": args.admin_key} if args.admin_key else {}
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout,
+                                 transport=transport) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(
+            registration_burst(client, recorder, rng, args.burst),
+            email_check_typing(client, recorder, rng, args.typists, deadline),
+            dashboard_polling(client, recorder, rng, args.dashboards, args.poll_interval, deadline, headers),
+            bulk_admin_updates(client, recorder, rng, args.updaters, ids, deadline, headers),
+        )
+        elapsed = time.monotonic() - started
+    endpoints = recorder.report(elapsed, args.exclude_errors)
+    return {
+        "generated": datetime.utcnow().isoformat(),
+        "base_url": args.base_url,
+        "duration_s": round(elapsed, 2),
+        "workload": {
+            "burst": args.burst, "typists": args.typists, "dashboards": args.dashboards,
+            "updaters": args.updaters, "preset": args.preset,
+        },
+        "total_requests": sum(item["requests"] for item in endpoints.values()),
+        "endpoints": endpoints,
+    }
+
+
+async def in_process_setup(args):
+    """Import the app on the in-memory backend and seed it; returns (transport, ids)"""
+    os.environ["STORAGE_BACKEND"] = "memory"
+    # Honour the per-user X-Forwarded-For addresses like a proxied deployment
+    os.environ.setdefault("RATE_LIMIT_PROXY_HOPS", "1")
+    from storage import MemoryStorage, use_storage
+    storage = MemoryStorage()
+    use_storage(storage)
+    import server
+
+    print(f"🌱 Seeding the {args.preset} synthetic dataset in memory")
+    await load_repositories(storage, PRESETS[args.preset], seed=args.seed)
+    ids = {
+        "registrations": [doc["id"] for doc in await storage.registrations.find({}, limit=5000)],
+        "payments": [doc["id"] for doc in await storage.payments.find({}, limit=5000)],
+    }
+    return httpx.ASGITransport(app=server.app, client=("127.0.0.1", 0)), ids
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for label, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        ratio = current["p95_ms"] / previous["p95_ms"]
+        current["baseline_p95_ms"] = previous["p95_ms"]
+        current["p95_ratio"] = round(ratio, 2)
+        if ratio > tolerance:
+            regressions.append(f"{label}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-workload load benchmark for the KICON API")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--in-process", action="store_true", help="drive the app in-process on the memory backend")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="kicon_bench", help="database the server under test uses")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="10k", help="synthetic dataset size")
+    parser.add_argument("--no-seed", action="store_true", help="use the existing data as-is")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--burst", type=int, default=300, help="registrations fired at once")
+    parser.add_argument("--typists", type=int, default=20)
+    parser.add_argument("--dashboards", type=int, default=5)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--updaters", type=int, default=3)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--admin-key", help="sent as X-Admin-Key on admin traffic")
+    parser.add_argument("--exclude-errors", action="store_true", help="keep non-2xx responses out of percentiles")
+    parser.add_argument("--output", help="write the JSON result here")
+    parser.add_argument("--baseline", help="previous JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed p95 ratio against the baseline")
+    args = parser.parse_args()
+
+    if args.in_process:
+        async def run_in_process():
+            transport, ids = await in_process_setup(args)
+            print(f"🚀 Running mixed workload in-process for {args.duration:.0f}s")
+            return await run_benchmark(args, ids, transport)
+
+        result = asyncio.run(run_in_process())
+    else:
+        db = MongoClient(args.mongo_url)[args.db]
+        if not args.no_seed:
+            print(f"🌱 Seeding the {args.preset} synthetic dataset into {args.db}")
+            load(db, PRESETS[args.preset], seed=args.seed)
+        ids = load_ids(db)
+
+        print(f"🚀 Running mixed workload against {args.base_url} for {args.duration:.0f}s")
+        result = asyncio.run(run_benchmark(args, ids))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(result, json.load(baseline_file), args.tolerance)
+        result["regressions"] = regressions
+
+    print(f"\n{'ENDPOINT':45} {'REQS':>6} {'OK':>6} {'RPS':>8} {'P50':>8} {'P95':>8} {'P99':>8}")
+    print("-" * 95)
+    for label, stats in result["endpoints"].items():
+        print(f"{label:45} {stats['requests']:>6} {stats['ok']:>6} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+        errors = {status: count for status, count in stats["statuses"].items() if not status.startswith("2")}
+        if errors:
+            print(f"{'':45} non-2xx: {errors}")
+    print(f"\n{result['total_requests']} requests in {result['duration_s']}s")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    if regressions:
+        print("\n❌ p95 regressions against the baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    if args.baseline:
+        print("\n✅ No p95 regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Per-call cost of logging on the request path.
+
+Compares what a route pays for one `logger.info(...)` call when the record is
+formatted and written inline (the old basicConfig setup, here with the JSON
+formatter) against the queue handler, where the caller only stamps context
+and enqueues. A request context is installed so the context lookup is part of
+the measured cost. Output goes to a temporary file in both cases.
+
+Run from the backend directory:
+    python -m benchmarks.logging_benchmark --calls 50000
+"""
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from monitoring.context import RequestContext, current_request
+from monitoring.structured_logging import ContextQueueHandler, JsonFormatter, SamplingFilter
+
+
+def _measure(logger: logging.Logger, calls: int) -> float:
+    started = time.perf_counter()
+    for index in range(calls):
+        logger.info(f"Created registration {index} for delegate@example.com")
+    return (time.perf_counter() - started) / calls
+
+
+def run_benchmark(calls: int, sample_rate: float) -> dict:
+    token = current_request.set(RequestContext({"path": "/api/registrations"}))
+    results = {}
+    try:
+        with tempfile.TemporaryFile("w") as sink:
+            # Inline: format and write on the calling thread
+            logger = logging.getLogger("benchmark.inline")
+            logger.propagate = False
+            handler = logging.StreamHandler(sink)
+            handler.setFormatter(JsonFormatter())
+            logger.handlers = [handler]
+            logger.setLevel(logging.INFO)
+            results["inline_us"] = _measure(logger, calls) * 1e6
+
+            # Queued: stamp and enqueue, a listener thread formats and writes
+            for label, rate in (("queued_us", 1.0), ("queued_sampled_us", sample_rate)):
+                log_queue = queue.Queue(maxsize=calls + 1)
+                queue_handler = ContextQueueHandler(log_queue)
+                queue_handler.addFilter(SamplingFilter(default_rate=rate))
+                listener = QueueListener(log_queue, handler)
+                listener.start()
+                logger = logging.getLogger(f"benchmark.{label}")
+                logger.propagate = False
+                logger.handlers = [queue_handler]
+                logger.setLevel(logging.INFO)
+                results[label] = _measure(logger, calls) * 1e6
+                drain_started = time.perf_counter()
+                listener.stop()
+                results[label.replace("_us", "_drain_s")] = time.perf_counter() - drain_started
+    finally:
+        current_request.reset(token)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-call logging cost on the request path")
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="INFO sample rate for the sampled run")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.calls, args.sample_rate)
+
+    print("🪵 LOGGING COST BENCHMARK")
+    print("-" * 40)
+    print(f"  Calls per run:             {args.calls}")
+    print(f"  Inline JSON handler:       {result['inline_us']:.2f} µs/call")
+    print(f"  Queue handler:             {result['queued_us']:.2f} µs/call "
+          f"(listener drained in {result['queued_drain_s']:.2f}s)")
+    print(f"  Queue handler @ {args.sample_rate:<4}:      {result['queued_sampled_us']:.2f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Mail engine benchmark against a local aiosmtpd sink.
+
+Starts an in-process SMTP server that only counts what it receives, pushes
+N templated messages through the pooled engine and reports messages/second.
+Also verifies every message arrived, so it doubles as an end-to-end check.
+
+Run from the backend directory:
+    python -m benchmarks.mail_benchmark --messages 2000 --connections 4
+"""
+import argparse
+import asyncio
+import time
+
+from aiosmtpd.controller import Controller
+
+from services.mailer import MailEngine, SMTPProvider
+
+
+class CountingHandler:
+    """aiosmtpd handler that accepts and counts every message"""
+
+    def __init__(self):
+        self.received = 0
+        self.connections = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        self.connections.add(id(session))
+        return "250 Message accepted for delivery"
+
+
+async def run_benchmark(messages: int, connections: int, batch_size: int, rate: float, port: int) -> dict:
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    try:
+        engine = MailEngine([SMTPProvider(
+            name="sink",
+            host="127.0.0.1",
+            port=port,
+            use_tls=False,
+            max_connections=connections,
+            rate_per_second=rate,
+            batch_size=batch_size,
+        )], queue_size=messages)
+        await engine.start()
+
+        started = time.perf_counter()
+        for index in range(messages):
+            engine.send_template(
+                "registration_confirmation",
+                f"delegate{index}@example.com",
+                {"fullName": f"Dr. Delegate {index}", "registration_id": f"reg-{index}", "specialty": "dentistry"}
+            )
+        await engine.join()
+        elapsed = time.perf_counter() - started
+        stats = engine.stats()["sink"]
+        await engine.stop()
+    finally:
+        controller.stop()
+
+    return {
+        "messages": messages,
+        "received": handler.received,
+        "smtp_sessions": len(handler.connections),
+        "failed": stats["failed"],
+        "seconds": elapsed,
+        "messages_per_second": messages / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pooled SMTP delivery engine")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=0, help="messages/second cap, 0 for unlimited")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args.messages, args.connections, args.batch_size, args.rate, args.port))
+
+    print("📧 MAIL ENGINE BENCHMARK")
+    print("-" * 40)
+    print(f"  Messages sent:     {result['messages']}")
+    print(f"  Messages received: {result['received']}")
+    print(f"  SMTP sessions:     {result['smtp_sessions']}")
+    print(f"  Failed:            {result['failed']}")
+    print(f"  Elapsed:           {result['seconds']:.2f}s")
+    print(f"  Throughput:        {result['messages_per_second']:.0f} msg/s")
+
+    if result["received"] == result["messages"] and result["failed"] == 0:
+        print("\n✅ All messages delivered to the local sink")
+    else:
+        print("\n❌ Delivery mismatch against the local sink")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
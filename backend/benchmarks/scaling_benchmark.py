@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling of the multi-worker serving mode (serve.py).
+
+For every worker count in --workers the benchmark starts `serve.py` on a
+local port, waits for /api/health/ready, then saturates it for --duration
+seconds per endpoint group from --clients load-generator processes
+(--concurrency connections each), and stops it again:
+
+  static        schedule, package info and bank details: pre-serialized
+                responses, so this is pure HTTP + middleware cost
+  registration  the email availability check, registration lookups and
+                registration submissions (validation, rate limiting,
+                capacity and database work)
+
+It reports requests/s per group and worker count with the speedup over one
+worker and the scaling efficiency (speedup / workers). Scaling can only be
+near-linear while the host has a free core for every worker *and* for the
+load generators, so run the clients on another machine (--base-url plus
+--external) or leave cores for them.
+
+With --mongo-url the servers use MongoDB, seeded with a synthetic_data
+preset. Without it they use the in-memory backend with per-worker data
+(serve.py --allow-per-worker-storage), which is fine for throughput but not
+for correctness.
+
+Run from the backend directory:
+    python -m benchmarks.scaling_benchmark --workers 1,2,4 --duration 15 \\
+        --mongo-url mongodb://localhost:27017 --db kicon_scale --output scaling.json
+    python -m benchmarks.scaling_benchmark --workers 1,2 --duration 5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.load_benchmark import Recorder, _client_ip, _percentile_ms, load_ids, registration_payload
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+GROUPS = ("static", "registration")
+
+
+def _next_request(group: str, ids: List[str], rng: random.Random, index: int):
+    """(label, method, url, json) of the next request a client sends"""
+    if group == "static":
+        return rng.choice([
+            ("GET /api/static/schedule", "GET", "/api/static/schedule", None),
+            ("GET /api/static/package-info", "GET", "/api/static/package-info", None),
+            ("GET /api/payments/bank-details", "GET", "/api/payments/bank-details", None),
+        ])
+    roll = rng.random()
+    if roll < 0.7:
+        return ("GET /api/registrations/email/{email}", "GET",
+                f"/api/registrations/email/scale.{rng.getrandbits(40):x}@example.com", None)
+    if roll < 0.9 and ids:
+        return ("GET /api/registrations/{registration_id}", "GET", f"/api/registrations/{rng.choice(ids)}", None)
+    return ("POST /api/registrations", "POST", "/api/registrations", registration_payload(index, rng))
+
+
+async def _drive(base_url: str, group: str, ids: List[str], concurrency: int, duration: float, seed: int) -> Recorder:
+    rng = random.Random(seed)
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def user(index: int):
+            while time.monotonic() < deadline:
+                label, method, url, body = _next_request(group, ids, rng, index)
+                # A distinct client address per request keeps the per-IP rate limits out of the measurement
+                await recorder.request(client, label, method, url, json=body,
+                                       headers={"X-Forwarded-For": _client_ip(rng)})
+        await asyncio.gather(*(user(index) for index in range(concurrency)))
+    return recorder
+
+
+def _client_process(job: tuple) -> dict:
+    recorder = asyncio.run(_drive(*job))
+    return {"latencies": dict(recorder.latencies), "statuses": {label: dict(counts) for label, counts in recorder.statuses.items()}}
+
+
+def run_group(base_url: str, group: str, ids: List[str], clients: int, concurrency: int, duration: float) -> dict:
+    jobs = [(base_url, group, ids, concurrency, duration, seed) for seed in range(clients)]
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.map(_client_process, jobs)
+    elapsed = time.perf_counter() - started
+    merged = Recorder()
+    for result in results:
+        for label, samples in result["latencies"].items():
+            merged.latencies[label].extend(tuple(sample) for sample in samples)
+        for label, counts in result["statuses"].items():
+            for status, count in counts.items():
+                merged.statuses[label][status] += count
+    # Client start-up is not part of the measured window
+    endpoints = merged.report(duration, exclude_errors=False)
+    all_samples = sorted(seconds for samples in merged.latencies.values() for seconds, _ in samples)
+    total = len(all_samples)
+    return {
+        "requests": total,
+        "throughput_rps": round(total / duration, 1),
+        "p50_ms": _percentile_ms(all_samples, 0.50),
+        "p99_ms": _percentile_ms(all_samples, 0.99),
+        "wall_seconds": round(elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def start_server(workers: int, port: int, env: dict, memory: bool) -> subprocess.Popen:
+    command = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+    if memory:
+        command.append("--allow-per-worker-storage")
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def wait_ready(base_url: str, workers: int, process: Optional[subprocess.Popen], timeout: float = 60.0):
+    """Wait until readiness succeeds repeatedly (requests land on whichever worker accepts first)"""
+    deadline = time.monotonic() + timeout
+    consecutive = 0
+    while consecutive < workers * 3:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"serve.py exited: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{base_url} not ready after {timeout:.0f}s")
+        try:
+            ready = httpx.get(f"{base_url}/api/health/ready", timeout=2).status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        consecutive = consecutive + 1 if ready else 0
+        time.sleep(0.05 if ready else 0.2)
+    # Let the remaining workers finish their startup too
+    time.sleep(1.0)
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput scaling with the number of worker processes")
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--groups", default=",".join(GROUPS))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per group and worker count")
+    parser.add_argument("--clients", type=int, default=max((os.cpu_count() or 2) // 2, 1), help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=64, help="connections per load-generator process")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--base-url", help="with --external: an already running server")
+    parser.add_argument("--external", action="store_true", help="do not start servers; measure --base-url once")
+    parser.add_argument("--mongo-url", help="serve from MongoDB (seeded with --preset) instead of per-worker memory")
+    parser.add_argument("--db", default="kicon_scale")
+    parser.add_argument("--preset", default="1k")
+    parser.add_argument("--pool-budget", type=int, default=100, help="MONGO_POOL_BUDGET shared by the workers")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    groups = [group for group in args.groups.split(",") if group]
+    if args.workers:
+        worker_counts = [int(count) for count in args.workers.split(",")]
+    else:
+        worker_counts = [count for count in (1, 2, 4, 8, 16, 32) if count <= (os.cpu_count() or 1)]
+
+    ids: List[str] = []
+    env = dict(os.environ, RATE_LIMIT_PROXY_HOPS="1", LOG_LEVEL="WARNING", PYTHONUNBUFFERED="1")
+    if args.mongo_url:
+        from pymongo import MongoClient
+        from tools.synthetic_data import PRESETS, load
+        db = MongoClient(args.mongo_url)[args.db]
+        print(f"🌱 Seeding {args.db} with the {args.preset} preset")
+        load(db, PRESETS[args.preset], drop=True)
+        ids = load_ids(db)["registrations"]
+        env.update(STORAGE_BACKEND="mongo", MONGO_URL=args.mongo_url, DB_NAME=args.db,
+                   MONGO_POOL_BUDGET=str(args.pool_budget))
+    else:
+        env.update(STORAGE_BACKEND="memory")
+
+    results = {}
+    for workers in ([None] if args.external else worker_counts):
+        base_url = args.base_url if args.external else f"http://127.0.0.1:{args.port}"
+        process = None if args.external else start_server(workers, args.port, env, memory=not args.mongo_url)
+        label = "external" if args.external else str(workers)
+        try:
+            wait_ready(base_url, workers or 1, process)
+            results[label] = {}
+            for group in groups:
+                print(f"⏱️  workers={label} group={group}: {args.clients} clients x {args.concurrency} connections, {args.duration:.0f}s")
+                results[label][group] = run_group(base_url, group, ids, args.clients, args.concurrency, args.duration)
+        finally:
+            if process is not None:
+                stop_server(process)
+
+    print(f"\n{'workers':>8} {'group':<14} {'req/s':>10} {'speedup':>8} {'efficiency':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, by_group in results.items():
+        for group, result in by_group.items():
+            base = results.get("1", {}).get(group, {}).get("throughput_rps")
+            speedup = result["throughput_rps"] / base if base else None
+            efficiency = speedup / int(label) if speedup and label.isdigit() else None
+            print(f"{label:>8} {group:<14} {result['throughput_rps']:>10.1f} "
+                  f"{(f'{speedup:.2f}x' if speedup else '-'):>8} {(f'{efficiency:.0%}' if efficiency else '-'):>10} "
+                  f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+            result["speedup"] = round(speedup, 3) if speedup else None
+            result["efficiency"] = round(efficiency, 3) if efficiency else None
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({"cpu_count": os.cpu_count(), "clients": args.clients, "concurrency": args.concurrency,
+                       "duration": args.duration, "results": results}, output, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,68 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
\ No newline at end of file
+"""
+MongoDB connection, created on first use.
+
+Importing this module neither reads the environment nor imports Motor: the
+client is built by the first `get_client()` / `get_db()` from the active
+settings (pool size and timeouts included), and `warm_up()` lets startup
+open minPoolSize connections before the app reports ready instead of making
+the first requests pay for server selection and the TCP/TLS/auth handshakes.
+"""
+import asyncio
+import time
+
+from monitoring.mongo import command_listener, pool_listener
+from settings import get_settings
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        settings = get_settings()
+        if not settings.mongo_url:
+            raise RuntimeError("MONGO_URL is not set")
+        _client = AsyncIOMotorClient(
+            settings.mongo_url,
+            event_listeners=[command_listener, pool_listener],
+            **settings.mongo_client_options()
+        )
+        pool_listener.max_pool_size = _client.options.pool_options.max_pool_size
+        pool_listener.min_pool_size = _client.options.pool_options.min_pool_size
+    return _client
+
+
+def get_db():
+    return get_client()[get_settings().db_name]
+
+
+async def ping(timeout: float = None) -> float:
+    """Round-trip a ping to the server; returns its duration in milliseconds"""
+    started = time.perf_counter()
+    await asyncio.wait_for(get_client().admin.command("ping"), timeout)
+    return (time.perf_counter() - started) * 1000
+
+
+async def warm_up(timeout: float = 10.0) -> int:
+    """Open minPoolSize connections (at least one); returns the number open"""
+    client = get_client()
+    deadline = time.monotonic() + timeout
+    # The first ping also waits for server selection
+    await ping(timeout)
+    target = max(pool_listener.min_pool_size, 1)
+    while pool_listener.open_connections() < target and time.monotonic() < deadline:
+        # Each in-flight ping holds a connection, so concurrent pings make the pool open new ones
+        missing = target - pool_listener.open_connections()
+        await asyncio.wait_for(
+            asyncio.gather(*(client.admin.command("ping") for _ in range(missing + 1))),
+            max(deadline - time.monotonic(), 0.001)
+        )
+    return pool_listener.open_connections()
+
+
+def close():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,85 @@
+"""
+Index definitions for every filter/sort shape the routes issue.
+
+Kept in one place so startup, the query-plan audit and the data generator
+all build exactly the same indexes.
+"""
+import asyncio
+import logging
+import os
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Status checks (uptime pings) are deleted by MongoDB's TTL monitor after this long
+STATUS_CHECK_TTL_SECONDS = int(os.environ.get('STATUS_CHECK_TTL_SECONDS', str(7 * 24 * 3600)))
+
+INDEXES = {
+    "registrations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("registrationDate", DESCENDING)], name="registrationDate_desc"),
+        IndexModel([("registrationStatus", ASCENDING), ("registrationDate", DESCENDING)], name="status_registrationDate"),
+        IndexModel([("specialty", ASCENDING)], name="specialty"),
+        # Reminder campaigns stream recipients in id order
+        IndexModel([("paymentStatus", ASCENDING), ("id", ASCENDING)], name="paymentStatus_id"),
+        IndexModel([("registrationStatus", ASCENDING), ("id", ASCENDING)], name="registrationStatus_id"),
+        # Duplicate-delegate candidates (services/dedup.py); multikey over the normalized keys
+        IndexModel([("dedupKeys", ASCENDING)], name="dedupKeys"),
+    ],
+    "payments": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # One payment record per registration, even when two workers create it at once
+        IndexModel([("registration_id", ASCENDING)], name="registration_id_unique", unique=True),
+        IndexModel([("created_date", DESCENDING)], name="created_date_desc"),
+        IndexModel([("payment_status", ASCENDING), ("created_date", DESCENDING)], name="status_created_date"),
+    ],
+    "contacts": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("createdDate", DESCENDING)], name="createdDate_desc"),
+        IndexModel([("status", ASCENDING), ("createdDate", DESCENDING)], name="status_createdDate"),
+        IndexModel([("inquiryType", ASCENDING), ("createdDate", DESCENDING)], name="inquiryType_createdDate"),
+    ],
+    "counters": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    # Also serves GET /api/status?since=, which reads in timestamp order
+    "status_checks": [
+        IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=STATUS_CHECK_TTL_SECONDS),
+    ],
+    "campaign_runs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("campaign", ASCENDING), ("run_date", DESCENDING)], name="campaign_run_date"),
+    ],
+}
+
+
+# Collections created per time period ("<prefix>_<period>"); indexed when first written
+PARTITIONED_INDEXES = {
+    "audit_log": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("entity_type", ASCENDING), ("entity_id", ASCENDING), ("timestamp", DESCENDING)],
+                   name="entity_timestamp"),
+    ],
+}
+
+
+async def _create_indexes(db, collection: str, models):
+    try:
+        await db[collection].create_indexes(models)
+    except OperationFailure as e:
+        # e.g. duplicate emails in legacy data blocking the unique index
+        logger.error(f"Failed to create indexes on {collection}: {str(e)}")
+
+
+async def ensure_indexes(db):
+    """Create all indexes; a failing collection is logged rather than aborting startup"""
+    # One createIndexes per collection, issued concurrently: startup waits for the slowest, not the sum
+    await asyncio.gather(*(_create_indexes(db, collection, models) for collection, models in INDEXES.items()))
+
+
+async def ensure_partition_indexes(db, prefix: str, collection: str):
+    """Create the PARTITIONED_INDEXES of `prefix` on one partition collection"""
+    await _create_indexes(db, collection, PARTITIONED_INDEXES[prefix])
@@ -0,0 +1,185 @@
+"""
+Admission control and load shedding.
+
+Every request is classified into a route class (delegate writes, delegate
+reads, admin, static) and must obtain a slot from that class's limiter before
+it runs. Each limiter has a fixed concurrency, a bounded FIFO wait queue and a
+queue-time deadline: a full queue or an expired deadline is answered straight
+away with 503 and Retry-After. Slow admin listings can then only exhaust their
+own slots, and delegate flows keep a bounded tail latency under overload.
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from monitoring.metrics import gauge_lines
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RouteClass:
+    """Admission limits for one class of routes.
+
+    Limits can be overridden with ADMISSION_<NAME>="concurrency/queue/timeout_seconds".
+    """
+    name: str
+    concurrency: int
+    max_queue: int
+    queue_timeout: float
+
+    def __post_init__(self):
+        override = os.environ.get(f"ADMISSION_{self.name.upper()}")
+        if override:
+            concurrency, max_queue, queue_timeout = override.split("/")
+            self.concurrency, self.max_queue, self.queue_timeout = int(concurrency), int(max_queue), float(queue_timeout)
+
+
+class Rejected(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+
+class ClassLimiter:
+    """Semaphore with a bounded FIFO wait queue and per-waiter deadlines"""
+
+    def __init__(self, route_class: RouteClass):
+        self.route_class = route_class
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: deque = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Take a slot, waiting in line if needed; returns the time spent queued"""
+        if self.active < self.route_class.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+        if len(self._waiters) >= self.route_class.max_queue:
+            self.rejected += 1
+            raise Rejected(self._retry_after())
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.route_class.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Slot was handed over just as the deadline hit; give it back
+                self.release()
+            else:
+                waiter.cancel()
+            self.timed_out += 1
+            raise Rejected(self._retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self.admitted += 1
+        return time.monotonic() - started
+
+    def release(self):
+        # Hand the slot directly to the oldest live waiter so it cannot be stolen
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _retry_after(self) -> float:
+        return max(1.0, self.route_class.queue_timeout)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "concurrency": self.route_class.concurrency,
+            "max_queue": self.route_class.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Route classifier plus one limiter per route class"""
+
+    def __init__(self, classes: List[RouteClass], routes: List[Tuple[str, str, str]], default: str):
+        """`routes` is an ordered list of (class name, method regex, path regex); first match wins"""
+        self.limiters = {route_class.name: ClassLimiter(route_class) for route_class in classes}
+        self.routes = [(name, re.compile(method), re.compile(path)) for name, method, path in routes]
+        self.default = default
+
+    def classify(self, method: str, path: str) -> str:
+        for name, method_pattern, path_pattern in self.routes:
+            if method_pattern.fullmatch(method) and path_pattern.fullmatch(path):
+                return name
+        return self.default
+
+    def stats(self) -> dict:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+    def collect(self):
+        """Metrics collector: current slots, queue depth and shed counts per class"""
+        stats = self.stats()
+        for field in ("active", "queued", "admitted", "rejected", "timed_out"):
+            yield from gauge_lines(
+                f"kicon_admission_{field}", f"Admission control {field.replace('_', ' ')} per route class",
+                ("route_class",), [(name, values[field]) for name, values in stats.items()]
+            )
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        controller = self.controller
+        limiter = controller.limiters[controller.classify(scope["method"], scope["path"])]
+        try:
+            await limiter.acquire()
+        except Rejected as rejection:
+            return await self._shed(send, rejection.retry_after, limiter.route_class.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _shed(send, retry_after: float, route_class: str):
+        body = b'{"detail":"Server is busy. Please retry shortly."}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(int(retry_after)).encode()),
+                (b"x-admission-class", route_class.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,81 @@
+"""
+Request metrics middleware.
+
+Records in-flight requests, request counts and latency per route template
+(e.g. `/api/registrations/{registration_id}`) rather than raw path, so the
+number of series stays bounded no matter what IDs clients send. It also
+installs the per-request context that the MongoDB listeners attribute
+commands to, echoes the request id in X-Request-ID and emits one structured
+access record per request on the `kicon.access` logger.
+"""
+import logging
+import re
+import time
+from typing import Optional
+
+from monitoring.context import RequestContext, current_request
+from monitoring.metrics import http_request_duration, http_requests_in_flight, http_requests_total
+
+access_logger = logging.getLogger("kicon.access")
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Accept upstream ids (load balancer, client) only if they are short and plain
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def _incoming_request_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == REQUEST_ID_HEADER:
+            request_id = value.decode("latin-1")
+            return request_id if _VALID_REQUEST_ID.match(request_id) else None
+    return None
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        context = RequestContext(scope, _incoming_request_id(scope))
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, context.request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = current_request.set(context)
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(method)
+            template = context.route
+            status_text = str(status)
+            http_requests_total.inc(method, template, status_text)
+            http_request_duration.observe(method, template, status_text, value=elapsed)
+            if access_logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                access_logger.info(
+                    f"{method} {scope['path']} {status}",
+                    extra={
+                        "method": method,
+                        "path": scope["path"],
+                        "status": status,
+                        "latency_ms": round(elapsed * 1000, 2),
+                        "db_time_ms": round(context.db_time * 1000, 2),
+                        "db_calls": context.db_calls,
+                        "client": client[0] if client else None,
+                    }
+                )
+            current_request.reset(token)
@@ -0,0 +1,57 @@
+"""
+Per-request profiling middleware.
+
+A request is profiled when it carries `X-Profile: 1` (or `?__profile=1`)
+together with a valid admin key, or when it is picked by the random
+PROFILE_SAMPLE_RATE. The collapsed-stack file is stored under PROFILE_DIR and
+its id is returned in the X-Profile-Id response header; fetch it from
+/api/diagnostics/profiles/{id}.
+"""
+import asyncio
+import logging
+import os
+import random
+
+from monitoring.profiler import sampler, save_profile
+from security import ADMIN_HEADER, is_admin_key
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+
+
+def _wants_profile(scope) -> bool:
+    headers = dict(scope["headers"])
+    requested = headers.get(b"x-profile") == b"1" or b"__profile=1" in scope.get("query_string", b"")
+    if requested:
+        admin_key = headers.get(ADMIN_HEADER.encode())
+        return is_admin_key(admin_key.decode("latin-1") if admin_key else None)
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            return await self.app(scope, receive, send)
+
+        profile = sampler.begin(f"{scope['method']} {scope['path']}")
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.end(profile)
+            try:
+                await asyncio.to_thread(save_profile, profile)
+                logger.info(f"Stored profile {profile.id} for {profile.label} "
+                            f"({sum(profile.samples.values())} samples, {profile.duration * 1000:.1f}ms)")
+            except OSError as e:
+                logger.error(f"Failed to store profile {profile.id}: {str(e)}")
@@ -0,0 +1,232 @@
+"""
+Per-client token-bucket rate limiting.
+
+Implemented as a plain ASGI middleware so abusive clients are rejected before
+routing, body validation or any database work happens. Buckets live in a flat
+dict of `key -> [tokens, last_refill, refill_seconds]`, and keys idle long
+enough to refill completely are swept out periodically. An optional
+MongoDB-backed bucket store keeps limits consistent across workers; the local
+buckets still run first so floods are rejected without a round-trip.
+"""
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass
+class RateLimitRule:
+    """Limit `limit` such as "5/minute" for requests matching method and path regex.
+
+    `key` selects what is counted: "ip", "path:<group>" for a named group in
+    the path regex, or "body:<field>" for a top-level JSON body field. The
+    limit can be overridden per deployment with RATE_LIMIT_<NAME>.
+    """
+    name: str
+    method: str
+    path: str
+    limit: str
+    key: str = "ip"
+
+    def __post_init__(self):
+        self.limit = os.environ.get(f"RATE_LIMIT_{self.name.upper()}", self.limit)
+        count, period = self.limit.split("/")
+        self.capacity = float(count)
+        self.rate = self.capacity / _PERIODS[period]
+        self.pattern = re.compile(self.path)
+
+
+class TokenBuckets:
+    """Compact in-process token buckets keyed by string"""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self._buckets: Dict[str, list] = {}
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key: str, rule: RateLimitRule, now: Optional[float] = None) -> float:
+        """Consume one token; return 0 if allowed, else seconds until one is available"""
+        now = now or time.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [rule.capacity - 1, now, rule.capacity / rule.rate]
+            return 0.0
+        tokens = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rule.rate
+
+    def sweep(self, now: Optional[float] = None):
+        """Drop buckets that have been idle long enough to be full again"""
+        now = now or time.monotonic()
+        idle = [key for key, (_, last, refill) in self._buckets.items() if now - last >= refill]
+        for key in idle:
+            del self._buckets[key]
+        self._next_sweep = now + self._sweep_interval
+
+
+class MongoTokenBuckets:
+    """Shared token buckets stored in MongoDB, refilled atomically server-side"""
+
+    def __init__(self, get_collection: Callable):
+        # Resolved on first use so building the middleware never creates the Mongo client
+        self._get_collection = get_collection
+        self._collection = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = self._get_collection()
+        return self._collection
+
+    async def ensure_indexes(self):
+        # Idle buckets disappear once they would have refilled completely
+        await self.collection.create_index("expires", expireAfterSeconds=0)
+
+    async def take(self, key: str, rule: RateLimitRule) -> float:
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, 1000]}
+        refilled = {"$min": [rule.capacity, {"$add": [{"$ifNull": ["$tokens", rule.capacity]}, {"$multiply": [elapsed, rule.rate]}]}]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "ts": now}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires": now + timedelta(seconds=rule.capacity / rule.rate),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return 0.0
+        return (1 - doc["tokens"]) / rule.rate
+
+
+def client_ip(scope, proxy_hops: int) -> str:
+    """The client address as seen by the last of `proxy_hops` trusted proxies
+
+    Earlier X-Forwarded-For entries are whatever the client sent, so they are
+    never used; without trusted proxies the socket peer is the client.
+    """
+    if proxy_hops:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",")]
+                if len(hops) >= proxy_hops:
+                    return hops[-proxy_hops]
+                break
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules: List[RateLimitRule], shared: Optional[MongoTokenBuckets] = None,
+                 proxy_hops: int = 0, max_body_bytes: int = 65536):
+        self.app = app
+        self.rules = rules
+        self.shared = shared
+        self.proxy_hops = proxy_hops
+        self.max_body_bytes = max_body_bytes
+        self.buckets = TokenBuckets()
+
+    async def _read_body(self, receive) -> Tuple[bytes, list]:
+        messages, body = [], b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            body += message.get("body", b"")
+            if not message.get("more_body") or len(body) > self.max_body_bytes:
+                return body, messages
+
+    async def _check(self, key: str, rule: RateLimitRule) -> float:
+        retry_after = self.buckets.take(key, rule)
+        if retry_after == 0 and self.shared is not None:
+            try:
+                retry_after = await self.shared.take(key, rule)
+            except Exception as e:
+                # Fail open: the local bucket already bounds each worker
+                logger.error(f"Shared rate limit backend error: {str(e)}")
+        return retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+        replay = None
+        for rule in self.rules:
+            if rule.method != method:
+                continue
+            match = rule.pattern.fullmatch(path)
+            if not match:
+                continue
+
+            if rule.key == "ip":
+                value = client_ip(scope, self.proxy_hops)
+            elif rule.key.startswith("path:"):
+                value = match.group(rule.key[5:]).lower()
+            else:
+                if replay is None:
+                    body, replay = await self._read_body(receive)
+                    try:
+                        payload = json.loads(body) if body else {}
+                    except ValueError:
+                        payload = {}
+                value = payload.get(rule.key[5:]) if isinstance(payload, dict) else None
+                if not isinstance(value, str):
+                    continue
+                value = value.strip().lower()
+
+            retry_after = await self._check(f"{rule.name}:{value}", rule)
+            if retry_after:
+                return await self._reject(send, retry_after)
+
+        if replay is not None:
+            receive = self._replay(replay, receive)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _replay(messages: list, receive):
+        pending = list(messages)
+
+        async def replay_receive():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay_receive
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        body = b'{"detail":"Too many requests. Please slow down and try again later."}'
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
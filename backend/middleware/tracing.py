@@ -0,0 +1,54 @@
+"""
+Tracing middleware.
+
+Starts the root span of each sampled HTTP request (see monitoring/tracing.py),
+names it after the route template once routing has happened, and returns the
+trace id in X-Trace-ID so a slow response can be looked up in the trace file.
+"""
+from monitoring.tracing import current_span, tracer
+
+TRACEPARENT_HEADER = b"traceparent"
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        traceparent = next(
+            (value.decode("latin-1") for name, value in scope.get("headers", ()) if name == TRACEPARENT_HEADER),
+            None
+        )
+        span = tracer.start_trace(
+            f"{scope['method']} {scope['path']}", traceparent,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        if span is None:
+            return await self.app(scope, receive, send)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.error = f"HTTP {message['status']}"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-trace-id", span.trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.route", route.path)
+            tracer.finish(span)
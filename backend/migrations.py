@@ -0,0 +1,163 @@
+"""
+Schema versions of the stored documents and the migrations between them.
+
+Every registration, payment and contact document carries `schemaVersion`;
+documents written before versioning have none and count as version 0. A
+migration upgrades a document by one version. It is a plain function of the
+document, registered here in version order:
+
+    @migration("contacts", 2, fields=("phone",))
+    def contacts_v2(document: dict) -> dict: ...
+
+Migrations are applied in three places, so a schema change never needs
+downtime or a full-collection rewrite at deploy time:
+- on read: repositories/versioned.py upgrades every document it returns, so
+  handlers and `Model(**document)` only ever see the current shape, and
+  queues the change to be written back in the background.
+- on write: new documents are stamped with the current version.
+- in bulk: tools/migrate_schema.py converts whole collections in resumable,
+  throttled batches. Until it has run, filters on a migrated field only
+  match documents that are already upgraded.
+
+Migrations must tolerate missing fields (projected reads pass partial
+documents) and must not depend on anything but the document.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from repositories.base import UpdateOperation
+from services.dedup import DEDUP_FIELDS, dedup_keys
+
+SCHEMA_VERSION_FIELD = "schemaVersion"
+
+
+@dataclass
+class Migration:
+    collection: str
+    version: int  # the version a document has after this migration
+    upgrade: Callable[[dict], dict]
+    # Fields the migration reads or writes; projected reads fetch them too
+    fields: Tuple[str, ...] = ()
+
+
+MIGRATIONS: Dict[str, List[Migration]] = {"registrations": [], "payments": [], "contacts": []}
+
+
+def migration(collection: str, version: int, fields: Tuple[str, ...] = ()):
+    """Register the decorated function as the upgrade of `collection` documents to `version`"""
+    def register(upgrade: Callable[[dict], dict]):
+        migrations = MIGRATIONS[collection]
+        if version != len(migrations) + 1:
+            raise ValueError(f"{collection} migration to version {version} registered out of order")
+        migrations.append(Migration(collection, version, upgrade, tuple(fields)))
+        return upgrade
+    return register
+
+
+def current_version(collection: str) -> int:
+    return len(MIGRATIONS.get(collection, ()))
+
+
+def document_version(document: dict) -> int:
+    return document.get(SCHEMA_VERSION_FIELD) or 0
+
+
+def migration_fields(collection: str, fields: List[str]) -> Set[str]:
+    """The fields a projection on `fields` must fetch so the migrations touching them can run"""
+    needed = set(fields) | {SCHEMA_VERSION_FIELD}
+    for step in MIGRATIONS.get(collection, ()):
+        if needed.intersection(step.fields):
+            needed.update(step.fields)
+    return needed
+
+
+def upgrade(collection: str, document: dict) -> Optional[dict]:
+    """A copy of the document upgraded to the current version, or None if it already is"""
+    migrations = MIGRATIONS.get(collection, [])
+    version = document_version(document)
+    if version >= len(migrations):
+        return None
+    upgraded = dict(document)
+    for step in migrations[version:]:
+        upgraded = step.upgrade(upgraded)
+    upgraded[SCHEMA_VERSION_FIELD] = len(migrations)
+    return upgraded
+
+
+def write_back(original: dict, upgraded: dict) -> Optional[UpdateOperation]:
+    """The update turning a stored document into its upgraded form
+
+    It only applies while the document still has the version and the values it
+    was upgraded from, so a handler's write in between is never overwritten
+    (the document is simply upgraded again on its next read).
+    """
+    if original.get("id") is None:
+        return None
+    changed = {field: value for field, value in upgraded.items()
+               if field not in original or original[field] != value}
+    removed = [field for field in original if field not in upgraded]
+    filter = {"id": original["id"], SCHEMA_VERSION_FIELD: original.get(SCHEMA_VERSION_FIELD)}
+    for field in list(changed) + removed:
+        if field != SCHEMA_VERSION_FIELD:
+            filter[field] = original.get(field)
+    return UpdateOperation(filter, changed, removed)
+
+
+def _lowercase(document: dict, fields: Tuple[str, ...]):
+    for field in fields:
+        value = document.get(field)
+        if isinstance(value, str):
+            document[field] = value.strip().lower()
+
+
+def _default(document: dict, field: str, value):
+    if document.get(field) is None:
+        document[field] = value
+
+
+REGISTRATION_ENUM_FIELDS = ("gender", "specialty", "foodPreference", "registrationStatus", "paymentStatus")
+
+
+@migration("registrations", 1, fields=REGISTRATION_ENUM_FIELDS + (
+    "interests", "mou", "specialAssistance", "registrationDate", "lastUpdated"
+))
+def registrations_v1(document: dict) -> dict:
+    """Early registrations stored the labels of contracts.md ("Dermatology", "Non-Vegetarian")
+    and left the status and flag defaults unset"""
+    _lowercase(document, REGISTRATION_ENUM_FIELDS)
+    _default(document, "registrationStatus", "pending")
+    _default(document, "paymentStatus", "unpaid")
+    _default(document, "interests", [])
+    _default(document, "mou", False)
+    _default(document, "specialAssistance", False)
+    if "registrationDate" in document:
+        _default(document, "lastUpdated", document["registrationDate"])
+    return document
+
+
+@migration("payments", 1, fields=("inr_base_amount", "base_inr_amount", "created_date", "last_updated"))
+def payments_v1(document: dict) -> dict:
+    """Records written from PaymentCalculation used its `base_inr_amount` name for `inr_base_amount`"""
+    if "base_inr_amount" in document:
+        value = document.pop("base_inr_amount")
+        _default(document, "inr_base_amount", value)
+    if "created_date" in document:
+        _default(document, "last_updated", document["created_date"])
+    return document
+
+
+@migration("contacts", 1, fields=("inquiryType", "createdDate", "lastUpdated"))
+def contacts_v1(document: dict) -> dict:
+    """The contracts.md inquiry had no lastUpdated and defaulted inquiryType, which the model requires"""
+    _default(document, "inquiryType", "general")
+    if "createdDate" in document:
+        _default(document, "lastUpdated", document["createdDate"])
+    return document
+
+
+@migration("registrations", 2, fields=DEDUP_FIELDS + ("dedupKeys",))
+def registrations_v2(document: dict) -> dict:
+    """Normalized duplicate-detection keys (services/dedup.py)"""
+    if all(field in document for field in DEDUP_FIELDS):
+        document["dedupKeys"] = dedup_keys(document)
+    return document
@@ -0,0 +1,35 @@
+"""
+Per-request context shared by the instrumentation layers.
+
+The metrics middleware installs a RequestContext in a ContextVar for every
+HTTP request. Motor copies the current context into its executor threads, so
+the pymongo listeners can see which request (and, once routing has happened,
+which route template) issued each command. The request id ties the
+structured log lines of one request together.
+"""
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+
+class RequestContext:
+    __slots__ = ("scope", "request_id", "db_time", "db_calls")
+
+    def __init__(self, scope: dict, request_id: Optional[str] = None):
+        self.scope = scope
+        self.request_id = request_id or uuid.uuid4().hex
+        self.db_time = 0.0
+        self.db_calls = 0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+current_request: ContextVar[Optional[RequestContext]] = ContextVar("current_request", default=None)
+
+
+def current_route() -> str:
+    context = current_request.get()
+    return context.route if context is not None else "background"
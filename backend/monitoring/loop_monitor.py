@@ -0,0 +1,146 @@
+"""
+Event-loop health monitor.
+
+A heartbeat task sleeps for LOOP_HEARTBEAT_MS and records how late it wakes
+up; that lateness is the scheduling lag every other coroutine is seeing. The
+heartbeat can only measure a stall after it ends, so a watchdog thread also
+checks the time of the last beat: once it is older than LOOP_STALL_MS the
+watchdog grabs the loop thread's stack and the running task while the
+blocking call is still on the stack.
+
+Optionally (LOOP_DEBUG=true) asyncio debug mode is enabled with
+slow_callback_duration set to the same threshold, which makes asyncio log
+every callback that ran too long.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from monitoring.metrics import gauge_lines, registry
+from monitoring.profiler import running_tasks
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = float(os.environ.get('LOOP_HEARTBEAT_MS', '20')) / 1000
+STALL_THRESHOLD = float(os.environ.get('LOOP_STALL_MS', '100')) / 1000
+LOOP_DEBUG = os.environ.get('LOOP_DEBUG', 'false').lower() == 'true'
+
+loop_lag = registry.histogram(
+    "kicon_event_loop_lag_seconds", "Event loop scheduling lag measured by the heartbeat",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+loop_stalls = registry.counter(
+    "kicon_event_loop_stalls_total", "Times the event loop was blocked longer than the stall threshold")
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = HEARTBEAT_INTERVAL, stall_threshold: float = STALL_THRESHOLD,
+                 window: int = 3000):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.recent_lag = deque(maxlen=window)
+        self.stalls = deque(maxlen=50)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._last_beat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        if LOOP_DEBUG:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.stall_threshold
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - expected)
+            self.recent_lag.append(lag)
+            loop_lag.observe(value=lag)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopping.wait(self.stall_threshold / 2):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for < self.stall_threshold or reported_beat == last_beat:
+                continue
+            # One report per stall: remember which heartbeat we were stuck after
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread)
+            task = running_tasks.get(self._loop)
+            stall = {
+                "time": datetime.utcnow().isoformat(),
+                "blocked_ms": round(blocked_for * 1000, 1),
+                "task": task.get_name() if task is not None else None,
+                "coroutine": getattr(task.get_coro(), "__qualname__", None) if task is not None else None,
+                "stack": traceback.format_stack(frame) if frame is not None else [],
+            }
+            self.stalls.append(stall)
+            loop_stalls.inc()
+            logger.warning(
+                f"Event loop blocked for {stall['blocked_ms']}ms in task {stall['task']} "
+                f"({stall['coroutine']}):\n{''.join(stall['stack'][-8:])}"
+            )
+
+    def percentiles(self) -> dict:
+        values = sorted(self.recent_lag)
+        return {
+            "samples": len(values),
+            "p50_ms": round(_percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+
+    def collect(self):
+        stats = self.percentiles()
+        yield from gauge_lines(
+            "kicon_event_loop_lag_percentile_seconds", "Recent event loop lag percentiles",
+            ("quantile",),
+            [(quantile, stats[f"{key}_ms"] / 1000) for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))]
+        )
+
+    def report(self) -> dict:
+        return {
+            "heartbeat_ms": self.interval * 1000,
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "debug_mode": LOOP_DEBUG,
+            "lag": self.percentiles(),
+            "recent_stalls": list(reversed(self.stalls)),
+        }
+
+
+loop_monitor = LoopMonitor()
+registry.add_collector(loop_monitor.collect)
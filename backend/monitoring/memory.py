@@ -0,0 +1,152 @@
+"""
+In-situ memory diagnostics: tracemalloc snapshots, diffs and GC statistics.
+
+Snapshots are kept in memory (at most MAX_SNAPSHOTS, oldest evicted) and
+filtered to drop tracemalloc/importlib noise. Heavy work such as taking a
+snapshot or walking gc.get_objects() is meant to be called from a worker
+thread so the event loop keeps serving requests.
+"""
+import gc
+import linecache
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+MAX_SNAPSHOTS = 10
+
+_NOISE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_snapshots: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def tracing_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "peak_traced_bytes": peak,
+        "snapshots": list(_snapshots),
+    }
+
+
+def start_tracing(frames: int = 1) -> dict:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracing_status()
+
+
+def stop_tracing() -> dict:
+    # Snapshots stay readable after tracing stops
+    tracemalloc.stop()
+    return tracing_status()
+
+
+def take_snapshot(name: Optional[str] = None) -> dict:
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+    snapshot_id = name or uuid.uuid4().hex[:8]
+    _snapshots[snapshot_id] = {
+        "snapshot": snapshot,
+        "taken": datetime.utcnow().isoformat(),
+        "total_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+    }
+    while len(_snapshots) > MAX_SNAPSHOTS:
+        _snapshots.popitem(last=False)
+    return {"id": snapshot_id, "taken": _snapshots[snapshot_id]["taken"], "total_bytes": _snapshots[snapshot_id]["total_bytes"]}
+
+
+def list_snapshots() -> list:
+    return [
+        {"id": snapshot_id, "taken": entry["taken"], "total_bytes": entry["total_bytes"]}
+        for snapshot_id, entry in _snapshots.items()
+    ]
+
+
+def delete_snapshot(snapshot_id: str) -> bool:
+    return _snapshots.pop(snapshot_id, None) is not None
+
+
+def _get(snapshot_id: str):
+    entry = _snapshots.get(snapshot_id)
+    if entry is None:
+        raise KeyError(snapshot_id)
+    return entry["snapshot"]
+
+
+def _site(traceback, group_by: str) -> dict:
+    frame = traceback[0]
+    site = {"module": _module_name(frame.filename)}
+    if group_by != "filename":
+        site["line"] = frame.lineno
+        site["code"] = linecache.getline(frame.filename, frame.lineno).strip()
+    return site
+
+
+def _module_name(filename: str) -> str:
+    path = Path(filename)
+    parts = path.with_suffix("").parts
+    # Show the last few path components, e.g. routes/registrations or pydantic/main
+    return "/".join(parts[-2:]) if len(parts) > 1 else path.stem
+
+
+def top_allocations(snapshot_id: str, group_by: str = "lineno", limit: int = 20) -> list:
+    """Largest allocation sites, grouped by module ('filename') or module and line ('lineno')"""
+    stats = _get(snapshot_id).statistics(group_by)
+    return [
+        {**_site(stat.traceback, group_by), "size_bytes": stat.size, "count": stat.count}
+        for stat in stats[:limit]
+    ]
+
+
+def diff_snapshots(base_id: str, target_id: str, group_by: str = "lineno", limit: int = 20) -> list:
+    """Allocation growth from `base_id` to `target_id`, largest absolute change first"""
+    stats = _get(target_id).compare_to(_get(base_id), group_by)
+    return [
+        {
+            **_site(stat.traceback, group_by),
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit]
+    ]
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def gc_report(tracked_types: tuple) -> dict:
+    """GC generation counts/stats plus live instance counts for the given classes"""
+    counts = {cls.__name__: 0 for cls in tracked_types}
+    objects = gc.get_objects()
+    for obj in objects:
+        if isinstance(obj, tracked_types):
+            counts[type(obj).__name__] = counts.get(type(obj).__name__, 0) + 1
+    return {
+        "rss_bytes": _rss_bytes(),
+        "gc_thresholds": gc.get_threshold(),
+        "gc_generation_counts": gc.get_count(),
+        "gc_stats": gc.get_stats(),
+        "gc_tracked_objects": len(objects),
+        "instances": counts,
+    }
@@ -0,0 +1,172 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Every metric keeps one child per label-value tuple, and each child is a few
+plain Python numbers. Updates happen on the event loop thread of the worker
+that owns the registry, so no locks are needed and an observation costs a
+dict lookup plus a bisect (the pymongo listeners, which run on driver
+threads, serialise their own updates). Histograms use fixed buckets and store per-bucket
+counts; they are made cumulative only when rendered.
+"""
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Request/DB latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._children[labels] = self._children.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in list(self._children.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        self._children[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        self._children[labels] = self._children.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self._children[labels] = self._children.get(labels, 0) - amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in list(self._children.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value: float):
+        child = self._children.get(labels)
+        if child is None:
+            # [per-bucket counts (+Inf last), sum]
+            child = self._children[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        child[0][bisect_left(self.buckets, value)] += 1
+        child[1] += value
+
+    def snapshot(self, *labels) -> Tuple[List[int], float]:
+        counts, total = self._children.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+        return list(counts), total
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total) in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def _register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]):
+        """Register a callable that yields exposition lines at scrape time"""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(name: str, documentation: str, labelnames: Sequence[str], samples: Iterable[Tuple]) -> List[str]:
+    """Render a gauge family from (label values..., value) tuples, for collectors"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for sample in samples:
+        lines.append(f"{name}{_format_labels(labelnames, sample[:-1])} {_format_value(sample[-1])}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "kicon_http_requests_total", "HTTP requests by route template, method and status",
+    ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "kicon_http_request_duration_seconds", "HTTP request latency by route template, method and status",
+    ("method", "route", "status"))
+http_requests_in_flight = registry.gauge(
+    "kicon_http_requests_in_flight", "HTTP requests currently being served", ("method",))
+mongo_command_duration = registry.histogram(
+    "kicon_mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command", "outcome"))
+process_start_time = registry.gauge(
+    "kicon_process_start_time_seconds", "Start time of this worker process since the epoch", ("pid",))
+process_start_time.set(str(os.getpid()), value=time.time())
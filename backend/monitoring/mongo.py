@@ -0,0 +1,262 @@
+"""
+pymongo event listeners feeding the metrics registry.
+
+Motor runs pymongo operations on executor threads, so these listeners are
+called off the event loop. They take a short uncontended lock around each
+update instead of touching loop-owned state directly.
+
+The command listener records duration, command, collection, returned
+document count, a redacted filter shape and the route that issued the call.
+For sampled requests it also records one trace span per command.
+Commands slower than MONGO_SLOW_QUERY_MS are logged to the `slow_queries`
+logger and kept in a small ring buffer served at /api/metrics/slow-queries.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict
+
+from pymongo import monitoring
+
+from monitoring.context import current_request
+from monitoring.metrics import gauge_lines, mongo_command_duration, registry
+from monitoring.tracing import KIND_CLIENT, current_span, tracer
+
+slow_query_logger = logging.getLogger("slow_queries")
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('MONGO_SLOW_QUERY_MS', '100'))
+
+# Commands whose first value is not a collection name
+_NON_COLLECTION_COMMANDS = {"ping", "hello", "ismaster", "isMaster", "buildInfo", "endSessions",
+                            "saslStart", "saslContinue", "listCollections", "listDatabases"}
+
+mongo_route_commands = registry.counter(
+    "kicon_mongo_route_commands_total", "MongoDB commands issued per route template, collection and command",
+    ("route", "collection", "command"))
+mongo_route_seconds = registry.counter(
+    "kicon_mongo_route_command_seconds_total", "Time spent in MongoDB per route template, collection and command",
+    ("route", "collection", "command"))
+mongo_documents_returned = registry.counter(
+    "kicon_mongo_documents_returned_total", "Documents returned or affected per collection and command",
+    ("collection", "command"))
+mongo_slow_queries = registry.counter(
+    "kicon_mongo_slow_queries_total", "MongoDB commands slower than the slow-query threshold",
+    ("route", "collection", "command"))
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    if command_name == "getMore":
+        return str(command.get("collection", ""))
+    if command_name in _NON_COLLECTION_COMMANDS:
+        return ""
+    value = command.get(command_name)
+    return value if isinstance(value, str) else ""
+
+
+def redact_shape(value):
+    """Keep field names and operators, replace every literal with '?'"""
+    if isinstance(value, dict):
+        return {key: redact_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact_shape(value[0])] if value else []
+    return "?"
+
+
+def command_filter(command_name: str, command: dict):
+    """Extract the query filter a command runs with, if any"""
+    if command_name == "find":
+        return command.get("filter")
+    if command_name in ("count", "findAndModify"):
+        return command.get("query")
+    if command_name == "update":
+        updates = command.get("updates") or [{}]
+        return updates[0].get("q")
+    if command_name == "delete":
+        deletes = command.get("deletes") or [{}]
+        return deletes[0].get("q")
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        if pipeline and "$match" in pipeline[0]:
+            return pipeline[0]["$match"]
+    return None
+
+
+def reply_document_count(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Times every command and attributes it to collection, command and route"""
+
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS, keep_slow: int = 200):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.slow_queries = deque(maxlen=keep_slow)
+        self._lock = threading.Lock()
+        self._inflight: Dict[int, tuple] = {}
+
+    def started(self, event):
+        command_name = event.command_name
+        filter_doc = command_filter(command_name, event.command)
+        sort = event.command.get("sort") if command_name == "find" else None
+        request = current_request.get()
+        with self._lock:
+            self._inflight[event.request_id] = (
+                command_collection(command_name, event.command),
+                command_name,
+                redact_shape(filter_doc) if filter_doc is not None else None,
+                dict(sort) if sort else None,
+                request,
+                current_span.get(),
+            )
+
+    def _finish(self, event, outcome: str, documents: int):
+        seconds = event.duration_micros / 1e6
+        with self._lock:
+            collection, command, shape, sort, request, span = self._inflight.pop(
+                event.request_id, ("", event.command_name, None, None, None, None)
+            )
+            route = request.route if request is not None else "background"
+            mongo_command_duration.observe(collection, command, outcome, value=seconds)
+            mongo_route_commands.inc(route, collection, command)
+            mongo_route_seconds.inc(route, collection, command, amount=seconds)
+            mongo_documents_returned.inc(collection, command, amount=documents)
+            if request is not None:
+                request.db_time += seconds
+                request.db_calls += 1
+            if seconds >= self.slow_threshold:
+                mongo_slow_queries.inc(route, collection, command)
+                entry = {
+                    "time": datetime.utcnow().isoformat(),
+                    "route": route,
+                    "collection": collection,
+                    "command": command,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "documents": documents,
+                    "filter": shape,
+                    "sort": sort,
+                    "outcome": outcome,
+                }
+                self.slow_queries.append(entry)
+        if span is not None:
+            end_ns = time.time_ns()
+            tracer.record(
+                span, f"mongo.{command}", end_ns - event.duration_micros * 1000, end_ns, kind=KIND_CLIENT,
+                error=None if outcome == "ok" else outcome,
+                **{"db.system": "mongodb", "db.collection": collection, "db.operation": command,
+                   "db.statement": shape, "db.documents": documents}
+            )
+        if seconds >= self.slow_threshold:
+            slow_query_logger.warning(
+                f"Slow query {entry['duration_ms']}ms {collection}.{command} "
+                f"route={route} docs={documents} filter={shape} sort={sort}"
+            )
+
+    def succeeded(self, event):
+        self._finish(event, "ok", reply_document_count(event.command_name, event.reply))
+
+    def failed(self, event):
+        self._finish(event, "error", 0)
+
+    def recent_slow_queries(self) -> list:
+        with self._lock:
+            return list(self.slow_queries)
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections per server address"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = defaultdict(int)
+        self.checked_out = defaultdict(int)
+        self.checkout_failures = defaultdict(int)
+        self.waiting = defaultdict(int)
+        self.max_pool_size = 0
+        self.min_pool_size = 0
+
+    def _bump(self, counts, address, amount=1):
+        with self._lock:
+            counts[f"{address[0]}:{address[1]}"] += amount
+
+    def pool_created(self, event):
+        self.max_pool_size = event.options.get("maxPoolSize", self.max_pool_size)
+        self.min_pool_size = event.options.get("minPoolSize", self.min_pool_size)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump(self.open, event.address)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump(self.open, event.address, -1)
+
+    def connection_check_out_started(self, event):
+        self._bump(self.waiting, event.address)
+
+    def connection_check_out_failed(self, event):
+        self._bump(self.waiting, event.address, -1)
+        self._bump(self.checkout_failures, event.address)
+
+    def connection_checked_out(self, event):
+        self._bump(self.waiting, event.address, -1)
+        self._bump(self.checked_out, event.address)
+
+    def connection_checked_in(self, event):
+        self._bump(self.checked_out, event.address, -1)
+
+    def open_connections(self) -> int:
+        with self._lock:
+            return sum(self.open.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                address: {
+                    "open": self.open[address],
+                    "checked_out": self.checked_out[address],
+                    "waiting": self.waiting[address],
+                    "checkout_failures": self.checkout_failures[address],
+                    "max_pool_size": self.max_pool_size,
+                    "min_pool_size": self.min_pool_size,
+                }
+                for address in list(self.open)
+            }
+
+    def collect(self):
+        stats = self.stats()
+        for field, documentation in [
+            ("open", "Open MongoDB connections"),
+            ("checked_out", "MongoDB connections checked out by operations"),
+            ("waiting", "Operations waiting for a MongoDB connection"),
+            ("checkout_failures", "Failed MongoDB connection checkouts"),
+        ]:
+            yield from gauge_lines(
+                f"kicon_mongo_pool_{field}", documentation, ("address",),
+                [(address, values[field]) for address, values in stats.items()]
+            )
+        yield from gauge_lines("kicon_mongo_pool_max_size", "Configured maxPoolSize", (),
+                               [(self.max_pool_size,)])
+
+
+command_listener = CommandMonitor()
+pool_listener = PoolStatsListener()
+registry.add_collector(pool_listener.collect)
@@ -0,0 +1,128 @@
+"""
+Statistical CPU sampler for individual requests.
+
+A single daemon thread wakes every PROFILE_INTERVAL_MS while at least one
+request is being profiled, reads the event loop thread's current frame via
+sys._current_frames() and attributes the stack to whichever profiled task is
+running at that instant. Nothing is sampled when no request is profiled.
+Results are written as collapsed stacks (`root;child;leaf count`), ready for
+flamegraph.pl or speedscope.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', '/tmp/kicon-profiles'))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', '1')) / 1000
+MAX_STACK_DEPTH = 128
+
+# Maps each loop to the task currently stepping on it (CPython internal)
+running_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class RequestProfile:
+    def __init__(self, label: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.label = label
+        self.samples: Counter = Counter()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class Sampler:
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._active: Dict[int, RequestProfile] = {}
+        self._loop_threads: Dict[asyncio.AbstractEventLoop, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, label: str) -> RequestProfile:
+        """Start profiling the calling task (must run on the event loop thread)"""
+        task = asyncio.current_task()
+        profile = RequestProfile(label)
+        with self._lock:
+            self._active[id(task)] = profile
+            self._loop_threads[asyncio.get_running_loop()] = threading.get_ident()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+        return profile
+
+    def end(self, profile: RequestProfile):
+        task = asyncio.current_task()
+        with self._lock:
+            self._active.pop(id(task), None)
+        profile.duration = time.perf_counter() - profile.started
+
+    def _run(self):
+        while True:
+            # Clear before checking so a begin() racing with us is never missed
+            self._wake.clear()
+            with self._lock:
+                idle = not self._active
+            if idle:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for loop, thread_id in self._loop_threads.items():
+                    # Which task is executing right now on that loop (read-only peek)
+                    task = running_tasks.get(loop)
+                    profile = self._active.get(id(task)) if task is not None else None
+                    frame = frames.get(thread_id)
+                    if profile is not None and frame is not None:
+                        profile.samples[_collapse(frame)] += 1
+            time.sleep(self.interval)
+
+
+sampler = Sampler()
+
+
+def save_profile(profile: RequestProfile) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{profile.id}.collapsed"
+    path.write_text(profile.collapsed())
+    return path
+
+
+def list_profiles(limit: int = 50) -> list:
+    if not PROFILE_DIR.exists():
+        return []
+    files = sorted(PROFILE_DIR.glob("*.collapsed"), key=lambda item: item.stat().st_mtime, reverse=True)
+    return [
+        {"id": item.stem, "bytes": item.stat().st_size, "created": item.stat().st_mtime}
+        for item in files[:limit]
+    ]
+
+
+def load_profile(profile_id: str) -> Optional[str]:
+    # Profile ids are hex; anything else cannot name a file we wrote
+    if not profile_id.isalnum():
+        return None
+    path = PROFILE_DIR / f"{profile_id}.collapsed"
+    return path.read_text() if path.exists() else None
@@ -0,0 +1,153 @@
+"""
+Structured, asynchronous logging.
+
+Route code keeps calling `logger.info(...)` as before. The only handler on the
+root logger is a QueueHandler that stamps the record with the current request
+context (request id, route, trace id) and drops it on a bounded queue; a QueueListener
+thread does the JSON formatting and the stream writes. The request path never
+formats or writes a log line.
+
+Configuration:
+    LOG_LEVEL              root level (default INFO)
+    LOG_FORMAT             json (default) or text
+    LOG_INFO_SAMPLE_RATE   fraction of INFO/DEBUG records kept (default 1.0)
+    LOG_SAMPLE_RATES       per-logger overrides, e.g. "kicon.access=0.1,routes.contacts=0.5"
+    LOG_QUEUE_SIZE         queue capacity; records beyond it are dropped and counted
+"""
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from monitoring.context import current_request
+from monitoring.metrics import registry
+from monitoring.tracing import current_span
+
+# Extra attributes copied into the JSON document when present on a record
+CONTEXT_FIELDS = ("request_id", "trace_id", "route", "method", "path", "status", "latency_ms", "db_time_ms", "db_calls", "client")
+
+log_records_dropped = registry.counter(
+    "kicon_log_records_dropped_total", "Log records dropped because the log queue was full")
+log_records_sampled_out = registry.counter(
+    "kicon_log_records_sampled_out_total", "INFO/DEBUG log records skipped by sampling", ("logger",))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                document[field] = value
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every WARNING+ record; keep INFO/DEBUG records at a configurable rate"""
+
+    def __init__(self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    def _rate(self, name: str) -> float:
+        # Most specific configured logger prefix wins
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return self.default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        log_records_sampled_out.inc(record.name)
+        return False
+
+
+class ContextQueueHandler(QueueHandler):
+    """Attach request context on the calling thread, defer formatting to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        context = current_request.get()
+        if context is not None:
+            if getattr(record, "request_id", None) is None:
+                record.request_id = context.request_id
+            if getattr(record, "route", None) is None:
+                record.route = context.route
+        span = current_span.get()
+        if span is not None:
+            record.trace_id = span.trace_id
+        # Freeze %-style args now; the objects they reference may change later
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> QueueListener:
+    """Install the queue handler on the root logger and start the writer thread"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if os.environ.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=int(os.environ.get('LOG_QUEUE_SIZE', '10000')))
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(
+        default_rate=float(os.environ.get('LOG_INFO_SAMPLE_RATE', '1.0')),
+        rates=_parse_rates(os.environ.get('LOG_SAMPLE_RATES', ''))
+    ))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,289 @@
+"""
+Lightweight in-process request tracing.
+
+Spans are propagated through a ContextVar, so they follow a request across
+awaits and into Motor's executor threads without being passed around. A
+trace is started by TracingMiddleware for each HTTP request; `instrument_fastapi()`
+adds child spans for dependency/body validation, the endpoint itself and
+response serialization, and the MongoDB command listener adds one span per
+command.
+
+Sampling is decided once, at the head of the trace (TRACE_SAMPLE_RATE, or
+the sampled flag of an incoming W3C `traceparent`). Unsampled requests carry
+no span at all, so every instrumentation point is a single ContextVar read.
+
+Finished spans are queued and exported in batches by a background thread,
+either as OTLP/JSON span lines to TRACE_FILE or as OTLP/HTTP JSON posts to
+TRACE_OTLP_ENDPOINT (see tools/trace_collector.py for a local stand-in).
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from monitoring.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_EXPORTER = os.environ.get('TRACE_EXPORTER', 'file')
+TRACE_FILE = os.environ.get('TRACE_FILE', '/tmp/kicon-traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+TRACE_BATCH_SIZE = int(os.environ.get('TRACE_BATCH_SIZE', '256'))
+TRACE_EXPORT_INTERVAL = float(os.environ.get('TRACE_EXPORT_INTERVAL_MS', '2000')) / 1000
+TRACE_QUEUE_SIZE = int(os.environ.get('TRACE_QUEUE_SIZE', '4096'))
+SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'kicon-api')
+
+# OTLP span kinds
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+spans_exported = registry.counter("kicon_trace_spans_exported_total", "Trace spans exported", ("outcome",))
+spans_dropped = registry.counter("kicon_trace_spans_dropped_total", "Trace spans dropped because the export queue was full")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, kind: int = KIND_INTERNAL,
+                 start_ns: Optional[int] = None, attributes: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+                           if value is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class FileExporter:
+    """Append one OTLP/JSON span per line"""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps({"service": SERVICE_NAME, **span.to_otlp()}) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as trace_file:
+            trace_file.write(lines)
+
+
+class OTLPHttpExporter:
+    """POST batches to an OTLP/HTTP JSON endpoint (collector or tools/trace_collector.py)"""
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "kicon.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class BatchSpanProcessor:
+    """Queue finished spans and export them from a background thread"""
+
+    def __init__(self, exporter, batch_size: int = TRACE_BATCH_SIZE, interval: float = TRACE_EXPORT_INTERVAL,
+                 queue_size: int = TRACE_QUEUE_SIZE):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            spans_dropped.inc()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.interval
+        while True:
+            try:
+                span = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                span = False
+            if span:
+                batch.append(span)
+            if span is None or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.interval
+            if span is None:
+                return
+
+    def _export(self, batch: List[Span]):
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+            spans_exported.inc("ok", amount=len(batch))
+        except Exception as e:
+            spans_exported.inc("error", amount=len(batch))
+            logger.warning(f"Trace export of {len(batch)} spans failed: {str(e)}")
+
+
+class Tracer:
+    def __init__(self, processor: Optional[BatchSpanProcessor], sample_rate: float = TRACE_SAMPLE_RATE):
+        self.processor = processor
+        self.sample_rate = sample_rate if processor is not None else 0.0
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, attributes: Optional[dict] = None) -> Optional[Span]:
+        """Head sampling decision; returns None for requests that are not traced"""
+        if self.processor is None:
+            return None
+        match = _TRACEPARENT.match(traceparent) if traceparent else None
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            if not int(flags, 16) & 1:
+                return None
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trace_id, parent_id = os.urandom(16).hex(), None
+        else:
+            return None
+        return Span(name, trace_id, parent_id, kind=KIND_SERVER, attributes=attributes)
+
+    def finish(self, span: Span, end_ns: Optional[int] = None):
+        span.end_ns = end_ns or time.time_ns()
+        self.processor.submit(span)
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """Child span of the current span; a no-op when the request is not sampled"""
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(name, parent.trace_id, parent.span_id, kind=kind, attributes=attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            self.finish(span)
+
+    def record(self, parent: Optional[Span], name: str, start_ns: int, end_ns: int, kind: int = KIND_INTERNAL,
+               error: Optional[str] = None, **attributes):
+        """Record an already-timed child span (used by the pymongo listener)"""
+        if parent is None:
+            return
+        span = Span(name, parent.trace_id, parent.span_id, kind=kind, start_ns=start_ns, attributes=attributes)
+        span.error = error
+        self.finish(span, end_ns)
+
+    def start(self):
+        if self.processor is not None:
+            self.processor.start()
+
+    def stop(self):
+        if self.processor is not None:
+            self.processor.stop()
+
+
+def _build_tracer() -> Tracer:
+    if TRACE_EXPORTER == 'file':
+        return Tracer(BatchSpanProcessor(FileExporter()))
+    if TRACE_EXPORTER == 'otlp':
+        return Tracer(BatchSpanProcessor(OTLPHttpExporter()))
+    return Tracer(None)
+
+
+tracer = _build_tracer()
+
+
+_instrumented = False
+
+
+def instrument_fastapi():
+    """Wrap FastAPI's request pipeline steps in spans (validation, endpoint, serialization)"""
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+    import fastapi.routing as routing
+
+    def traced(original, name):
+        async def wrapper(**kwargs):
+            if current_span.get() is None:
+                return await original(**kwargs)
+            with tracer.span(name):
+                return await original(**kwargs)
+        wrapper.__wrapped__ = original
+        return wrapper
+
+    # get_request_handler looks these up as module globals on every request
+    routing.solve_dependencies = traced(routing.solve_dependencies, "validate")
+    routing.run_endpoint_function = traced(routing.run_endpoint_function, "handler")
+    routing.serialize_response = traced(routing.serialize_response, "serialize")
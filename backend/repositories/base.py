@@ -0,0 +1,151 @@
+"""
+Storage-agnostic repository interface used by the route handlers.
+
+A repository is one collection of flat documents (the `.dict()` of a model).
+Filters use the small MongoDB subset the routes need: equality, plus the
+operators in `match_filter` below. Updates are `$set` (and `$unset` in bulk
+updates), plus an atomic `$inc` for counters shared between workers. Both backends enforce the unique and
+TTL indexes declared in indexes.py and return documents without MongoDB's
+`_id`.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional, Tuple
+
+from indexes import INDEXES, PARTITIONED_INDEXES
+
+Sort = Tuple[str, int]  # (field, 1 ascending | -1 descending)
+
+
+@dataclass
+class UpdateOperation:
+    """One update of a bulk_update: `$set` fields and `$unset` fields of the first match"""
+    filter: dict
+    set: dict
+    unset: List[str] = field(default_factory=list)
+
+
+class DuplicateKeyError(Exception):
+    """A write would violate a unique index"""
+
+    def __init__(self, collection: str, fields: Tuple[str, ...]):
+        super().__init__(f"Duplicate key in {collection} on {', '.join(fields)}")
+        self.collection = collection
+        self.fields = fields
+
+
+def _index_models(collection: str) -> list:
+    if collection in INDEXES:
+        return INDEXES[collection]
+    # A partition such as audit_log_2025_10 has the indexes of its prefix
+    prefix = collection.rsplit("_", 2)[0]
+    return PARTITIONED_INDEXES.get(prefix, [])
+
+
+def unique_keys(collection: str) -> List[Tuple[str, ...]]:
+    """Field tuples of the unique indexes indexes.py declares for a collection"""
+    keys = []
+    for model in _index_models(collection):
+        if model.document.get("unique"):
+            keys.append(tuple(model.document["key"].keys()))
+    return keys
+
+
+def ttl_index(collection: str) -> Optional[Tuple[str, int]]:
+    """(field, expireAfterSeconds) of the TTL index indexes.py declares for a collection, if any"""
+    for model in _index_models(collection):
+        if "expireAfterSeconds" in model.document:
+            return next(iter(model.document["key"])), model.document["expireAfterSeconds"]
+    return None
+
+
+class Repository(ABC):
+    collection: str
+
+    @abstractmethod
+    async def insert(self, document: dict) -> None:
+        """Insert one document; raises DuplicateKeyError"""
+
+    @abstractmethod
+    async def insert_many(self, documents: List[dict]) -> int:
+        """Unordered bulk insert; returns the number inserted
+
+        Documents violating a unique index are skipped; any other failure raises,
+        even when part of the batch was written.
+        """
+
+    @abstractmethod
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def find(self, filter: dict, sort: Optional[Sort] = None, skip: int = 0, limit: int = 0,
+                   fields: Optional[List[str]] = None) -> List[dict]:
+        """Matching documents; `fields` limits each one to those keys"""
+
+    async def stream(self, filter: dict, sort: Optional[Sort] = None, limit: int = 0,
+                     fields: Optional[List[str]] = None, batch_size: int = 100) -> AsyncIterator[dict]:
+        """Matching documents one at a time, fetched `batch_size` at a time where the backend can"""
+        for document in await self.find(filter, sort=sort, limit=limit, fields=fields):
+            yield document
+
+    @abstractmethod
+    async def count(self, filter: dict) -> int:
+        ...
+
+    @abstractmethod
+    async def update_one(self, filter: dict, fields: dict) -> int:
+        """`$set` fields on the first match; returns the modified count (0 if nothing changed)"""
+
+    @abstractmethod
+    async def bulk_update(self, operations: List[UpdateOperation]) -> int:
+        """Unordered batch of single-document updates in one round trip; returns the modified count"""
+
+    @abstractmethod
+    async def increment(self, filter: dict, field: str, amount: int = 1) -> Optional[dict]:
+        """Atomically `$inc` a numeric field of the first match; returns the updated document, or None"""
+
+
+_MISSING = object()
+
+
+def _compare(stored, operator: str, expected) -> bool:
+    if operator == "$eq":
+        if isinstance(stored, list) and not isinstance(expected, list):
+            return expected in stored
+        return stored == expected
+    if operator == "$ne":
+        return not _compare(stored, "$eq", expected)
+    if operator == "$in":
+        return any(_compare(stored, "$eq", value) for value in expected)
+    if operator == "$nin":
+        return not _compare(stored, "$in", expected)
+    if stored is None:
+        return False
+    try:
+        if operator == "$gt":
+            return stored > expected
+        if operator == "$gte":
+            return stored >= expected
+        if operator == "$lt":
+            return stored < expected
+        if operator == "$lte":
+            return stored <= expected
+    except TypeError:
+        # MongoDB never matches range operators across types
+        return False
+    raise ValueError(f"Unsupported filter operator {operator}")
+
+
+def match_filter(document: dict, filter: dict) -> bool:
+    """Evaluate a MongoDB-style filter against a plain document"""
+    for key, condition in filter.items():
+        stored = document.get(key, _MISSING)
+        if stored is _MISSING:
+            stored = None
+        if isinstance(condition, dict) and condition and all(operator.startswith("$") for operator in condition):
+            if not all(_compare(stored, operator, value) for operator, value in condition.items()):
+                return False
+        elif not _compare(stored, "$eq", condition):
+            return False
+    return True
@@ -0,0 +1,182 @@
+"""
+In-memory repositories with the same semantics as the Motor ones.
+
+Meant for in-process test runs and for benchmarking handler CPU cost without
+a database. Every method completes without awaiting, so each call is atomic
+with respect to other requests on the event loop, just as a single MongoDB
+write is atomic per document. Unique indexes from indexes.py are enforced on
+insert and update, results are copies (mutating them never changes stored
+data), and point lookups on a unique field use a hash index instead of a scan.
+TTL indexes are honoured like MongoDB's TTL monitor does: expired documents
+are removed by a sweep at most once a minute (here, on insert).
+"""
+import heapq
+import time
+from datetime import datetime, timedelta
+from itertools import count as counter
+from typing import Dict, List, Optional, Tuple
+
+from repositories.base import (
+    DuplicateKeyError, Repository, Sort, UpdateOperation, match_filter, ttl_index, unique_keys
+)
+
+# mongod's TTL monitor runs every 60 seconds
+TTL_SWEEP_SECONDS = 60
+
+
+def _copy(document: dict) -> dict:
+    # Documents are flat apart from small lists/dicts (e.g. interests)
+    return {
+        key: list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+        for key, value in document.items()
+    }
+
+
+def _sort_key(field: str):
+    # MongoDB orders missing/null before any value
+    def key(document: dict):
+        value = document.get(field)
+        return (value is not None, value)
+    return key
+
+
+class MemoryRepository(Repository):
+    def __init__(self, collection: str):
+        self.collection = collection
+        self._documents: Dict[int, dict] = {}
+        self._sequence = counter()
+        self._unique: Dict[Tuple[str, ...], Dict[tuple, int]] = {fields: {} for fields in unique_keys(collection)}
+        self._ttl = ttl_index(collection)
+        self._next_sweep = 0.0
+
+    def _key(self, fields: Tuple[str, ...], document: dict) -> tuple:
+        return tuple(document.get(field) for field in fields)
+
+    def _check_unique(self, document: dict, ignore: Optional[int] = None):
+        for fields, index in self._unique.items():
+            owner = index.get(self._key(fields, document))
+            if owner is not None and owner != ignore:
+                raise DuplicateKeyError(self.collection, fields)
+
+    def _insert(self, document: dict):
+        self._check_unique(document)
+        position = next(self._sequence)
+        stored = _copy(document)
+        self._documents[position] = stored
+        for fields, index in self._unique.items():
+            index[self._key(fields, stored)] = position
+
+    def _expire(self):
+        if self._ttl is None or time.monotonic() < self._next_sweep:
+            return
+        self._next_sweep = time.monotonic() + TTL_SWEEP_SECONDS
+        field, seconds = self._ttl
+        cutoff = datetime.utcnow() - timedelta(seconds=seconds)
+        # Like MongoDB, only date values expire
+        expired = [position for position, document in self._documents.items()
+                   if isinstance(document.get(field), datetime) and document[field] < cutoff]
+        for position in expired:
+            document = self._documents.pop(position)
+            for fields, index in self._unique.items():
+                index.pop(self._key(fields, document), None)
+
+    def _positions(self, filter: dict):
+        # Point lookup on a single-field unique index
+        if len(filter) == 1:
+            field, value = next(iter(filter.items()))
+            index = self._unique.get((field,))
+            if index is not None and not isinstance(value, dict):
+                position = index.get((value,))
+                return [position] if position is not None else []
+        return (position for position, document in self._documents.items() if match_filter(document, filter))
+
+    async def insert(self, document: dict) -> None:
+        self._expire()
+        self._insert(document)
+
+    async def insert_many(self, documents: List[dict]) -> int:
+        self._expire()
+        inserted = 0
+        for document in documents:
+            try:
+                self._insert(document)
+                inserted += 1
+            except DuplicateKeyError:
+                # Unordered semantics: skip the duplicate, keep going
+                continue
+        return inserted
+
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        for position in self._positions(filter):
+            return _copy(self._documents[position])
+        return None
+
+    async def find(self, filter: dict, sort: Optional[Sort] = None, skip: int = 0, limit: int = 0,
+                   fields: Optional[List[str]] = None) -> List[dict]:
+        matches = (self._documents[position] for position in self._positions(filter))
+        if sort:
+            field, direction = sort
+            if limit:
+                select = heapq.nlargest if direction < 0 else heapq.nsmallest
+                matches = select(skip + limit, matches, key=_sort_key(field))
+            else:
+                matches = sorted(matches, key=_sort_key(field), reverse=direction < 0)
+        results = []
+        for index, document in enumerate(matches):
+            if index < skip:
+                continue
+            if limit and len(results) >= limit:
+                break
+            if fields:
+                document = {field: document[field] for field in fields if field in document}
+            results.append(_copy(document))
+        return results
+
+    async def count(self, filter: dict) -> int:
+        if not filter:
+            return len(self._documents)
+        return sum(1 for _ in self._positions(filter))
+
+    def _update(self, filter: dict, fields: dict, unset: List[str] = ()) -> int:
+        for position in self._positions(filter):
+            stored = self._documents[position]
+            if (all(stored.get(field, object()) == value for field, value in fields.items())
+                    and not any(field in stored for field in unset)):
+                return 0
+            updated = {**stored, **_copy(fields)}
+            for field in unset:
+                updated.pop(field, None)
+            self._check_unique(updated, ignore=position)
+            for unique_fields, index in self._unique.items():
+                old_key, new_key = self._key(unique_fields, stored), self._key(unique_fields, updated)
+                if old_key != new_key:
+                    del index[old_key]
+                    index[new_key] = position
+            self._documents[position] = updated
+            return 1
+        return 0
+
+    async def update_one(self, filter: dict, fields: dict) -> int:
+        return self._update(filter, fields)
+
+    async def bulk_update(self, operations: List[UpdateOperation]) -> int:
+        # Unordered semantics: a failing update (duplicate key) does not stop the others
+        modified = 0
+        for operation in operations:
+            try:
+                modified += self._update(operation.filter, operation.set, operation.unset)
+            except DuplicateKeyError:
+                continue
+        return modified
+
+    async def increment(self, filter: dict, field: str, amount: int = 1) -> Optional[dict]:
+        for position in self._positions(filter):
+            stored = self._documents[position]
+            stored[field] = stored.get(field, 0) + amount
+            return _copy(stored)
+        return None
+
+    def clear(self):
+        self._documents.clear()
+        for index in self._unique.values():
+            index.clear()
@@ -0,0 +1,108 @@
+"""
+Motor-backed repositories (the production storage).
+"""
+from typing import AsyncIterator, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.errors import DuplicateKeyError as MongoDuplicateKeyError
+
+from repositories.base import DuplicateKeyError, Repository, Sort, UpdateOperation, unique_keys
+
+# Never hand MongoDB's ObjectId to the models
+NO_ID = {"_id": 0}
+
+
+class MongoRepository(Repository):
+    def __init__(self, database, collection: str):
+        self.database = database
+        self.collection = collection
+        self.motor = database[collection]
+
+    def _duplicate(self, error) -> DuplicateKeyError:
+        key_pattern = (getattr(error, "details", None) or {}).get("keyPattern") or {}
+        fields = tuple(key_pattern) or (unique_keys(self.collection) or [("?",)])[0]
+        return DuplicateKeyError(self.collection, fields)
+
+    async def insert(self, document: dict) -> None:
+        try:
+            # insert_one adds _id to the dict it is given
+            await self.motor.insert_one(dict(document))
+        except MongoDuplicateKeyError as e:
+            raise self._duplicate(e)
+
+    async def insert_many(self, documents: List[dict]) -> int:
+        if not documents:
+            return 0
+        try:
+            result = await self.motor.insert_many([dict(document) for document in documents], ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Unordered semantics: skip duplicates like the memory backend, but surface any other failure
+            details = e.details or {}
+            if details.get("writeConcernErrors") or any(
+                error.get("code") != 11000 for error in details.get("writeErrors", [])
+            ):
+                raise
+            return details.get("nInserted", 0)
+
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        return await self.motor.find_one(filter, NO_ID)
+
+    def _cursor(self, filter: dict, sort: Optional[Sort], skip: int, limit: int, fields: Optional[List[str]]):
+        projection = {**NO_ID, **{field: 1 for field in fields}} if fields else NO_ID
+        cursor = self.motor.find(filter, projection)
+        if sort:
+            cursor = cursor.sort(*sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    async def find(self, filter: dict, sort: Optional[Sort] = None, skip: int = 0, limit: int = 0,
+                   fields: Optional[List[str]] = None) -> List[dict]:
+        return await self._cursor(filter, sort, skip, limit, fields).to_list(length=limit or None)
+
+    async def stream(self, filter: dict, sort: Optional[Sort] = None, limit: int = 0,
+                     fields: Optional[List[str]] = None, batch_size: int = 100) -> AsyncIterator[dict]:
+        cursor = self._cursor(filter, sort, 0, limit, fields).batch_size(batch_size)
+        try:
+            async for document in cursor:
+                yield document
+        finally:
+            # The consumer may stop early (client gone); kill the server-side cursor
+            await cursor.close()
+
+    async def count(self, filter: dict) -> int:
+        return await self.motor.count_documents(filter)
+
+    async def update_one(self, filter: dict, fields: dict) -> int:
+        try:
+            result = await self.motor.update_one(filter, {"$set": fields})
+        except MongoDuplicateKeyError as e:
+            raise self._duplicate(e)
+        return result.modified_count
+
+    async def bulk_update(self, operations: List[UpdateOperation]) -> int:
+        requests = []
+        for operation in operations:
+            update = {}
+            if operation.set:
+                update["$set"] = operation.set
+            if operation.unset:
+                update["$unset"] = dict.fromkeys(operation.unset, "")
+            if update:
+                requests.append(UpdateOne(operation.filter, update))
+        if not requests:
+            return 0
+        try:
+            result = await self.motor.bulk_write(requests, ordered=False)
+            return result.modified_count
+        except BulkWriteError as e:
+            return e.details.get("nModified", 0)
+
+    async def increment(self, filter: dict, field: str, amount: int = 1) -> Optional[dict]:
+        return await self.motor.find_one_and_update(
+            filter, {"$inc": {field: amount}}, projection=NO_ID, return_document=ReturnDocument.AFTER
+        )
@@ -0,0 +1,98 @@
+"""
+Repository wrapper that upgrades documents to the current schema version on read.
+
+Wraps the backend repository of every collection with migrations (see
+migrations.py). Documents returned by find_one/find/stream are upgraded in
+memory when they are older than the current version, and the change is
+handed to `on_upgrade` as a (repository, UpdateOperation) pair to be written
+back in the background (services/batch_writer.py, schema_upgrade_writer).
+Inserted documents are stamped with the current version.
+
+Projected reads also fetch the fields the migrations touching the requested
+ones need, upgrade what they got and return only the requested fields; they
+are not written back, as the upgrade only saw part of the document.
+"""
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from migrations import SCHEMA_VERSION_FIELD, current_version, migration_fields, upgrade, write_back
+from repositories.base import Repository, Sort, UpdateOperation
+
+# A document read again within this long is not queued for write-back again
+RECENT_UPGRADE_SECONDS = 30
+RECENT_UPGRADE_LIMIT = 10000
+
+
+class VersionedRepository(Repository):
+    def __init__(self, inner: Repository, on_upgrade: Optional[Callable[[tuple], bool]] = None):
+        self.inner = inner
+        self.collection = inner.collection
+        self.version = current_version(inner.collection)
+        self._on_upgrade = on_upgrade
+        self._recent: Dict[str, float] = {}
+
+    def _stamp(self, document: dict) -> dict:
+        return {**document, SCHEMA_VERSION_FIELD: self.version}
+
+    def _queue_write_back(self, document: dict, upgraded: dict):
+        if self._on_upgrade is None:
+            return
+        now = time.monotonic()
+        queued = self._recent.get(document.get("id"))
+        if queued is not None and now - queued < RECENT_UPGRADE_SECONDS:
+            return
+        operation = write_back(document, upgraded)
+        if operation is None:
+            return
+        if len(self._recent) >= RECENT_UPGRADE_LIMIT:
+            self._recent.clear()
+        self._recent[document["id"]] = now
+        self._on_upgrade((self.inner, operation))
+
+    def _upgrade(self, document: dict, fields: Optional[List[str]] = None) -> dict:
+        upgraded = upgrade(self.collection, document)
+        if fields:
+            source = upgraded if upgraded is not None else document
+            return {field: source[field] for field in fields if field in source}
+        if upgraded is None:
+            return document
+        self._queue_write_back(document, upgraded)
+        return upgraded
+
+    def _projection(self, fields: Optional[List[str]]) -> Optional[List[str]]:
+        if not fields:
+            return fields
+        return list(fields) + sorted(migration_fields(self.collection, fields).difference(fields))
+
+    async def insert(self, document: dict) -> None:
+        await self.inner.insert(self._stamp(document))
+
+    async def insert_many(self, documents: List[dict]) -> int:
+        return await self.inner.insert_many([self._stamp(document) for document in documents])
+
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        document = await self.inner.find_one(filter)
+        return self._upgrade(document) if document is not None else None
+
+    async def find(self, filter: dict, sort: Optional[Sort] = None, skip: int = 0, limit: int = 0,
+                   fields: Optional[List[str]] = None) -> List[dict]:
+        documents = await self.inner.find(filter, sort=sort, skip=skip, limit=limit, fields=self._projection(fields))
+        return [self._upgrade(document, fields) for document in documents]
+
+    async def stream(self, filter: dict, sort: Optional[Sort] = None, limit: int = 0,
+                     fields: Optional[List[str]] = None, batch_size: int = 100) -> AsyncIterator[dict]:
+        async for document in self.inner.stream(filter, sort=sort, limit=limit, fields=self._projection(fields),
+                                                batch_size=batch_size):
+            yield self._upgrade(document, fields)
+
+    async def count(self, filter: dict) -> int:
+        return await self.inner.count(filter)
+
+    async def update_one(self, filter: dict, fields: dict) -> int:
+        return await self.inner.update_one(filter, fields)
+
+    async def bulk_update(self, operations: List[UpdateOperation]) -> int:
+        return await self.inner.bulk_update(operations)
+
+    async def increment(self, filter: dict, field: str, amount: int = 1) -> Optional[dict]:
+        return await self.inner.increment(filter, field, amount)
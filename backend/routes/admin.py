@@ -0,0 +1,113 @@
+from fastapi import APIRouter, Depends, WebSocket
+import asyncio
+import json
+import os
+from datetime import datetime
+import logging
+
+from models.Contact import Contact
+from models.Payment import Payment
+from models.Registration import Registration
+
+from routes.contacts import load_contact_stats
+from routes.payments import load_payment_stats
+from routes.registrations import REGISTRATION_DEADLINE, load_registration_stats
+from security import ADMIN_HEADER, is_admin_key, require_admin
+from services.caches import Snapshot
+from services.live_feed import CLOSE_TOO_SLOW, LiveConnection, live_feed
+from storage import Storage
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+logger = logging.getLogger(__name__)
+
+# Constants
+DASHBOARD_REFRESH_SECONDS = float(os.environ.get('DASHBOARD_REFRESH_SECONDS', '5'))
+DASHBOARD_MIN_REFRESH_SECONDS = float(os.environ.get('DASHBOARD_MIN_REFRESH_SECONDS', '1'))
+DASHBOARD_MAX_AGE_SECONDS = float(os.environ.get('DASHBOARD_MAX_AGE_SECONDS', '15'))
+# Same page sizes as the list endpoints' defaults
+DASHBOARD_RECENT_REGISTRATIONS = 100
+DASHBOARD_RECENT_ITEMS = 50
+
+# Everything the admin dashboard shows, rebuilt in the background (refreshes are triggered by writes through
+# this worker via services/events.py; writes through other workers show up at the next timed refresh)
+dashboard = Snapshot(
+    "dashboard",
+    refresh_interval=DASHBOARD_REFRESH_SECONDS,
+    min_interval=DASHBOARD_MIN_REFRESH_SECONDS,
+    max_age=DASHBOARD_MAX_AGE_SECONDS
+)
+
+async def build_dashboard(storage: Storage) -> dict:
+    """Stats of the three summary endpoints plus the newest registrations, payments and inquiries"""
+    (registration_stats, payment_stats, contact_stats,
+     recent_registrations, recent_payments, recent_contacts) = await asyncio.gather(
+        load_registration_stats(storage.registrations),
+        load_payment_stats(storage.payments),
+        load_contact_stats(storage.contacts),
+        storage.registrations.find({}, sort=("registrationDate", -1), limit=DASHBOARD_RECENT_REGISTRATIONS),
+        storage.payments.find({}, sort=("created_date", -1), limit=DASHBOARD_RECENT_ITEMS),
+        storage.contacts.find({}, sort=("createdDate", -1), limit=DASHBOARD_RECENT_ITEMS)
+    )
+    return {
+        "registrations": {
+            **registration_stats,
+            "deadline_passed": datetime.utcnow() > REGISTRATION_DEADLINE
+        },
+        "payments": payment_stats,
+        "contacts": contact_stats,
+        "recent_registrations": [Registration(**registration) for registration in recent_registrations],
+        "recent_payments": [Payment(**payment) for payment in recent_payments],
+        "recent_contacts": [Contact(**contact) for contact in recent_contacts],
+        "refresh_interval_seconds": DASHBOARD_REFRESH_SECONDS
+    }
+
+@router.get("/dashboard", dependencies=[Depends(require_admin)])
+async def get_dashboard():
+    """Precomputed admin dashboard (served from memory; see the Age and X-Snapshot-* headers for staleness)"""
+    return dashboard.response()
+
+async def _send_deltas(websocket: WebSocket, connection: LiveConnection):
+    while True:
+        await websocket.send_text(await connection.queue.get())
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    # Nothing is expected from the client; reading is how a closed socket is noticed
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.websocket("/live")
+async def admin_live(websocket: WebSocket):
+    """Deltas of registration, payment and inquiry changes as they happen (see services/live_feed.py)
+
+    Browsers cannot set headers on a WebSocket, so the admin key may also be passed as ?key=.
+    """
+    if not is_admin_key(websocket.headers.get(ADMIN_HEADER) or websocket.query_params.get("key")):
+        await websocket.close(code=1008)
+        return
+    connection = live_feed.connect()
+    if connection is None:
+        await websocket.close(code=CLOSE_TOO_SLOW)
+        return
+
+    try:
+        await websocket.accept()
+        await websocket.send_text(json.dumps({"type": "hello", "seq": live_feed.seq, "source": live_feed.source}))
+        tasks = [
+            asyncio.create_task(_send_deltas(websocket, connection)),
+            asyncio.create_task(_wait_for_disconnect(websocket)),
+            asyncio.create_task(connection.closed.wait())
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        # Also collects a send that failed because the client went away
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks[2] in done:
+            # Fell behind, or the server is shutting down
+            reason = "Too slow" if connection.close_code == CLOSE_TOO_SLOW else "Server shutting down"
+            await websocket.close(code=connection.close_code, reason=reason)
+
+    except Exception as e:
+        logger.error(f"Error in admin live feed connection: {str(e)}")
+    finally:
+        live_feed.disconnect(connection)
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal, Optional
+import logging
+from datetime import datetime, timezone
+
+from security import require_admin
+from services.audit import audit_log
+
+# Entries carry client addresses and personal data, so the history is behind the admin key like diagnostics
+router = APIRouter(prefix="/audit", tags=["audit"], dependencies=[Depends(require_admin)])
+logger = logging.getLogger(__name__)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored timestamps are naive UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@router.get("/{entity_type}/{entity_id}")
+async def get_audit_history(
+    entity_type: Literal["registration", "payment", "contact"],
+    entity_id: str,
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Change history of one registration, payment or contact inquiry, newest first (admin endpoint)
+
+    Entries are written asynchronously, so a change shows up here about a second after it was made.
+    """
+
+    try:
+        entries = await audit_log.history(
+            entity_type, entity_id, since=_naive_utc(since), until=_naive_utc(until), limit=limit
+        )
+        return {
+            "success": True,
+            "data": entries,
+            "message": f"Retrieved {len(entries)} audit entries"
+        }
+
+    except Exception as e:
+        logger.error(f"Error fetching audit history for {entity_type} {entity_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch audit history")
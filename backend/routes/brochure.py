@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse, HTMLResponse
+import asyncio
 import logging
 import os
 from pathlib import Path
@@ -41,9 +42,8 @@ async def view_brochure():
         if not brochure_path.exists():
             raise HTTPException(status_code=404, detail="Brochure file not found")
         
-        # Read the HTML content
-        with open(brochure_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
+        # Read the HTML content off the event loop
+        html_content = await asyncio.to_thread(brochure_path.read_text, encoding='utf-8')
         
         return HTMLResponse(content=html_content)
         
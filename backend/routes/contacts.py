@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from models.Contact import (
     Contact,
@@ -11,32 +12,43 @@ from models.Contact import (
     ContactListResponse
 )
 
-# Get database connection
-from database import db
+# Storage access
+from repositories.base import Repository
+from storage import get_contacts
+from services.audit import audit_log
+from services.caches import CachedValue
+from services.events import Event, events
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 logger = logging.getLogger(__name__)
 
+# Counts behind /stats/summary, reloaded after STATS_CACHE_TTL or a write through this worker
+contact_stats = CachedValue()
+
+async def warm_caches(contacts: Repository):
+    """Fill the stats cache before the worker reports ready"""
+    await contact_stats.get(lambda: load_contact_stats(contacts))
+
 @router.post("", response_model=ContactResponse)
-async def create_contact_inquiry(contact_data: ContactCreate):
+async def create_contact_inquiry(contact_data: ContactCreate, contacts: Repository = Depends(get_contacts)):
     """Submit a contact form inquiry"""
     
     try:
         # Create contact object
         contact = Contact(**contact_data.dict())
+        document = contact.dict()
         
         # Insert into database
-        result = await db.contacts.insert_one(contact.dict())
+        await contacts.insert(document)
+        contact_stats.invalidate()
+        events.publish(Event("contact", "created", contact.id, document))
         
-        if result.inserted_id:
-            logger.info(f"New contact inquiry created: {contact.email}")
-            return ContactResponse(
-                success=True,
-                data=contact,
-                message="Your inquiry has been submitted successfully! We will get back to you soon."
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to submit inquiry")
+        logger.info(f"New contact inquiry created: {contact.email}")
+        return ContactResponse(
+            success=True,
+            data=contact,
+            message="Your inquiry has been submitted successfully! We will get back to you soon."
+        )
             
     except HTTPException:
         raise
@@ -49,7 +61,8 @@ async def get_all_contacts(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = Query(None),
-    inquiry_type: Optional[str] = Query(None)
+    inquiry_type: Optional[str] = Query(None),
+    contacts: Repository = Depends(get_contacts)
 ):
     """Get all contact inquiries (admin endpoint)"""
     
@@ -62,20 +75,19 @@ async def get_all_contacts(
             query["inquiryType"] = inquiry_type
         
         # Get total count
-        total = await db.contacts.count_documents(query)
+        total = await contacts.count(query)
         
         # Get contacts with pagination
-        cursor = db.contacts.find(query).skip(skip).limit(limit).sort("createdDate", -1)
-        contacts_data = await cursor.to_list(length=limit)
+        contacts_data = await contacts.find(query, sort=("createdDate", -1), skip=skip, limit=limit)
         
         # Convert to Contact objects
-        contacts = [Contact(**contact) for contact in contacts_data]
+        contact_list = [Contact(**contact) for contact in contacts_data]
         
         return ContactListResponse(
             success=True,
-            data=contacts,
+            data=contact_list,
             total=total,
-            message=f"Retrieved {len(contacts)} contact inquiries"
+            message=f"Retrieved {len(contact_list)} contact inquiries"
         )
         
     except Exception as e:
@@ -83,11 +95,11 @@ async def get_all_contacts(
         raise HTTPException(status_code=500, detail="Failed to fetch contact inquiries")
 
 @router.get("/{contact_id}", response_model=ContactResponse)
-async def get_contact(contact_id: str):
+async def get_contact(contact_id: str, contacts: Repository = Depends(get_contacts)):
     """Get a specific contact inquiry by ID"""
     
     try:
-        contact_data = await db.contacts.find_one({"id": contact_id})
+        contact_data = await contacts.find_one({"id": contact_id})
         
         if not contact_data:
             raise HTTPException(status_code=404, detail="Contact inquiry not found")
@@ -107,12 +119,16 @@ async def get_contact(contact_id: str):
         raise HTTPException(status_code=500, detail="Failed to fetch contact inquiry")
 
 @router.put("/{contact_id}", response_model=ContactResponse)
-async def update_contact_status(contact_id: str, update_data: ContactUpdate):
+async def update_contact_status(
+    contact_id: str,
+    update_data: ContactUpdate,
+    contacts: Repository = Depends(get_contacts)
+):
     """Update contact inquiry status (admin endpoint)"""
     
     try:
         # Check if contact exists
-        existing = await db.contacts.find_one({"id": contact_id})
+        existing = await contacts.find_one({"id": contact_id})
         if not existing:
             raise HTTPException(status_code=404, detail="Contact inquiry not found")
         
@@ -123,15 +139,15 @@ async def update_contact_status(contact_id: str, update_data: ContactUpdate):
             update_dict["lastUpdated"] = datetime.utcnow()
             
             # Update in database
-            result = await db.contacts.update_one(
-                {"id": contact_id},
-                {"$set": update_dict}
-            )
+            modified_count = await contacts.update_one({"id": contact_id}, update_dict)
             
-            if result.modified_count > 0:
+            if modified_count > 0:
+                contact_stats.invalidate()
+                audit_log.record("contact", contact_id, existing, update_dict)
                 # Fetch updated contact
-                updated_data = await db.contacts.find_one({"id": contact_id})
+                updated_data = await contacts.find_one({"id": contact_id})
                 updated_contact = Contact(**updated_data)
+                events.publish(Event("contact", "updated", contact_id, updated_data, before=existing))
                 
                 logger.info(f"Contact inquiry updated: {contact_id}")
                 
@@ -159,54 +175,52 @@ async def update_contact_status(contact_id: str, update_data: ContactUpdate):
         logger.error(f"Error updating contact {contact_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update contact inquiry")
 
+async def load_contact_stats(contacts: Repository) -> dict:
+    # Recent inquiries (last 7 days)
+    seven_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
+    
+    # Independent counts, issued concurrently
+    total, open_inquiries, responded, closed, general, registration, accommodation, technical, recent = await asyncio.gather(
+        contacts.count({}),
+        # By status
+        contacts.count({"status": "open"}),
+        contacts.count({"status": "responded"}),
+        contacts.count({"status": "closed"}),
+        # By type
+        contacts.count({"inquiryType": "general"}),
+        contacts.count({"inquiryType": "registration"}),
+        contacts.count({"inquiryType": "accommodation"}),
+        contacts.count({"inquiryType": "technical"}),
+        contacts.count({"createdDate": {"$gte": seven_days_ago}})
+    )
+    
+    return {
+        "total_inquiries": total,
+        "recent_inquiries": recent,
+        "by_status": {
+            "open": open_inquiries,
+            "responded": responded,
+            "closed": closed
+        },
+        "by_type": {
+            "general": general,
+            "registration": registration,
+            "accommodation": accommodation,
+            "technical": technical
+        }
+    }
+
 @router.get("/stats/summary")
-async def get_contact_stats():
+async def get_contact_stats(contacts: Repository = Depends(get_contacts)):
     """Get contact inquiry statistics"""
     
     try:
-        # Total inquiries
-        total = await db.contacts.count_documents({})
-        
-        # By status
-        open_inquiries = await db.contacts.count_documents({"status": "open"})
-        responded = await db.contacts.count_documents({"status": "responded"})
-        closed = await db.contacts.count_documents({"status": "closed"})
-        
-        # By type
-        general = await db.contacts.count_documents({"inquiryType": "general"})
-        registration = await db.contacts.count_documents({"inquiryType": "registration"})
-        accommodation = await db.contacts.count_documents({"inquiryType": "accommodation"})
-        technical = await db.contacts.count_documents({"inquiryType": "technical"})
-        
-        # Recent inquiries (last 7 days)
-        seven_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        from datetime import timedelta
-        seven_days_ago = seven_days_ago - timedelta(days=7)
-        
-        recent = await db.contacts.count_documents({
-            "createdDate": {"$gte": seven_days_ago}
-        })
-        
         return {
             "success": True,
-            "data": {
-                "total_inquiries": total,
-                "recent_inquiries": recent,
-                "by_status": {
-                    "open": open_inquiries,
-                    "responded": responded,
-                    "closed": closed
-                },
-                "by_type": {
-                    "general": general,
-                    "registration": registration,
-                    "accommodation": accommodation,
-                    "technical": technical
-                }
-            },
+            "data": await contact_stats.get(lambda: load_contact_stats(contacts)),
             "message": "Contact statistics retrieved successfully"
         }
         
     except Exception as e:
         logger.error(f"Error getting contact stats: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to get contact statistics")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to get contact statistics")
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from models.Contact import Contact
+from models.Payment import Payment
+from models.Registration import Registration
+from monitoring import memory
+from monitoring.loop_monitor import loop_monitor
+from monitoring.profiler import list_profiles, load_profile
+from security import require_admin
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"], dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+async def get_profiles(limit: int = 50):
+    """List stored request profiles, newest first"""
+    profiles = list_profiles(limit)
+    return {
+        "success": True,
+        "data": profiles,
+        "message": f"Retrieved {len(profiles)} profiles"
+    }
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """Collapsed-stack profile, ready for flamegraph.pl or speedscope"""
+    collapsed = load_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed)
+
+@router.get("/memory")
+async def get_memory_status():
+    """tracemalloc state and stored snapshots"""
+    return {"success": True, "data": memory.tracing_status(), "message": "Memory tracing status"}
+
+@router.post("/memory/tracemalloc/start")
+async def start_memory_tracing(frames: int = Query(1, ge=1, le=50)):
+    """Start tracemalloc, keeping `frames` frames per allocation"""
+    return {"success": True, "data": memory.start_tracing(frames), "message": "tracemalloc started"}
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_memory_tracing():
+    """Stop tracemalloc; stored snapshots remain available"""
+    return {"success": True, "data": memory.stop_tracing(), "message": "tracemalloc stopped"}
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot(name: Optional[str] = Query(None, max_length=40)):
+    """Take a tracemalloc snapshot (runs off the event loop)"""
+    try:
+        snapshot = await asyncio.to_thread(memory.take_snapshot, name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "data": snapshot, "message": "Snapshot taken"}
+
+@router.get("/memory/snapshots")
+async def get_memory_snapshots():
+    """List stored snapshots"""
+    snapshots = memory.list_snapshots()
+    return {"success": True, "data": snapshots, "message": f"Retrieved {len(snapshots)} snapshots"}
+
+@router.get("/memory/snapshots/diff")
+async def diff_memory_snapshots(
+    base: str,
+    target: str,
+    group_by: str = Query("lineno", pattern="^(lineno|filename)$"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Allocation growth between two snapshots, grouped by module or module and line"""
+    try:
+        diff = await asyncio.to_thread(memory.diff_snapshots, base, target, group_by, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot not found: {e.args[0]}")
+    return {"success": True, "data": diff, "message": f"Top {len(diff)} allocation changes"}
+
+@router.get("/memory/snapshots/{snapshot_id}")
+async def get_memory_snapshot_top(
+    snapshot_id: str,
+    group_by: str = Query("lineno", pattern="^(lineno|filename)$"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Top allocation sites in a snapshot"""
+    try:
+        top = await asyncio.to_thread(memory.top_allocations, snapshot_id, group_by, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"success": True, "data": top, "message": f"Top {len(top)} allocation sites"}
+
+@router.delete("/memory/snapshots/{snapshot_id}")
+async def delete_memory_snapshot(snapshot_id: str):
+    """Drop a stored snapshot"""
+    if not memory.delete_snapshot(snapshot_id):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"success": True, "message": "Snapshot deleted"}
+
+@router.get("/memory/gc")
+async def get_gc_report():
+    """GC generation counts and live Registration/Payment/Contact instances"""
+    report = await asyncio.to_thread(memory.gc_report, (Registration, Payment, Contact))
+    return {"success": True, "data": report, "message": "GC statistics retrieved"}
+
+@router.get("/loop")
+async def get_loop_health():
+    """Event loop lag percentiles and the stacks captured during recent stalls"""
+    return {"success": True, "data": loop_monitor.report(), "message": "Event loop health retrieved"}
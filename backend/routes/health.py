@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+import logging
+
+import database
+from monitoring.mongo import pool_listener
+from routes.admin import dashboard
+from routes.contacts import contact_stats
+from routes.payments import payment_stats
+from routes.registrations import registration_stats
+from services.availability import availability
+from services.caches import email_index, static_content
+from services.live_feed import live_feed
+from storage import current_storage
+
+router = APIRouter(prefix="/health", tags=["health"])
+logger = logging.getLogger(__name__)
+
+def _pool_utilization() -> dict:
+    """Connections per server from the pool listener, with the share of maxPoolSize in use"""
+    servers = pool_listener.stats()
+    max_pool_size = pool_listener.max_pool_size
+    checked_out = sum(server["checked_out"] for server in servers.values())
+    return {
+        "min_pool_size": pool_listener.min_pool_size,
+        "max_pool_size": max_pool_size,
+        "open": sum(server["open"] for server in servers.values()),
+        "checked_out": checked_out,
+        "waiting": sum(server["waiting"] for server in servers.values()),
+        # Of the busiest server's pool, which is the one that runs out first
+        "utilization": round(max((server["checked_out"] for server in servers.values()), default=0) / max_pool_size, 3)
+        if max_pool_size else None,
+        "servers": servers
+    }
+
+@router.get("/live")
+async def liveness():
+    """The process is up and its event loop is serving requests"""
+    return {"success": True, "status": "alive"}
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """Whether this worker should receive traffic: startup finished and the database answers"""
+    app = request.app
+    settings = app.state.settings
+    ready = getattr(app.state, "ready", False)
+    storage = current_storage()
+    data = {
+        "ready": ready,
+        "storage_backend": storage.backend,
+        "startup": getattr(app.state, "startup", None),
+        "caches": {
+            "static_content": static_content.stats(),
+            "email_index": email_index.stats(),
+            "dashboard": dashboard.stats(),
+            "availability": availability.stats(),
+            "stats": {
+                "registrations": registration_stats.loaded,
+                "payments": payment_stats.loaded,
+                "contacts": contact_stats.loaded
+            }
+        },
+        "admin_live": live_feed.stats()
+    }
+    if storage.backend == "mongo":
+        try:
+            data["database"] = {"ping_ms": round(await database.ping(settings.health_ping_timeout_ms / 1000), 2)}
+        except Exception as e:
+            logger.warning(f"Readiness ping failed: {type(e).__name__}: {str(e)}")
+            data["database"] = {"error": type(e).__name__}
+            ready = False
+        data["pool"] = _pool_utilization()
+
+    if not ready:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "data": data, "message": "Not ready"}
+        )
+    return {"success": True, "data": data, "message": "Ready"}
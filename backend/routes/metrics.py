@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from monitoring.metrics import registry
+from monitoring.mongo import command_listener, SLOW_QUERY_THRESHOLD_MS
+
+router = APIRouter(prefix="/metrics", tags=["monitoring"])
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/slow-queries")
+async def get_slow_queries():
+    """Most recent MongoDB commands above the slow-query threshold"""
+    slow_queries = command_listener.recent_slow_queries()
+    return {
+        "success": True,
+        "data": {
+            "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+            "queries": list(reversed(slow_queries))
+        },
+        "message": f"Retrieved {len(slow_queries)} slow queries"
+    }
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
+import asyncio
 import logging
 from datetime import datetime
 
@@ -14,13 +15,26 @@ from models.Payment import (
     BankDetails
 )
 
-# Get database connection
-from database import db
+# Storage access
+from repositories.base import DuplicateKeyError, Repository
+from storage import get_payments, get_registrations
+from services.audit import audit_log
+from services.caches import CachedValue, static_content
+from services.events import Event, events
+from services.mailer import mail_engine
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 logger = logging.getLogger(__name__)
 
+# Counts and totals behind /stats/summary, reloaded after STATS_CACHE_TTL or a write through this worker
+payment_stats = CachedValue()
+
+async def warm_caches(payments: Repository):
+    """Fill the stats cache before the worker reports ready"""
+    await payment_stats.get(lambda: load_payment_stats(payments))
+
 @router.get("/bank-details")
+@static_content.cached
 async def get_bank_details():
     """Get bank account details for payment"""
     
@@ -55,23 +69,55 @@ After Payment:
         logger.error(f"Error fetching bank details: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch bank details")
 
+async def _set_registration_payment_status(registrations: Repository, registration_id: str,
+                                          payment_status: str) -> Optional[dict]:
+    """Mirror a payment's state on its registration, auditing and publishing the transition"""
+    existing = await registrations.find_one({"id": registration_id})
+    if existing is None:
+        return None
+    fields = {"paymentStatus": payment_status}
+    if not await registrations.update_one({"id": registration_id}, fields):
+        return existing
+    audit_log.record("registration", registration_id, existing, fields, action="payment_status")
+    updated = {**existing, **fields}
+    events.publish(Event("registration", "updated", registration_id, updated, before=existing))
+    return updated
+
+async def _insert_payment(payments: Repository, payment: Payment) -> dict:
+    """Store a new payment record; raises DuplicateKeyError if its registration already has one"""
+    document = payment.dict()
+    await payments.insert(document)
+    payment_stats.invalidate()
+    audit_log.record("payment", payment.id, {}, document, action="create")
+    events.publish(Event("payment", "created", payment.id, document))
+    return document
+
 @router.get("/info/{registration_id}")
-async def get_payment_info(registration_id: str):
+async def get_payment_info(
+    registration_id: str,
+    registrations: Repository = Depends(get_registrations),
+    payments: Repository = Depends(get_payments)
+):
     """Get payment information for a specific registration"""
     
     try:
         # Check if registration exists
-        registration = await db.registrations.find_one({"id": registration_id})
+        registration = await registrations.find_one({"id": registration_id})
         if not registration:
             raise HTTPException(status_code=404, detail="Registration not found")
         
         # Get or create payment record
-        payment_record = await db.payments.find_one({"registration_id": registration_id})
+        payment_record = await payments.find_one({"registration_id": registration_id})
         
         if not payment_record:
             # Create new payment record
             payment = Payment(registration_id=registration_id)
-            await db.payments.insert_one(payment.dict())
+            try:
+                await _insert_payment(payments, payment)
+            except DuplicateKeyError:
+                # Created by a concurrent first request (possibly on another worker): return that record
+                payment_record = await payments.find_one({"registration_id": registration_id})
+                payment = Payment(**payment_record)
         else:
             payment = Payment(**payment_record)
         
@@ -92,51 +138,59 @@ async def get_payment_info(registration_id: str):
         raise HTTPException(status_code=500, detail="Failed to fetch payment information")
 
 @router.post("", response_model=PaymentResponse)
-async def create_payment_record(payment_data: PaymentCreate):
+async def create_payment_record(
+    payment_data: PaymentCreate,
+    registrations: Repository = Depends(get_registrations),
+    payments: Repository = Depends(get_payments)
+):
     """Create or update payment record for registration"""
     
     try:
         # Verify registration exists
-        registration = await db.registrations.find_one({"id": payment_data.registration_id})
+        registration = await registrations.find_one({"id": payment_data.registration_id})
         if not registration:
             raise HTTPException(status_code=404, detail="Registration not found")
         
+        # Fields refreshed when the record already exists
+        update_data = {
+            "transaction_id": payment_data.transaction_id,
+            "payment_proof_url": payment_data.payment_proof_url,
+            "payment_notes": payment_data.payment_notes,
+            "last_updated": datetime.utcnow()
+        }
+        
+        if payment_data.transaction_id:
+            update_data["payment_date"] = datetime.utcnow()
+        
         # Check if payment record already exists
-        existing_payment = await db.payments.find_one({"registration_id": payment_data.registration_id})
+        existing_payment = await payments.find_one({"registration_id": payment_data.registration_id})
         
-        if existing_payment:
-            # Update existing payment
-            update_data = {
-                "transaction_id": payment_data.transaction_id,
-                "payment_proof_url": payment_data.payment_proof_url,
-                "payment_notes": payment_data.payment_notes,
-                "last_updated": datetime.utcnow()
-            }
-            
-            if payment_data.transaction_id:
-                update_data["payment_date"] = datetime.utcnow()
-            
-            await db.payments.update_one(
-                {"registration_id": payment_data.registration_id},
-                {"$set": update_data}
-            )
-            
-            # Fetch updated record
-            updated_record = await db.payments.find_one({"registration_id": payment_data.registration_id})
-            payment = Payment(**updated_record)
-            
-        else:
+        if existing_payment is None:
             # Create new payment record
             payment = Payment(**payment_data.dict())
             if payment_data.transaction_id:
                 payment.payment_date = datetime.utcnow()
             
-            await db.payments.insert_one(payment.dict())
+            try:
+                await _insert_payment(payments, payment)
+            except DuplicateKeyError:
+                # Created by a concurrent request (possibly on another worker): update that record instead
+                existing_payment = await payments.find_one({"registration_id": payment_data.registration_id})
+        
+        if existing_payment is not None:
+            # Update existing payment
+            if await payments.update_one({"registration_id": payment_data.registration_id}, update_data):
+                audit_log.record("payment", existing_payment["id"], existing_payment, update_data, action="resubmit")
+            
+            # Fetch updated record
+            updated_record = await payments.find_one({"registration_id": payment_data.registration_id})
+            payment = Payment(**updated_record)
+            events.publish(Event("payment", "updated", payment.id, updated_record, before=existing_payment))
         
         # Update registration payment status
-        await db.registrations.update_one(
-            {"id": payment_data.registration_id},
-            {"$set": {"paymentStatus": "advance_paid" if payment_data.transaction_id else "unpaid"}}
+        await _set_registration_payment_status(
+            registrations, payment_data.registration_id,
+            "advance_paid" if payment_data.transaction_id else "unpaid"
         )
         
         logger.info(f"Payment record created/updated for registration: {payment_data.registration_id}")
@@ -158,7 +212,8 @@ async def get_all_payments(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = Query(None),
-    registration_id: Optional[str] = Query(None)
+    registration_id: Optional[str] = Query(None),
+    payments: Repository = Depends(get_payments)
 ):
     """Get all payment records (admin endpoint)"""
     
@@ -171,20 +226,19 @@ async def get_all_payments(
             query["registration_id"] = registration_id
         
         # Get total count
-        total = await db.payments.count_documents(query)
+        total = await payments.count(query)
         
         # Get payments with pagination
-        cursor = db.payments.find(query).skip(skip).limit(limit).sort("created_date", -1)
-        payments_data = await cursor.to_list(length=limit)
+        payments_data = await payments.find(query, sort=("created_date", -1), skip=skip, limit=limit)
         
         # Convert to Payment objects
-        payments = [Payment(**payment) for payment in payments_data]
+        payment_list = [Payment(**payment) for payment in payments_data]
         
         return PaymentListResponse(
             success=True,
-            data=payments,
+            data=payment_list,
             total=total,
-            message=f"Retrieved {len(payments)} payment records"
+            message=f"Retrieved {len(payment_list)} payment records"
         )
         
     except Exception as e:
@@ -192,12 +246,17 @@ async def get_all_payments(
         raise HTTPException(status_code=500, detail="Failed to fetch payment records")
 
 @router.put("/{payment_id}", response_model=PaymentResponse)
-async def update_payment(payment_id: str, update_data: PaymentUpdate):
+async def update_payment(
+    payment_id: str,
+    update_data: PaymentUpdate,
+    registrations: Repository = Depends(get_registrations),
+    payments: Repository = Depends(get_payments)
+):
     """Update payment status and details (admin endpoint)"""
     
     try:
         # Check if payment exists
-        existing = await db.payments.find_one({"id": payment_id})
+        existing = await payments.find_one({"id": payment_id})
         if not existing:
             raise HTTPException(status_code=404, detail="Payment record not found")
         
@@ -212,12 +271,11 @@ async def update_payment(payment_id: str, update_data: PaymentUpdate):
                 update_dict["verification_date"] = datetime.utcnow()
             
             # Update in database
-            result = await db.payments.update_one(
-                {"id": payment_id},
-                {"$set": update_dict}
-            )
+            modified_count = await payments.update_one({"id": payment_id}, update_dict)
             
-            if result.modified_count > 0:
+            if modified_count > 0:
+                payment_stats.invalidate()
+                audit_log.record("payment", payment_id, existing, update_dict)
                 # Update corresponding registration payment status
                 if update_data.payment_status:
                     registration_payment_status = {
@@ -227,14 +285,26 @@ async def update_payment(payment_id: str, update_data: PaymentUpdate):
                         "failed": "unpaid"
                     }.get(update_data.payment_status, "unpaid")
                     
-                    await db.registrations.update_one(
-                        {"id": existing["registration_id"]},
-                        {"$set": {"paymentStatus": registration_payment_status}}
+                    registration = await _set_registration_payment_status(
+                        registrations, existing["registration_id"], registration_payment_status
                     )
+
+                    if update_data.payment_status == "completed" and registration:
+                        mail_engine.send_template(
+                            "payment_verified",
+                            registration["email"],
+                            {
+                                "fullName": registration["fullName"],
+                                "registration_id": existing["registration_id"],
+                                "transaction_id": update_dict.get("transaction_id") or existing.get("transaction_id") or "-",
+                                "payment_status": "completed"
+                            }
+                        )
                 
                 # Fetch updated payment
-                updated_data = await db.payments.find_one({"id": payment_id})
+                updated_data = await payments.find_one({"id": payment_id})
                 updated_payment = Payment(**updated_data)
+                events.publish(Event("payment", "updated", payment_id, updated_data, before=existing))
                 
                 logger.info(f"Payment updated: {payment_id}")
                 
@@ -262,53 +332,56 @@ async def update_payment(payment_id: str, update_data: PaymentUpdate):
         logger.error(f"Error updating payment {payment_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update payment")
 
+async def load_payment_stats(payments: Repository) -> dict:
+    # Independent queries, issued concurrently
+    total_payments, pending, partial, completed, failed, completed_payments = await asyncio.gather(
+        payments.count({}),
+        # By status
+        payments.count({"payment_status": "pending"}),
+        payments.count({"payment_status": "partial"}),
+        payments.count({"payment_status": "completed"}),
+        payments.count({"payment_status": "failed"}),
+        # Total amount calculations
+        payments.find({"payment_status": "completed"}, limit=1000, fields=["total_inr_amount"])
+    )
+    total_amount_collected = sum(payment.get("total_inr_amount", 283500) for payment in completed_payments)
+    
+    pending_amount = pending * 283500  # Assuming standard amount
+    
+    return {
+        "total_payments": total_payments,
+        "by_status": {
+            "pending": pending,
+            "partial": partial,
+            "completed": completed,
+            "failed": failed
+        },
+        "amounts": {
+            "per_registration_inr": 283500,
+            "per_registration_usd": 3000,
+            "total_collected_inr": total_amount_collected,
+            "pending_amount_inr": pending_amount,
+            "gst_per_registration": 13500,
+            "base_amount_per_registration": 270000
+        },
+        "bank_details": {
+            "account_number": "50200073668320",
+            "bank_name": "HDFC BANK",
+            "total_expected_if_full": 200 * 283500  # If all 200 slots filled
+        }
+    }
+
 @router.get("/stats/summary")
-async def get_payment_statistics():
+async def get_payment_statistics(payments: Repository = Depends(get_payments)):
     """Get payment statistics for admin dashboard"""
     
     try:
-        # Total payments
-        total_payments = await db.payments.count_documents({})
-        
-        # By status
-        pending = await db.payments.count_documents({"payment_status": "pending"})
-        partial = await db.payments.count_documents({"payment_status": "partial"})
-        completed = await db.payments.count_documents({"payment_status": "completed"})
-        failed = await db.payments.count_documents({"payment_status": "failed"})
-        
-        # Total amount calculations
-        completed_payments = await db.payments.find({"payment_status": "completed"}).to_list(1000)
-        total_amount_collected = sum(payment.get("total_inr_amount", 283500) for payment in completed_payments)
-        
-        pending_amount = pending * 283500  # Assuming standard amount
-        
         return {
             "success": True,
-            "data": {
-                "total_payments": total_payments,
-                "by_status": {
-                    "pending": pending,
-                    "partial": partial,
-                    "completed": completed,
-                    "failed": failed
-                },
-                "amounts": {
-                    "per_registration_inr": 283500,
-                    "per_registration_usd": 3000,
-                    "total_collected_inr": total_amount_collected,
-                    "pending_amount_inr": pending_amount,
-                    "gst_per_registration": 13500,
-                    "base_amount_per_registration": 270000
-                },
-                "bank_details": {
-                    "account_number": "50200073668320",
-                    "bank_name": "HDFC BANK",
-                    "total_expected_if_full": 200 * 283500  # If all 200 slots filled
-                }
-            },
+            "data": await payment_stats.get(lambda: load_payment_stats(payments)),
             "message": "Payment statistics retrieved successfully"
         }
         
     except Exception as e:
         logger.error(f"Error getting payment stats: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to get payment statistics")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to get payment statistics")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+import asyncio
 import os
 from datetime import datetime
 import logging
@@ -13,8 +14,16 @@ from models.Registration import (
     RegistrationListResponse
 )
 
-# Get database connection
-from database import db
+# Storage access
+from repositories.base import DuplicateKeyError, Repository
+from storage import get_counters, get_registrations
+from services.audit import audit_log
+from services.availability import availability
+from services.caches import CachedValue, email_index
+from services.capacity import Capacity
+from services.dedup import DEDUP_FIELDS, DUPLICATE, dedup_keys, find_candidates
+from services.events import Event, events
+from services.mailer import mail_engine
 
 router = APIRouter(prefix="/registrations", tags=["registrations"])
 logger = logging.getLogger(__name__)
@@ -23,8 +32,27 @@ logger = logging.getLogger(__name__)
 MAX_REGISTRATIONS = 200
 REGISTRATION_DEADLINE = datetime(2025, 10, 17, 23, 59, 59)
 
+# Active registrations, counted atomically across workers
+capacity = Capacity("active_registrations", MAX_REGISTRATIONS)
+
+# Counts behind /stats/summary, reloaded after STATS_CACHE_TTL or a write through this worker
+registration_stats = CachedValue()
+STATS_FIELDS = {"registrationStatus", "specialty"}
+
+async def warm_caches(registrations: Repository, counters: Repository):
+    """Fill the email index and stats (and create the capacity counter) before the worker reports ready"""
+    await asyncio.gather(
+        capacity.ensure(counters, registrations),
+        email_index.load(registrations),
+        registration_stats.get(lambda: load_registration_stats(registrations))
+    )
+
 @router.post("", response_model=RegistrationResponse)
-async def create_registration(registration_data: RegistrationCreate):
+async def create_registration(
+    registration_data: RegistrationCreate,
+    registrations: Repository = Depends(get_registrations),
+    counters: Repository = Depends(get_counters)
+):
     """Create a new registration for KICON 2025"""
     
     try:
@@ -36,39 +64,69 @@ async def create_registration(registration_data: RegistrationCreate):
             )
         
         # Check if email already exists
-        existing_registration = await db.registrations.find_one({"email": registration_data.email})
+        existing_registration = await registrations.find_one({"email": registration_data.email})
         if existing_registration:
             raise HTTPException(
                 status_code=400,
                 detail="Email already registered. Please use a different email address or contact support."
             )
         
-        # Check registration limit
-        total_registrations = await db.registrations.count_documents({
-            "registrationStatus": {"$ne": "cancelled"}
-        })
+        # Same delegate under another email: same passport, or same phone, name and date of birth
+        keys = dedup_keys(registration_data.dict())
+        matches = await find_candidates(registrations, keys)
+        if matches and matches[0].verdict == DUPLICATE:
+            logger.warning(f"Duplicate registration rejected for {registration_data.email}: matches {matches[0].id}")
+            raise HTTPException(
+                status_code=400,
+                detail="A registration for this delegate already exists. Please contact support to change its email address."
+            )
         
-        if total_registrations >= MAX_REGISTRATIONS:
+        # Reserve a slot (atomic across workers, so concurrent requests cannot overbook)
+        if not await capacity.reserve(counters, registrations):
             raise HTTPException(
                 status_code=400,
                 detail="Registration limit reached. Maximum 200 delegates allowed."
             )
         
-        # Create registration object
-        registration = Registration(**registration_data.dict())
-        
-        # Insert into database
-        result = await db.registrations.insert_one(registration.dict())
-        
-        if result.inserted_id:
-            logger.info(f"New registration created: {registration.email}")
-            return RegistrationResponse(
-                success=True,
-                data=registration,
-                message="Registration submitted successfully! You will receive a confirmation email shortly."
+        try:
+            # Create registration object
+            registration = Registration(**registration_data.dict())
+            document = registration.dict()
+            document["dedupKeys"] = keys
+            if matches:
+                # Shares only a phone number or name and date of birth; left for an admin to review
+                document["possibleDuplicateOf"] = [match.id for match in matches]
+            
+            # Insert into database (the unique email index catches concurrent duplicates)
+            await registrations.insert(document)
+        except DuplicateKeyError:
+            await capacity.release(counters)
+            raise HTTPException(
+                status_code=400,
+                detail="Email already registered. Please use a different email address or contact support."
             )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to create registration")
+        except Exception:
+            await capacity.release(counters)
+            raise
+        
+        email_index.add(registration.email)
+        registration_stats.invalidate()
+        events.publish(Event("registration", "created", registration.id, document))
+        logger.info(f"New registration created: {registration.email}")
+        mail_engine.send_template(
+            "registration_confirmation",
+            registration.email,
+            {
+                "fullName": registration.fullName,
+                "registration_id": registration.id,
+                "specialty": registration.specialty
+            }
+        )
+        return RegistrationResponse(
+            success=True,
+            data=registration,
+            message="Registration submitted successfully! You will receive a confirmation email shortly."
+        )
             
     except HTTPException:
         raise
@@ -80,7 +138,8 @@ async def create_registration(registration_data: RegistrationCreate):
 async def get_all_registrations(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
-    status: Optional[str] = Query(None)
+    status: Optional[str] = Query(None),
+    registrations: Repository = Depends(get_registrations)
 ):
     """Get all registrations (admin endpoint)"""
     
@@ -91,32 +150,64 @@ async def get_all_registrations(
             query["registrationStatus"] = status
         
         # Get total count
-        total = await db.registrations.count_documents(query)
+        total = await registrations.count(query)
         
         # Get registrations with pagination
-        cursor = db.registrations.find(query).skip(skip).limit(limit).sort("registrationDate", -1)
-        registrations_data = await cursor.to_list(length=limit)
+        registrations_data = await registrations.find(query, sort=("registrationDate", -1), skip=skip, limit=limit)
         
         # Convert to Registration objects
-        registrations = [Registration(**reg) for reg in registrations_data]
+        registration_list = [Registration(**reg) for reg in registrations_data]
         
         return RegistrationListResponse(
             success=True,
-            data=registrations,
+            data=registration_list,
             total=total,
-            message=f"Retrieved {len(registrations)} registrations"
+            message=f"Retrieved {len(registration_list)} registrations"
         )
         
     except Exception as e:
         logger.error(f"Error fetching registrations: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch registrations")
 
+async def load_availability(registrations: Repository, counters: Repository) -> dict:
+    # One read of the shared capacity counter
+    active = await capacity.active(counters, registrations)
+    deadline_passed = datetime.utcnow() > REGISTRATION_DEADLINE
+    available_spots = max(MAX_REGISTRATIONS - active, 0)
+    return {
+        "available_spots": available_spots,
+        "registration_limit": MAX_REGISTRATIONS,
+        "deadline_passed": deadline_passed,
+        "registration_open": not deadline_passed and available_spots > 0
+    }
+
+@router.get("/availability")
+async def get_availability():
+    """Remaining seats and deadline status, from memory"""
+    if availability.data is None:
+        raise HTTPException(status_code=503, detail="Availability not loaded yet")
+    return {
+        "success": True,
+        "data": {**availability.data, "version": availability.version},
+        "message": "Availability retrieved successfully"
+    }
+
+@router.get("/availability/stream")
+async def stream_availability():
+    """Remaining seats and deadline status as Server-Sent Events: an `availability` event now and on every change"""
+    return StreamingResponse(
+        availability.stream(),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{registration_id}", response_model=RegistrationResponse)
-async def get_registration(registration_id: str):
+async def get_registration(registration_id: str, registrations: Repository = Depends(get_registrations)):
     """Get a specific registration by ID"""
     
     try:
-        registration_data = await db.registrations.find_one({"id": registration_id})
+        registration_data = await registrations.find_one({"id": registration_id})
         
         if not registration_data:
             raise HTTPException(status_code=404, detail="Registration not found")
@@ -136,16 +227,16 @@ async def get_registration(registration_id: str):
         raise HTTPException(status_code=500, detail="Failed to fetch registration")
 
 @router.get("/email/{email}", response_model=dict)
-async def check_email_exists(email: str):
+async def check_email_exists(email: str, registrations: Repository = Depends(get_registrations)):
     """Check if an email is already registered"""
     
     try:
-        existing = await db.registrations.find_one({"email": email})
+        exists = await email_index.contains(email, registrations)
         
         return {
             "success": True,
-            "exists": existing is not None,
-            "message": "Email already registered" if existing else "Email available"
+            "exists": exists,
+            "message": "Email already registered" if exists else "Email available"
         }
         
     except Exception as e:
@@ -153,12 +244,17 @@ async def check_email_exists(email: str):
         raise HTTPException(status_code=500, detail="Failed to check email")
 
 @router.put("/{registration_id}", response_model=RegistrationResponse)
-async def update_registration(registration_id: str, update_data: RegistrationUpdate):
+async def update_registration(
+    registration_id: str,
+    update_data: RegistrationUpdate,
+    registrations: Repository = Depends(get_registrations),
+    counters: Repository = Depends(get_counters)
+):
     """Update an existing registration"""
     
     try:
         # Check if registration exists
-        existing = await db.registrations.find_one({"id": registration_id})
+        existing = await registrations.find_one({"id": registration_id})
         if not existing:
             raise HTTPException(status_code=404, detail="Registration not found")
         
@@ -167,17 +263,40 @@ async def update_registration(registration_id: str, update_data: RegistrationUpd
         
         if update_dict:
             update_dict["lastUpdated"] = datetime.utcnow()
+            if any(field in update_dict for field in DEDUP_FIELDS):
+                update_dict["dedupKeys"] = dedup_keys({**existing, **update_dict})
             
-            # Update in database
-            result = await db.registrations.update_one(
-                {"id": registration_id},
-                {"$set": update_dict}
-            )
+            # Moving in or out of "cancelled" takes or frees a capacity slot
+            previous_status = existing.get("registrationStatus")
+            new_status = update_dict.get("registrationStatus", previous_status)
+            reactivating = previous_status == "cancelled" and new_status != "cancelled"
+            cancelling = previous_status != "cancelled" and new_status == "cancelled"
+            if reactivating and not await capacity.reserve(counters, registrations):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Registration limit reached. Maximum 200 delegates allowed."
+                )
+            
+            # Update in database; a status change only applies if nobody crossed the same boundary meanwhile
+            update_filter = {"id": registration_id}
+            if reactivating:
+                update_filter["registrationStatus"] = "cancelled"
+            elif cancelling:
+                update_filter["registrationStatus"] = {"$ne": "cancelled"}
+            modified_count = await registrations.update_one(update_filter, update_dict)
+            if (reactivating and not modified_count) or (cancelling and modified_count):
+                await capacity.release(counters)
             
-            if result.modified_count > 0:
+            if modified_count > 0:
+                if STATS_FIELDS.intersection(update_dict):
+                    registration_stats.invalidate()
+                audit_log.record("registration", registration_id, existing, update_dict)
                 # Fetch updated registration
-                updated_data = await db.registrations.find_one({"id": registration_id})
+                updated_data = await registrations.find_one({"id": registration_id})
                 updated_registration = Registration(**updated_data)
+                events.publish(Event(
+                    "registration", "cancelled" if cancelling else "updated", registration_id, updated_data, before=existing
+                ))
                 
                 logger.info(f"Registration updated: {registration_id}")
                 
@@ -206,30 +325,41 @@ async def update_registration(registration_id: str, update_data: RegistrationUpd
         raise HTTPException(status_code=500, detail="Failed to update registration")
 
 @router.delete("/{registration_id}", response_model=RegistrationResponse)
-async def cancel_registration(registration_id: str):
+async def cancel_registration(
+    registration_id: str,
+    registrations: Repository = Depends(get_registrations),
+    counters: Repository = Depends(get_counters)
+):
     """Cancel a registration (soft delete by changing status)"""
     
     try:
         # Check if registration exists
-        existing = await db.registrations.find_one({"id": registration_id})
+        existing = await registrations.find_one({"id": registration_id})
         if not existing:
             raise HTTPException(status_code=404, detail="Registration not found")
         
-        # Update status to cancelled
-        result = await db.registrations.update_one(
-            {"id": registration_id},
-            {
-                "$set": {
-                    "registrationStatus": "cancelled",
-                    "lastUpdated": datetime.utcnow()
-                }
-            }
+        # Update status to cancelled; only the request that actually cancels an active registration frees its slot
+        cancel_fields = {
+            "registrationStatus": "cancelled",
+            "lastUpdated": datetime.utcnow()
+        }
+        modified_count = await registrations.update_one(
+            {"id": registration_id, "registrationStatus": {"$ne": "cancelled"}},
+            cancel_fields
         )
+        if modified_count:
+            await capacity.release(counters)
+            audit_log.record("registration", registration_id, existing, cancel_fields, action="cancel")
+        else:
+            # Already cancelled
+            modified_count = await registrations.update_one({"id": registration_id}, cancel_fields)
         
-        if result.modified_count > 0:
+        if modified_count > 0:
+            registration_stats.invalidate()
             # Fetch updated registration
-            updated_data = await db.registrations.find_one({"id": registration_id})
+            updated_data = await registrations.find_one({"id": registration_id})
             cancelled_registration = Registration(**updated_data)
+            events.publish(Event("registration", "cancelled", registration_id, updated_data, before=existing))
             
             logger.info(f"Registration cancelled: {registration_id}")
             
@@ -247,48 +377,55 @@ async def cancel_registration(registration_id: str):
         logger.error(f"Error cancelling registration {registration_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to cancel registration")
 
+async def load_registration_stats(registrations: Repository) -> dict:
+    # Independent counts, issued concurrently
+    total, pending, confirmed, cancelled, dermatology, dentistry, cosmetology, other = await asyncio.gather(
+        registrations.count({}),
+        # By status
+        registrations.count({"registrationStatus": "pending"}),
+        registrations.count({"registrationStatus": "confirmed"}),
+        registrations.count({"registrationStatus": "cancelled"}),
+        # By specialty
+        registrations.count({"specialty": "dermatology"}),
+        registrations.count({"specialty": "dentistry"}),
+        registrations.count({"specialty": "cosmetology"}),
+        registrations.count({"specialty": "other"})
+    )
+    
+    # Available spots
+    active_registrations = total - cancelled
+    available_spots = MAX_REGISTRATIONS - active_registrations
+    
+    return {
+        "total_registrations": total,
+        "active_registrations": active_registrations,
+        "available_spots": available_spots,
+        "registration_limit": MAX_REGISTRATIONS,
+        "by_status": {
+            "pending": pending,
+            "confirmed": confirmed,
+            "cancelled": cancelled
+        },
+        "by_specialty": {
+            "dermatology": dermatology,
+            "dentistry": dentistry,
+            "cosmetology": cosmetology,
+            "other": other
+        },
+        "registration_deadline": REGISTRATION_DEADLINE.isoformat()
+    }
+
 @router.get("/stats/summary")
-async def get_registration_stats():
+async def get_registration_stats(registrations: Repository = Depends(get_registrations)):
     """Get registration statistics"""
     
     try:
-        # Total registrations
-        total = await db.registrations.count_documents({})
-        
-        # By status
-        pending = await db.registrations.count_documents({"registrationStatus": "pending"})
-        confirmed = await db.registrations.count_documents({"registrationStatus": "confirmed"})
-        cancelled = await db.registrations.count_documents({"registrationStatus": "cancelled"})
-        
-        # By specialty
-        dermatology = await db.registrations.count_documents({"specialty": "dermatology"})
-        dentistry = await db.registrations.count_documents({"specialty": "dentistry"})
-        cosmetology = await db.registrations.count_documents({"specialty": "cosmetology"})
-        other = await db.registrations.count_documents({"specialty": "other"})
-        
-        # Available spots
-        active_registrations = total - cancelled
-        available_spots = MAX_REGISTRATIONS - active_registrations
+        stats = await registration_stats.get(lambda: load_registration_stats(registrations))
         
         return {
             "success": True,
             "data": {
-                "total_registrations": total,
-                "active_registrations": active_registrations,
-                "available_spots": available_spots,
-                "registration_limit": MAX_REGISTRATIONS,
-                "by_status": {
-                    "pending": pending,
-                    "confirmed": confirmed,
-                    "cancelled": cancelled
-                },
-                "by_specialty": {
-                    "dermatology": dermatology,
-                    "dentistry": dentistry,
-                    "cosmetology": cosmetology,
-                    "other": other
-                },
-                "registration_deadline": REGISTRATION_DEADLINE.isoformat(),
+                **stats,
                 "deadline_passed": datetime.utcnow() > REGISTRATION_DEADLINE
             },
             "message": "Registration statistics retrieved successfully"
@@ -296,4 +433,4 @@ async def get_registration_stats():
         
     except Exception as e:
         logger.error(f"Error getting registration stats: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to get registration statistics")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to get registration statistics")
@@ -1,10 +1,18 @@
 from fastapi import APIRouter, HTTPException
 import logging
 
+from services.caches import static_content
+
 router = APIRouter(prefix="/static", tags=["static-data"])
 logger = logging.getLogger(__name__)
 
+# Key event dates (also used by the reminder campaigns)
+BALANCE_PAYMENT_DUE_DATE = "2025-10-17"
+EVENT_START_DATE = "2025-11-24"
+EVENT_END_DATE = "2025-11-26"
+
 @router.get("/schedule")
+@static_content.cached
 async def get_event_schedule():
     """Get KICON 2025 event schedule"""
     
@@ -102,6 +110,7 @@ async def get_event_schedule():
         raise HTTPException(status_code=500, detail="Failed to fetch event schedule")
 
 @router.get("/gallery")
+@static_content.cached
 async def get_gallery_images():
     """Get gallery images for KICON 2025"""
     
@@ -228,6 +237,7 @@ async def get_gallery_images():
         raise HTTPException(status_code=500, detail="Failed to fetch gallery images")
 
 @router.get("/package-info")
+@static_content.cached
 async def get_package_information():
     """Get KICON 2025 package information"""
     
@@ -270,7 +280,7 @@ async def get_package_information():
                     "amount": 1500,
                     "currency": "USD",
                     "percentage": 50,
-                    "due_date": "2025-10-17"
+                    "due_date": BALANCE_PAYMENT_DUE_DATE
                 }
             },
             "cancellation_policy": [
@@ -298,8 +308,8 @@ async def get_package_information():
             },
             "event_details": {
                 "dates": {
-                    "start": "2025-11-24",
-                    "end": "2025-11-26"
+                    "start": EVENT_START_DATE,
+                    "end": EVENT_END_DATE
                 },
                 "location": "Incheon, South Korea",
                 "max_delegates": 200,
@@ -318,6 +328,7 @@ async def get_package_information():
         raise HTTPException(status_code=500, detail="Failed to fetch package information")
 
 @router.get("/contact-info")
+@static_content.cached
 async def get_contact_information():
     """Get KICON 2025 contact information"""
     
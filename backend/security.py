@@ -0,0 +1,24 @@
+"""
+Shared-secret guard for operational endpoints.
+
+Diagnostics are only available when ADMIN_API_KEY is set, and callers must
+send it in the X-Admin-Key header.
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY', '')
+ADMIN_HEADER = "x-admin-key"
+
+
+def is_admin_key(value: Optional[str]) -> bool:
+    return bool(ADMIN_API_KEY) and value is not None and hmac.compare_digest(value, ADMIN_API_KEY)
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """FastAPI dependency rejecting requests without a valid admin key"""
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=403, detail="Admin key required")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Production serving mode: N uvicorn worker processes sharing one listening socket.
+
+    python serve.py --workers 4 --port 8001
+
+Each worker is a separate process with its own event loop (uvloop and the
+httptools HTTP parser when they are installed), so the API uses N cores
+instead of one. WEB_CONCURRENCY is set to the worker count for every worker,
+which is how Settings splits MONGO_POOL_BUDGET: each worker's maxPoolSize is
+budget // workers, so adding workers never exceeds what the cluster allows
+(MONGO_MAX_POOL_SIZE, if set, wins).
+
+State that must be global lives in MongoDB, and every write to it is atomic:
+- registrations and payments: STORAGE_BACKEND must be mongo. The in-memory
+  backend would give each worker its own data, so it is refused with more
+  than one worker.
+- delegate capacity: a counter document taken with a conditional `$inc`
+  (services/capacity.py), so concurrent registrations cannot overbook.
+- duplicate submissions: the unique email index rejects a second
+  registration, and the unique payments.registration_id index turns two
+  concurrent POST /api/payments for one registration into one record.
+- rate limits: RATE_LIMIT_BACKEND defaults to mongo when there is more than
+  one worker. The per-worker buckets still reject floods first, but the
+  shared buckets enforce the configured limit across workers.
+- reminder campaigns: every worker runs the scheduler, and a lease on each
+  run makes exactly one of them send it (services/campaigns.py).
+
+Per worker by design:
+- caches: static content never changes; stats are at most STATS_CACHE_TTL
+  old; the email index reloads every EMAIL_INDEX_REFRESH_SECONDS and is only
+  advisory.
+- admission control: slots and queues apply per process, so the totals are N
+  times the configured values.
+- /api/admin/live: an admin only sees writes made through the worker it is
+  connected to, unless ADMIN_LIVE_SOURCE=change_stream has every worker
+  watch MongoDB (replica set required).
+- /api/metrics and the diagnostics endpoints: they report the worker that
+  answered the request, so scrape every worker or aggregate.
+
+Scaling is measured by benchmarks/scaling_benchmark.py.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+import uvicorn
+
+from settings import Settings
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with several worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--timeout-keep-alive", type=int, default=5)
+    # Open event streams never finish on their own; after this long shutdown closes them
+    parser.add_argument("--timeout-graceful-shutdown", type=int, default=10)
+    parser.add_argument("--allow-per-worker-storage", action="store_true",
+                        help="allow STORAGE_BACKEND=memory with several workers (benchmarks of stateless endpoints only)")
+    args = parser.parse_args()
+
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    settings = Settings.from_env()
+    if args.workers > 1:
+        if settings.storage_backend == "memory" and not args.allow_per_worker_storage:
+            parser.error("STORAGE_BACKEND=memory keeps separate data in every worker; use mongo with --workers > 1")
+        if "RATE_LIMIT_BACKEND" not in os.environ and settings.storage_backend == "mongo":
+            os.environ["RATE_LIMIT_BACKEND"] = "mongo"
+        elif settings.rate_limit_backend != "mongo":
+            print(f"⚠️  RATE_LIMIT_BACKEND={settings.rate_limit_backend}: every worker enforces its own limits", file=sys.stderr)
+
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    if (loop, http) != ("uvloop", "httptools"):
+        print(f"⚠️  uvloop/httptools not installed, using loop={loop} http={http}", file=sys.stderr)
+
+    print(f"🚀 Serving on {args.host}:{args.port} with {args.workers} worker(s), loop={loop}, http={http}, "
+          f"Mongo pool per worker: {settings.mongo_client_options() or 'driver defaults'}")
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.timeout_keep_alive,
+        timeout_graceful_shutdown=args.timeout_graceful_shutdown,
+        # Logging is configured by the app (JSON lines); MetricsMiddleware writes the access log
+        log_config=None,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,51 @@
-from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-import os
+import asyncio
+import json
 import logging
-from pathlib import Path
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-# Import database connection
-from database import db
+# First: loads backend/.env before the modules below read their constants from the environment
+from settings import Settings, get_settings, use_settings
+import database
+from repositories.base import Repository
+from storage import current_storage, get_status_checks
 
 # Import route modules
-from routes import registrations, contacts, static_data, payments, brochure
+from routes import registrations, contacts, static_data, payments, brochure, metrics, diagnostics, health, audit, admin
+
+# Import middleware
+from middleware.rate_limit import RateLimitMiddleware, RateLimitRule, MongoTokenBuckets
+from middleware.admission import AdmissionControlMiddleware, AdmissionController, RouteClass
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.tracing import TracingMiddleware
+from monitoring.metrics import registry
+from monitoring.loop_monitor import loop_monitor
+from monitoring.structured_logging import configure_logging, shutdown_logging
+from monitoring.tracing import instrument_fastapi, tracer
 
-# Create the main app without a prefix
-app = FastAPI(
-    title="KICON 2025 API",
-    description="API for KICON: Shine & Smile 2025 Indo-Korean Medical Convention",
-    version="1.0.0"
-)
+# Import background services (campaigns and the scheduler are imported only when enabled)
+from services.audit import audit_log
+from services.availability import AVAILABILITY_MAX_CLIENTS, availability
+from services.live_feed import live_feed
+from services.batch_writer import schema_upgrade_writer, status_check_writer
+from services.caches import static_content
+from services.events import events
+from services.mailer import mail_engine
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+logger = logging.getLogger(__name__)
+
+# Legacy routes, mounted under /api by create_app
+legacy_router = APIRouter()
 
 # Define Models for legacy endpoints
 class StatusCheck(BaseModel):
@@ -34,49 +56,265 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
-# Legacy routes
-@api_router.get("/")
+@legacy_router.get("/")
 async def root():
     return {"message": "KICON 2025 API - Welcome to the Indo-Korean Medical Convention Platform"}
 
-@api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
+STATUS_CHECK_FIELDS = {"id", "client_name", "timestamp"}
+
+@legacy_router.post("/status", response_model=StatusCheck)
+async def create_status_check(input: StatusCheckCreate, status_checks: Repository = Depends(get_status_checks)):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    # Buffered and written in batches (services/batch_writer.py); direct insert when the writer is not running
+    if not status_check_writer.add(status_obj.dict()):
+        await status_checks.insert(status_obj.dict())
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
-
-# Include all route modules
-api_router.include_router(registrations.router)
-api_router.include_router(contacts.router)
-api_router.include_router(static_data.router)
-api_router.include_router(payments.router)
-api_router.include_router(brochure.router)
-
-# Include the main router in the app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+def _status_line(document: dict) -> bytes:
+    return json.dumps(document, default=lambda value: value.isoformat(), separators=(",", ":")).encode("utf-8") + b"\n"
+
+@legacy_router.get("/status")
+async def list_status_checks(
+    limit: int = Query(100, ge=1, le=1000),
+    since: Optional[datetime] = Query(None, description="Only checks after this timestamp; pass the last one received to resume"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of id, client_name, timestamp"),
+    status_checks: Repository = Depends(get_status_checks)
+):
+    """Status checks in timestamp order as NDJSON, one object per line, streamed from the cursor"""
+    projection = None
+    if fields:
+        projection = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(projection) - STATUS_CHECK_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    if since is not None and since.tzinfo is not None:
+        # Stored timestamps are naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    query = {"timestamp": {"$gt": since}} if since else {}
+
+    async def lines():
+        sent, last = 0, None
+        # The timestamp is always read so the page can end on a timestamp boundary: checks sharing the
+        # last timestamp are all sent (even past the limit), so resuming with since= skips none of them
+        read_fields = sorted(set(projection) | {"timestamp"}) if projection else None
+        async for document in status_checks.stream(query, sort=("timestamp", 1), fields=read_fields,
+                                                  batch_size=min(limit + 1, 1000)):
+            timestamp = document.get("timestamp")
+            if sent >= limit and timestamp != last:
+                break
+            last = timestamp
+            if projection and "timestamp" not in projection:
+                del document["timestamp"]
+            sent += 1
+            yield _status_line(document)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# Per-route rate limits, checked before any validation or database work
+RATE_LIMIT_RULES = [
+    RateLimitRule("contacts_ip", "POST", r"/api/contacts", "5/minute"),
+    RateLimitRule("contacts_email", "POST", r"/api/contacts", "3/hour", key="body:email"),
+    RateLimitRule("registrations_ip", "POST", r"/api/registrations", "10/minute"),
+    RateLimitRule("email_check_ip", "GET", r"/api/registrations/email/(?P<email>[^/]+)", "30/minute"),
+    RateLimitRule("email_check_email", "GET", r"/api/registrations/email/(?P<email>[^/]+)", "10/minute", key="path:email"),
+]
+
+
+def _admission_controller() -> AdmissionController:
+    # Each route class gets its own concurrency slots and wait queue
+    return AdmissionController(
+        classes=[
+            RouteClass("delegate_write", concurrency=32, max_queue=128, queue_timeout=2.0),
+            RouteClass("delegate_read", concurrency=64, max_queue=256, queue_timeout=1.0),
+            RouteClass("admin", concurrency=8, max_queue=32, queue_timeout=5.0),
+            RouteClass("static", concurrency=64, max_queue=256, queue_timeout=1.0),
+            # Long-lived event streams: one slot per open connection, refused at once when full
+            RouteClass("stream", concurrency=AVAILABILITY_MAX_CLIENTS, max_queue=0, queue_timeout=0.0),
+        ],
+        routes=[
+            ("stream", "GET", r"/api/registrations/availability/stream"),
+            ("delegate_write", "POST", r"/api/(registrations|contacts|payments)"),
+            ("delegate_read", "GET", r"/api/registrations/(email/[^/]+|availability)"),
+            ("delegate_read", "GET", r"/api/payments/(info/[^/]+|bank-details)"),
+            # Health probes and uptime pingers must not queue behind admin work
+            ("static", "GET", r"/api/(static/.*|brochure/.*|metrics(/.*)?|health/.*|status|admin/dashboard)?"),
+            ("static", "POST", r"/api/status"),
+            ("admin", ".*", r"/api/.*"),
+        ],
+        default="static"
+    )
+
+
+@asynccontextmanager
+async def _timed(timings: dict, phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = round((time.perf_counter() - started) * 1000, 1)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings: Settings = app.state.settings
+    startup = app.state.startup
+    timings = startup["phases_ms"]
+    started = time.perf_counter()
+    loop_monitor.start()
+    tracer.start()
+    storage = current_storage()
+
+    async def prepare_storage():
+        # Indexes for MongoDB, nothing for the in-memory backend
+        async with _timed(timings, "indexes"):
+            await storage.prepare()
+        if app.state.rate_limit_store is not None:
+            await app.state.rate_limit_store.ensure_indexes()
+
+    async def warm_pool():
+        if storage.backend == "mongo" or app.state.rate_limit_store is not None:
+            async with _timed(timings, "mongo_warm_up"):
+                startup["mongo_connections"] = await database.warm_up(settings.mongo_warm_up_timeout_ms / 1000)
+
+    async def start_mail():
+        # Compiles the email templates
+        async with _timed(timings, "mail_engine"):
+            await mail_engine.start()
+
+    # Independent steps overlap: index builds and pool warm-up share the round-trip wait
+    await asyncio.gather(prepare_storage(), warm_pool(), start_mail())
+    status_check_writer.start(storage.status_checks)
+    schema_upgrade_writer.start()
+    audit_log.start(storage)
+    # Read caches last so the stats queries already have their indexes
+    async with _timed(timings, "caches"):
+        await asyncio.gather(
+            static_content.preload(),
+            registrations.warm_caches(storage.registrations, storage.counters),
+            payments.warm_caches(storage.payments),
+            contacts.warm_caches(storage.contacts),
+            admin.dashboard.start(lambda: admin.build_dashboard(storage)),
+            availability.start(lambda: registrations.load_availability(storage.registrations, storage.counters))
+        )
+    events.subscribe(admin.dashboard.mark_dirty)
+    events.subscribe(availability.on_event)
+    if settings.admin_live_source == "change_stream" and storage.backend == "mongo":
+        live_feed.watch(database.get_db())
+    else:
+        if settings.admin_live_source == "change_stream":
+            logger.warning("ADMIN_LIVE_SOURCE=change_stream needs MongoDB storage; using this worker's events")
+        events.subscribe(live_feed.on_event)
+    if settings.campaigns_enabled:
+        from services import campaigns
+        from services.scheduler import scheduler
+        campaigns.register_campaigns()
+        scheduler.start()
+        await campaigns.resume_interrupted_runs()
+
+    startup["lifespan_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup["ready_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+    app.state.ready = True
+    logger.info(
+        f"Ready {startup['ready_ms']}ms after import (import {startup['import_ms']}ms, "
+        f"create_app {startup['create_app_ms']}ms, startup {startup['lifespan_ms']}ms)"
+    )
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        if settings.campaigns_enabled:
+            from services.scheduler import scheduler
+            await scheduler.stop()
+        events.unsubscribe(admin.dashboard.mark_dirty)
+        events.unsubscribe(availability.on_event)
+        events.unsubscribe(live_feed.on_event)
+        await live_feed.stop()
+        await admin.dashboard.stop()
+        await availability.stop()
+        await mail_engine.stop()
+        await status_check_writer.stop()
+        await schema_upgrade_writer.stop()
+        await audit_log.stop()
+        await loop_monitor.stop()
+        database.close()
+        tracer.stop()
+        shutdown_logging()
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build the application; nothing connects to MongoDB until the lifespan starts"""
+    started = time.perf_counter()
+    settings = settings or get_settings()
+    use_settings(settings)
+
+    # JSON lines written by a background thread; see monitoring/structured_logging.py
+    configure_logging()
+
+    app = FastAPI(
+        title="KICON 2025 API",
+        description="API for KICON: Shine & Smile 2025 Indo-Korean Medical Convention",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.settings = settings
+    app.state.ready = False
+
+    # Every route lives under /api; routers are mounted directly on the app so each
+    # route is cloned once rather than once per nesting level
+    for router in (legacy_router, registrations.router, contacts.router, static_data.router,
+                   payments.router, brochure.router, metrics.router, diagnostics.router, health.router,
+                   audit.router, admin.router):
+        app.include_router(router, prefix="/api")
+
+    # Innermost: profiles only the handler work, not queueing in the layers above
+    app.add_middleware(ProfilingMiddleware)
+
+    admission = _admission_controller()
+    app.add_middleware(AdmissionControlMiddleware, controller=admission)
+
+    rate_limit_store = None
+    if settings.rate_limit_backend == 'mongo':
+        rate_limit_store = MongoTokenBuckets(lambda: database.get_db().rate_limits)
+    app.state.rate_limit_store = rate_limit_store
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=RATE_LIMIT_RULES,
+        shared=rate_limit_store,
+        proxy_hops=settings.rate_limit_proxy_hops
+    )
+
+    # Root span of sampled requests; validation, endpoint, serialization and Mongo spans nest under it
+    app.add_middleware(TracingMiddleware)
+    instrument_fastapi()
+
+    # Outermost so shed (503) and rate-limited (429) responses are counted too
+    app.add_middleware(MetricsMiddleware)
+    registry.add_collector(admission.collect)
+    registry.add_collector(mail_engine.collect)
+    registry.add_collector(status_check_writer.collect)
+    registry.add_collector(schema_upgrade_writer.collect)
+    registry.add_collector(audit_log.collect)
+    registry.add_collector(availability.collect)
+    registry.add_collector(live_feed.collect)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.state.startup = {
+        "import_ms": IMPORT_MS,
+        "create_app_ms": round((time.perf_counter() - started) * 1000, 1),
+        "phases_ms": {},
+    }
+    return app
+
+
+IMPORT_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    from database import client
-    client.close()
+# `uvicorn server:app`; use `uvicorn --factory server:create_app` to build from the factory
+app = create_app()
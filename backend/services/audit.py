@@ -0,0 +1,165 @@
+"""
+Append-only audit log of admin and delegate state changes.
+
+Handlers call `audit_log.record(...)` after an update went through, with the
+document as it was read before the update and the fields that were `$set`.
+Only fields whose value actually changed are kept, as `{"before", "after"}`
+pairs, together with who made the change: the X-Admin-User header (self
+reported until the admin API has authentication), the client address (as
+seen by the RATE_LIMIT_PROXY_HOPS trusted proxies) and the request id that also tags the request's log lines.
+
+Recording never waits for the database: the log is a BatchWriter
+(services/batch_writer.py), so entries are buffered and written with
+`insert_many` as soon as AUDIT_BATCH_SIZE are waiting or every
+AUDIT_FLUSH_SECONDS. A failed write, including a batch only partly
+inserted, is retried with backoff; entries that still cannot be written (or
+that arrive while AUDIT_MAX_PENDING are buffered) are logged at error level
+with their full content, so the structured log is the fallback record.
+
+Entries are partitioned by month into `audit_log_YYYY_MM` collections, each
+indexed by (entity_type, entity_id, timestamp), so history lookups stay
+index-only per partition and old months can be archived or dropped whole.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from middleware.rate_limit import client_ip
+from monitoring.context import current_request
+from services.batch_writer import BatchWriter
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COLLECTION = "audit_log"
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '200'))
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', '1'))
+AUDIT_MAX_PENDING = int(os.environ.get('AUDIT_MAX_PENDING', '50000'))
+AUDIT_MAX_ATTEMPTS = int(os.environ.get('AUDIT_MAX_ATTEMPTS', '5'))
+
+# Bumped on every write (the entry's own timestamp already says when) or derived from other fields
+IGNORED_FIELDS = {"lastUpdated", "last_updated", "dedupKeys"}
+
+
+def partition_name(timestamp: datetime) -> str:
+    return f"{AUDIT_COLLECTION}_{timestamp:%Y_%m}"
+
+
+def diff(before: dict, fields: dict) -> Dict[str, dict]:
+    """{field: {"before", "after"}} for the `$set` fields whose value differs from the stored one"""
+    return {
+        field: {"before": before.get(field), "after": value}
+        for field, value in fields.items()
+        if field not in IGNORED_FIELDS and before.get(field) != value
+    }
+
+
+def _request_details() -> dict:
+    context = current_request.get()
+    if context is None:
+        return {"actor": None, "client_ip": None, "request_id": None}
+    headers = dict(context.scope.get("headers") or [])
+    return {
+        "actor": headers[b"x-admin-user"].decode("latin-1") if b"x-admin-user" in headers else None,
+        # The address the trusted proxies saw, not the client-supplied start of X-Forwarded-For
+        "client_ip": client_ip(context.scope, get_settings().rate_limit_proxy_hops),
+        "request_id": context.request_id,
+    }
+
+
+class AuditLog(BatchWriter):
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, max_attempts: int):
+        super().__init__(AUDIT_COLLECTION, batch_size, flush_interval, max_pending)
+        self.max_attempts = max_attempts
+        self._storage = None
+        self._prepared = set()
+
+    def start(self, storage):
+        self._storage = storage
+        self._prepared = set()
+        super().start(None)
+
+    def record(self, entity_type: str, entity_id: str, before: dict, fields: dict, action: str = "update") -> Optional[dict]:
+        """Queue an entry for the fields that changed; returns it, or None when nothing changed"""
+        changes = diff(before, fields)
+        if not changes:
+            return None
+        entry = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow(),
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": changes,
+            **_request_details(),
+        }
+        if not self.add(entry):
+            self._drop([entry], "writer not running")
+        return entry
+
+    def _drop(self, documents: list, reason: str):
+        super()._drop(documents, reason)
+        for entry in documents:
+            logger.error(f"Audit entry not stored ({reason}): {json.dumps(entry, default=str)}")
+
+    async def _write(self, chunk: list) -> int:
+        partitions: Dict[str, List[dict]] = {}
+        for entry in chunk:
+            partitions.setdefault(partition_name(entry["timestamp"]), []).append(entry)
+        for name, entries in partitions.items():
+            await self._write_partition(name, entries)
+        return len(chunk)
+
+    async def _write_partition(self, name: str, entries: List[dict]):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if name not in self._prepared:
+                    await self._storage.prepare_partition(AUDIT_COLLECTION, name)
+                    self._prepared.add(name)
+                # insert_many raises on a partial write; the retry skips the entries already
+                # written (unique id index) instead of duplicating them
+                await self._storage.partition(name).insert_many(entries)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                logger.error(f"Audit write to {name} failed (attempt {attempt}/{self.max_attempts}): "
+                             f"{type(e).__name__}: {str(e)}")
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - 1), 10))
+
+    async def history(self, entity_type: str, entity_id: str, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, limit: int = 100) -> List[dict]:
+        """Entries for one entity, newest first, reading the month partitions from newest to oldest"""
+        names = sorted(await self._storage.partitions(AUDIT_COLLECTION), reverse=True)
+        query: dict = {"entity_type": entity_type, "entity_id": entity_id}
+        window = {}
+        if since:
+            window["$gte"] = since
+            names = [name for name in names if name >= partition_name(since)]
+        if until:
+            window["$lt"] = until
+            names = [name for name in names if name <= partition_name(until)]
+        if window:
+            query["timestamp"] = window
+        entries: List[dict] = []
+        for name in names:
+            entries += await self._storage.partition(name).find(
+                query, sort=("timestamp", -1), limit=limit - len(entries)
+            )
+            if len(entries) >= limit:
+                break
+        return entries
+
+
+audit_log = AuditLog(
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_SECONDS,
+    max_pending=AUDIT_MAX_PENDING,
+    max_attempts=AUDIT_MAX_ATTEMPTS,
+)
@@ -0,0 +1,162 @@
+"""
+Live seat availability for the registration page, pushed as Server-Sent Events.
+
+One broadcaster per worker holds the current availability (remaining seats
+from the shared capacity counter, plus the deadline status). It is reloaded
+with a single counter read when a registration event arrives through this
+worker (services/events.py), at most every AVAILABILITY_MIN_REFRESH_SECONDS,
+and every AVAILABILITY_REFRESH_SECONDS to pick up registrations made through
+other workers and the deadline passing.
+
+When the value changes it is serialized once into an SSE frame and every open
+stream is woken through one shared asyncio.Event, so N connected pages cost
+one read and N socket writes per change instead of N polling queries. A
+stream that falls behind simply sends the newest frame; nothing is queued
+per client. Streams send a comment every AVAILABILITY_KEEPALIVE_SECONDS so
+proxies keep the connection open, and end after
+AVAILABILITY_STREAM_MAX_SECONDS; EventSource reconnects on its own, which also
+spreads long-lived clients over the workers again.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from monitoring.metrics import gauge_lines
+from services.events import Event
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_REFRESH_SECONDS = float(os.environ.get('AVAILABILITY_REFRESH_SECONDS', '5'))
+AVAILABILITY_MIN_REFRESH_SECONDS = float(os.environ.get('AVAILABILITY_MIN_REFRESH_SECONDS', '0.25'))
+AVAILABILITY_KEEPALIVE_SECONDS = float(os.environ.get('AVAILABILITY_KEEPALIVE_SECONDS', '15'))
+AVAILABILITY_STREAM_MAX_SECONDS = float(os.environ.get('AVAILABILITY_STREAM_MAX_SECONDS', '600'))
+# Open streams per worker; more are answered with 503 by admission control
+AVAILABILITY_MAX_CLIENTS = int(os.environ.get('AVAILABILITY_MAX_CLIENTS', '5000'))
+
+# How long EventSource waits before reconnecting, in milliseconds
+RECONNECT_MS = 3000
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+class AvailabilityBroadcaster:
+    def __init__(self, refresh_interval: float, min_interval: float, keepalive: float, max_stream_seconds: float):
+        self.refresh_interval = refresh_interval
+        self.min_interval = min_interval
+        self.keepalive = keepalive
+        self.max_stream_seconds = max_stream_seconds
+        self.version = 0
+        self.data: Optional[dict] = None
+        self.frame: Optional[bytes] = None
+        self.clients = 0
+        self.failures = 0
+        self._loaded = 0.0
+        self._load: Optional[Callable[[], Awaitable[dict]]] = None
+        self._changed = asyncio.Event()
+        self._dirty: Optional[asyncio.Event] = None
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, load: Callable[[], Awaitable[dict]]):
+        """Load the current availability, then keep it up to date in the background"""
+        self._load = load
+        self._dirty = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._closing = False
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Initial availability load failed: {type(e).__name__}: {str(e)}")
+        self._task = asyncio.create_task(self._run(), name="availability-broadcaster")
+
+    async def stop(self):
+        """Stop refreshing and end every open stream"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._changed.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def on_event(self, event: Event):
+        """Event subscriber: registrations change the seat count"""
+        if event.entity == "registration" and self._dirty is not None:
+            self._dirty.set()
+
+    async def refresh(self):
+        started = time.monotonic()
+        data = await self._load()
+        self._loaded = started
+        if data == self.data:
+            return
+        self.version += 1
+        self.data = data
+        payload = json.dumps(
+            jsonable_encoder({**data, "version": self.version, "updated_at": datetime.utcnow()}),
+            separators=(",", ":")
+        )
+        self.frame = f"id: {self.version}\nevent: availability\ndata: {payload}\n\n".encode("utf-8")
+        # Wake every waiting stream at once; later waiters use the new event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            wait = self._loaded + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._dirty.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Availability refresh failed: {type(e).__name__}: {str(e)}")
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """SSE frames for one client: the current availability, then every change"""
+        self.clients += 1
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n".encode()
+            sent = 0
+            ends = time.monotonic() + self.max_stream_seconds
+            while not self._closing:
+                if self.version != sent and self.frame is not None:
+                    sent = self.version
+                    yield self.frame
+                    continue
+                remaining = ends - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=min(self.keepalive, remaining))
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+        finally:
+            self.clients -= 1
+
+    def collect(self):
+        """Metrics collector: open availability streams and the current version"""
+        yield from gauge_lines("kicon_availability_streams", "Open seat availability streams", (), [(self.clients,)])
+        yield from gauge_lines("kicon_availability_version", "Seat availability changes broadcast", (), [(self.version,)])
+
+    def stats(self) -> dict:
+        return {"version": self.version, "clients": self.clients, "failures": self.failures}
+
+
+availability = AvailabilityBroadcaster(
+    refresh_interval=AVAILABILITY_REFRESH_SECONDS,
+    min_interval=AVAILABILITY_MIN_REFRESH_SECONDS,
+    keepalive=AVAILABILITY_KEEPALIVE_SECONDS,
+    max_stream_seconds=AVAILABILITY_STREAM_MAX_SECONDS,
+)
@@ -0,0 +1,168 @@
+"""
+Buffered, batched inserts for high-volume documents nobody reads back at once.
+
+`add()` appends a document to an in-memory buffer and returns immediately;
+a background task writes the buffer with one unordered `insert_many` as soon
+as it holds `batch_size` documents, and at least every `flush_interval`
+seconds otherwise. Stopping the writer flushes what is left.
+
+The buffer is bounded by `max_pending`: while the database is slow or down,
+new documents beyond it are dropped (and counted) rather than growing the
+worker's memory. A failed flush is logged and its documents dropped, so only
+use this for data that can be lost on a crash, such as uptime pings.
+Subclasses change how a chunk is written by overriding `_write`, and what
+happens to dropped documents by overriding `_drop`.
+
+UpgradeWriter buffers the write-back of lazily upgraded documents the same
+way, flushing them with `bulk_update` instead of `insert_many`; the audit
+log (services/audit.py) retries its writes and logs what it drops.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+from monitoring.metrics import gauge_lines
+from repositories.base import Repository, UpdateOperation
+
+logger = logging.getLogger(__name__)
+
+STATUS_CHECK_BATCH_SIZE = int(os.environ.get('STATUS_CHECK_BATCH_SIZE', '500'))
+STATUS_CHECK_FLUSH_SECONDS = float(os.environ.get('STATUS_CHECK_FLUSH_SECONDS', '1'))
+STATUS_CHECK_MAX_PENDING = int(os.environ.get('STATUS_CHECK_MAX_PENDING', '10000'))
+SCHEMA_UPGRADE_BATCH_SIZE = int(os.environ.get('SCHEMA_UPGRADE_BATCH_SIZE', '200'))
+SCHEMA_UPGRADE_FLUSH_SECONDS = float(os.environ.get('SCHEMA_UPGRADE_FLUSH_SECONDS', '1'))
+SCHEMA_UPGRADE_MAX_PENDING = int(os.environ.get('SCHEMA_UPGRADE_MAX_PENDING', '5000'))
+
+
+class BatchWriter:
+    def __init__(self, name: str, batch_size: int, flush_interval: float, max_pending: int):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._buffer: List[dict] = []
+        self._repository: Optional[Repository] = None
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, repository: Repository):
+        self._repository = repository
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name=f"batch-writer-{self.name}")
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is None:
+            return
+        # Let an in-flight insert_many finish instead of cancelling it halfway
+        self._stopping = True
+        self._full.set()
+        await self._task
+        self._task = None
+        await self.flush()
+
+    def add(self, document: dict) -> bool:
+        """Buffer a document; False if the writer is not running or the buffer is full"""
+        if self._task is None:
+            return False
+        if len(self._buffer) >= self.max_pending:
+            self._drop([document], "buffer full")
+            if self.dropped % 1000 == 1:
+                logger.warning(f"{self.name} buffer full ({self.max_pending}), dropping writes")
+            return True
+        self._buffer.append(document)
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+        return True
+
+    async def _write(self, chunk: list) -> int:
+        return await self._repository.insert_many(chunk)
+
+    def _drop(self, documents: list, reason: str):
+        """Count documents that will never be written"""
+        self.dropped += len(documents)
+
+    async def flush(self):
+        """Write the current buffer in batches of batch_size"""
+        batch, self._buffer = self._buffer, []
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                self.written += await self._write(chunk)
+                self.flushes += 1
+            except Exception as e:
+                logger.error(f"Failed to write {len(chunk)} {self.name}: {type(e).__name__}: {str(e)}")
+                self._drop(chunk, "write failed")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            if self._buffer:
+                await self.flush()
+
+    def collect(self):
+        """Metrics collector: buffered, written and dropped documents"""
+        stats = self.stats()
+        for field in ("buffered", "written", "dropped"):
+            yield from gauge_lines(
+                f"kicon_batch_writer_{field}", f"Batch writer documents {field}",
+                ("writer",), [(self.name, stats[field])]
+            )
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+
+class UpgradeWriter(BatchWriter):
+    """Write-back of documents upgraded on read (repositories/versioned.py)
+
+    Items are (repository, UpdateOperation) pairs from any collection; a flush
+    is one unordered bulk_update per collection. A dropped or failed write-back
+    only means the document is upgraded again on its next read.
+    """
+
+    def start(self, repository: Optional[Repository] = None):
+        super().start(repository)
+
+    async def _write(self, chunk: list) -> int:
+        by_repository: Dict[Repository, List[UpdateOperation]] = {}
+        for repository, operation in chunk:
+            by_repository.setdefault(repository, []).append(operation)
+        modified = 0
+        for repository, operations in by_repository.items():
+            modified += await repository.bulk_update(operations)
+        return modified
+
+
+status_check_writer = BatchWriter(
+    "status_checks",
+    batch_size=STATUS_CHECK_BATCH_SIZE,
+    flush_interval=STATUS_CHECK_FLUSH_SECONDS,
+    max_pending=STATUS_CHECK_MAX_PENDING,
+)
+
+schema_upgrade_writer = UpgradeWriter(
+    "schema_upgrades",
+    batch_size=SCHEMA_UPGRADE_BATCH_SIZE,
+    flush_interval=SCHEMA_UPGRADE_FLUSH_SECONDS,
+    max_pending=SCHEMA_UPGRADE_MAX_PENDING,
+)
@@ -0,0 +1,266 @@
+"""
+Per-worker read caches, filled before the worker reports ready.
+
+- `static_content` serializes the JSON of constant endpoints (schedule,
+  gallery, packages, bank details, ...) once and serves the same bytes.
+- `email_index` holds every registered email so the availability check run
+  while delegates type skips the database. A worker only sees its own
+  inserts immediately; emails registered through other workers appear at the
+  next background reload (EMAIL_INDEX_REFRESH_SECONDS). The check is advisory:
+  the unique email index still rejects a duplicate registration.
+- `CachedValue` holds a computed value (the stats summaries) for
+  STATS_CACHE_TTL seconds. Local writes invalidate it, but a value is kept
+  for at least STATS_CACHE_MIN_AGE seconds so a burst of admin updates
+  cannot turn every read into a recount; concurrent requests for an expired
+  value share a single reload.
+- `Snapshot` is a document (the admin dashboard) rebuilt by a background
+  task every `refresh_interval` seconds, or sooner when marked dirty by a
+  write, but never more often than every `min_interval` seconds. It is
+  serialized once per build, so serving it is one memory read; every
+  response carries its version and age, and is flagged stale once it is
+  older than `max_age` (e.g. while rebuilds fail).
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', '5'))
+STATS_CACHE_MIN_AGE = float(os.environ.get('STATS_CACHE_MIN_AGE', '1'))
+EMAIL_INDEX_REFRESH_SECONDS = float(os.environ.get('EMAIL_INDEX_REFRESH_SECONDS', '30'))
+# Above this many registrations the index is not kept and lookups go to the database
+EMAIL_INDEX_MAX_SIZE = int(os.environ.get('EMAIL_INDEX_MAX_SIZE', '100000'))
+
+
+class StaticContent:
+    """Pre-serialized JSON responses of handlers whose output never changes"""
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[], Awaitable[dict]]] = {}
+        self._bodies: Dict[str, bytes] = {}
+
+    def cached(self, handler):
+        """Decorator for a parameterless route handler returning JSON-compatible data"""
+        name = f"{handler.__module__}.{handler.__qualname__}"
+        self._handlers[name] = handler
+
+        @functools.wraps(handler)
+        async def wrapper():
+            body = self._bodies.get(name)
+            if body is None:
+                body = await self._render(name)
+            return Response(content=body, media_type="application/json")
+        return wrapper
+
+    async def _render(self, name: str) -> bytes:
+        data = await self._handlers[name]()
+        body = json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._bodies[name] = body
+        return body
+
+    async def preload(self):
+        for name in self._handlers:
+            if name not in self._bodies:
+                await self._render(name)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._bodies), "bytes": sum(len(body) for body in self._bodies.values())}
+
+
+class CachedValue:
+    def __init__(self, ttl: float = STATS_CACHE_TTL, min_age: float = STATS_CACHE_MIN_AGE):
+        self.ttl = ttl
+        self.min_age = min_age
+        self._value = None
+        self._loaded_at = 0.0
+        self._expires = 0.0
+        self._loading: Optional[asyncio.Future] = None
+
+    async def get(self, load: Callable[[], Awaitable]):
+        if time.monotonic() < self._expires:
+            return self._value
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load(load))
+        # Shielded so one cancelled request does not cancel the reload the others wait on
+        return await asyncio.shield(self._loading)
+
+    async def _load(self, load: Callable[[], Awaitable]):
+        try:
+            started = time.monotonic()
+            value = await load()
+            self._value = value
+            self._loaded_at = started
+            self._expires = started + self.ttl
+            return value
+        finally:
+            self._loading = None
+
+    def invalidate(self):
+        self._expires = min(self._expires, self._loaded_at + self.min_age)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at > 0
+
+
+class EmailIndex:
+    def __init__(self, refresh_interval: float = EMAIL_INDEX_REFRESH_SECONDS, max_size: int = EMAIL_INDEX_MAX_SIZE):
+        self.refresh_interval = refresh_interval
+        self.max_size = max_size
+        self._emails: Optional[Set[str]] = None
+        self._loaded_at = 0.0
+        self._reload: Optional[asyncio.Task] = None
+
+    async def load(self, registrations):
+        """Replace the index with the emails currently stored"""
+        started = time.monotonic()
+        total = await registrations.count({})
+        if total > self.max_size:
+            self._emails = None
+            logger.warning(f"Email index disabled: {total} registrations exceed EMAIL_INDEX_MAX_SIZE={self.max_size}")
+        else:
+            documents = await registrations.find({}, fields=["email"])
+            emails = {document["email"] for document in documents if document.get("email")}
+            if self._emails is not None:
+                # Registrations are never deleted; this keeps emails added locally while the reload was reading
+                emails.update(self._emails)
+            self._emails = emails
+        self._loaded_at = started
+
+    def _schedule_reload(self, registrations):
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.create_task(self._reload_quietly(registrations), name="email-index-reload")
+
+    async def _reload_quietly(self, registrations):
+        try:
+            await self.load(registrations)
+        except Exception as e:
+            logger.error(f"Email index reload failed: {str(e)}")
+
+    async def contains(self, email: str, registrations) -> bool:
+        if time.monotonic() - self._loaded_at >= self.refresh_interval:
+            self._schedule_reload(registrations)
+        if self._emails is None:
+            return await registrations.find_one({"email": email}) is not None
+        return email in self._emails
+
+    def add(self, email: str):
+        if self._emails is not None:
+            self._emails.add(email)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._emails is not None,
+            "size": len(self._emails) if self._emails is not None else None,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+        }
+
+
+class Snapshot:
+    def __init__(self, name: str, refresh_interval: float, min_interval: float, max_age: float):
+        self.name = name
+        self.refresh_interval = refresh_interval
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.version = 0
+        self.generated_at: Optional[datetime] = None
+        self.failures = 0
+        self._generated = 0.0
+        self._body: Optional[bytes] = None
+        self._build: Optional[Callable[[], Awaitable[dict]]] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, build: Callable[[], Awaitable[dict]]):
+        """Build the first version, then keep rebuilding in the background"""
+        self._build = build
+        self._dirty = asyncio.Event()
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Initial {self.name} snapshot failed: {type(e).__name__}: {str(e)}")
+        self._task = asyncio.create_task(self._run(), name=f"snapshot-{self.name}")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def mark_dirty(self, *_):
+        """Rebuild soon (usable directly as an event subscriber)"""
+        if self._dirty is not None:
+            self._dirty.set()
+
+    async def refresh(self):
+        # The data is as old as the moment the reads began
+        started, generated_at = time.monotonic(), datetime.utcnow()
+        data = await self._build()
+        version = self.version + 1
+        body = {
+            "success": True,
+            "data": {"version": version, "generated_at": generated_at, **data},
+            "message": f"{self.name.capitalize()} snapshot {version}"
+        }
+        self._body = json.dumps(jsonable_encoder(body), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.version, self.generated_at, self._generated = version, generated_at, started
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            # A burst of writes is folded into one rebuild
+            wait = self._generated + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._dirty.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"{self.name} snapshot refresh failed: {type(e).__name__}: {str(e)}")
+
+    def age(self) -> Optional[float]:
+        return time.monotonic() - self._generated if self._body is not None else None
+
+    def response(self) -> Response:
+        if self._body is None:
+            return JSONResponse(
+                status_code=503,
+                content={"success": False, "data": None, "message": f"{self.name.capitalize()} snapshot not built yet"}
+            )
+        age = self.age()
+        return Response(content=self._body, media_type="application/json", headers={
+            "Age": str(int(age)),
+            "X-Snapshot-Version": str(self.version),
+            "X-Snapshot-Generated-At": self.generated_at.isoformat(),
+            "X-Snapshot-Stale": "true" if age > self.max_age else "false",
+            "Cache-Control": "no-cache",
+        })
+
+    def stats(self) -> dict:
+        age = self.age()
+        return {
+            "version": self.version,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": age is None or age > self.max_age,
+            "failures": self.failures,
+            "bytes": len(self._body) if self._body is not None else 0,
+        }
+
+
+static_content = StaticContent()
+email_index = EmailIndex()
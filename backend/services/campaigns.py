@@ -0,0 +1,215 @@
+"""
+Reminder campaigns: balance-payment and pre-travel emails.
+
+Each campaign selects its recipients with a single query backed by a compound
+index ending in `id`, streams them from the storage backend in `id` order and
+sends them in bounded batches. After every batch the last processed `id` is
+written to `campaign_runs`, so a restarted worker resumes the same run where
+it stopped instead of emailing everyone again. Recipients whose delivery
+failed are kept in the run's `failed_ids` rather than passed over with the
+checkpoint, and retried once the stream is exhausted (or when the run is
+resumed).
+
+Every worker runs the scheduler, so each run is claimed with a lease
+(`owner`, `lease_until`) renewed at every checkpoint: one worker sends it,
+and another takes over only after the lease of a crashed owner expires.
+Runs resumed at startup are spawned on the scheduler, which cancels them on
+shutdown.
+"""
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from repositories.base import DuplicateKeyError, Repository
+from routes.static_data import BALANCE_PAYMENT_DUE_DATE, EVENT_START_DATE
+from services.mailer import mail_engine
+from services.scheduler import scheduler
+from storage import current_storage
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_BATCH_SIZE = int(os.environ.get('CAMPAIGN_BATCH_SIZE', '200'))
+CAMPAIGN_LEASE = timedelta(seconds=float(os.environ.get('CAMPAIGN_LEASE_SECONDS', '300')))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+RECIPIENT_FIELDS = ["id", "email", "fullName", "paymentStatus"]
+
+
+@dataclass
+class Campaign:
+    name: str
+    template: str
+    cron: str
+    query: dict
+    # Inclusive window of days in which scheduled runs actually send
+    active_from: date
+    active_until: date
+
+    def is_active(self, day: date) -> bool:
+        return self.active_from <= day <= self.active_until
+
+    def context(self, recipient: dict) -> dict:
+        return {
+            "fullName": recipient.get("fullName", "Delegate"),
+            "registration_id": recipient["id"],
+            "paymentStatus": recipient.get("paymentStatus", ""),
+            "due_date": BALANCE_PAYMENT_DUE_DATE,
+            "event_start": EVENT_START_DATE,
+        }
+
+
+_balance_due = date.fromisoformat(BALANCE_PAYMENT_DUE_DATE)
+_event_start = date.fromisoformat(EVENT_START_DATE)
+
+CAMPAIGNS = {
+    campaign.name: campaign
+    for campaign in [
+        Campaign(
+            name="balance_payment_reminder",
+            template="balance_due",
+            cron="0 9 * * 1,4",
+            query={
+                "paymentStatus": {"$in": ["unpaid", "advance_paid"]},
+                "registrationStatus": {"$ne": "cancelled"},
+            },
+            active_from=_balance_due - timedelta(days=21),
+            active_until=_balance_due,
+        ),
+        Campaign(
+            name="pre_travel_reminder",
+            template="pre_travel_reminder",
+            cron="0 9 * * *",
+            query={"registrationStatus": "confirmed"},
+            active_from=_event_start - timedelta(days=7),
+            active_until=_event_start - timedelta(days=1),
+        ),
+    ]
+}
+
+
+async def _claim(runs: Repository, run_id: str, campaign: Campaign, scheduled: datetime) -> Optional[dict]:
+    """Take the run's lease; None if another worker holds a live one"""
+    now = datetime.utcnow()
+    lease = {"status": "running", "owner": WORKER_ID, "lease_until": now + CAMPAIGN_LEASE}
+    checkpoint = await runs.find_one({"id": run_id})
+    if checkpoint is None:
+        checkpoint = {
+            "id": run_id, "campaign": campaign.name, "run_date": scheduled.date().isoformat(),
+            "started": now, **lease
+        }
+        try:
+            await runs.insert(checkpoint)
+        except DuplicateKeyError:
+            # Created by another worker in the meantime; it owns the run
+            return None
+        return checkpoint
+    if checkpoint.get("owner") not in (None, WORKER_ID) and checkpoint["lease_until"] >= now:
+        return None
+    # Conditional on the lease we read, so of two workers taking over an expired lease only one wins
+    owner = {"id": run_id, "owner": checkpoint.get("owner"), "lease_until": checkpoint.get("lease_until")}
+    if not await runs.update_one(owner, lease):
+        return None
+    return {**checkpoint, **lease}
+
+
+async def run_campaign(campaign: Campaign, scheduled: datetime, force: bool = False) -> Optional[dict]:
+    """Send one run of a campaign, resuming from its checkpoint if one exists"""
+    if not mail_engine.running:
+        logger.warning(f"Campaign {campaign.name} skipped: mail engine is not configured")
+        return None
+    if not force and not campaign.is_active(scheduled.date()):
+        return None
+
+    storage = current_storage()
+    runs = storage.campaign_runs
+    run_id = f"{campaign.name}:{scheduled.date().isoformat()}"
+    checkpoint = await runs.find_one({"id": run_id}) or {}
+    if checkpoint.get("status") == "completed":
+        return checkpoint
+
+    checkpoint = await _claim(runs, run_id, campaign, scheduled)
+    if checkpoint is None:
+        logger.info(f"Campaign {run_id} skipped: being sent by another worker")
+        return None
+
+    last_id = checkpoint.get("last_id")
+    sent = checkpoint.get("sent", 0)
+    failed_ids = set(checkpoint.get("failed_ids", []))
+    if last_id:
+        logger.info(f"Resuming campaign {run_id} after registration {last_id}")
+
+    async def flush(batch: list, advance: bool = True) -> bool:
+        """Send a batch and checkpoint it; False if this worker no longer owns the run"""
+        nonlocal sent, last_id
+        results = await asyncio.gather(*(
+            mail_engine.deliver(campaign.template, recipient["email"], campaign.context(recipient))
+            for recipient in batch
+        ))
+        for recipient, delivered in zip(batch, results):
+            if delivered:
+                sent += 1
+                failed_ids.discard(recipient["id"])
+            else:
+                failed_ids.add(recipient["id"])
+        if advance:
+            last_id = batch[-1]["id"]
+        owned = {"id": run_id, "owner": WORKER_ID}
+        modified = await runs.update_one(owned, {
+            "last_id": last_id, "sent": sent, "failed": len(failed_ids), "failed_ids": sorted(failed_ids),
+            "updated": datetime.utcnow(), "lease_until": datetime.utcnow() + CAMPAIGN_LEASE
+        })
+        # Nothing modified can also mean an identical checkpoint, so only a missing owner is a lost lease
+        return bool(modified) or await runs.count(owned) > 0
+
+    async def send(query: dict, advance: bool) -> bool:
+        batch = []
+        recipients = storage.registrations.stream(
+            query, sort=("id", 1), fields=RECIPIENT_FIELDS, batch_size=CAMPAIGN_BATCH_SIZE
+        )
+        async for recipient in recipients:
+            batch.append(recipient)
+            if len(batch) >= CAMPAIGN_BATCH_SIZE:
+                if not await flush(batch, advance):
+                    return False
+                batch = []
+        return not batch or await flush(batch, advance)
+
+    query = dict(campaign.query)
+    if last_id:
+        query["id"] = {"$gt": last_id}
+    owned = await send(query, advance=True)
+    if owned and failed_ids:
+        # Still filtered by the campaign, so a delegate who paid in the meantime is left out
+        logger.info(f"Campaign {run_id}: retrying {len(failed_ids)} failed deliveries")
+        owned = await send({**campaign.query, "id": {"$in": sorted(failed_ids)}}, advance=False)
+    if not owned:
+        logger.warning(f"Campaign {run_id} stopped: its lease was taken over by another worker")
+        return None
+
+    failed = len(failed_ids)
+    summary = {"status": "completed", "sent": sent, "failed": failed, "finished": datetime.utcnow()}
+    await runs.update_one({"id": run_id}, summary)
+    logger.info(f"Campaign {run_id} completed: {sent} sent, {failed} failed")
+    return {"id": run_id, **summary}
+
+
+async def resume_interrupted_runs():
+    """Finish any run that a previous process left in the running state"""
+    for run in await current_storage().campaign_runs.find({"status": "running"}):
+        campaign = CAMPAIGNS.get(run.get("campaign"))
+        if campaign:
+            scheduled = datetime.fromisoformat(run["run_date"])
+            scheduler.spawn(f"resume-{run['id']}", run_campaign(campaign, scheduled, force=True))
+
+
+def register_campaigns():
+    """Attach every campaign to the shared scheduler"""
+    for campaign in CAMPAIGNS.values():
+        scheduler.add_job(
+            campaign.name,
+            campaign.cron,
+            lambda scheduled, campaign=campaign: run_campaign(campaign, scheduled)
+        )
@@ -0,0 +1,52 @@
+"""
+Delegate capacity shared by every worker.
+
+The limit used to be checked with a count followed by an insert, which lets
+concurrent requests (in one worker or across several) all see a free slot
+and overbook. Instead, active registrations are tracked in one document of
+the `counters` collection and a slot is taken with a single conditional
+`$inc` (`value < limit`), which MongoDB applies atomically. Creating a
+registration reserves a slot first and gives it back if the insert fails;
+cancelling releases it and re-activating reserves it again.
+
+The counter is created from the current number of active registrations the
+first time it is needed.
+"""
+from repositories.base import DuplicateKeyError, Repository
+
+ACTIVE_FILTER = {"registrationStatus": {"$ne": "cancelled"}}
+
+
+class Capacity:
+    def __init__(self, key: str, limit: int):
+        self.key = key
+        self.limit = limit
+
+    async def ensure(self, counters: Repository, registrations: Repository):
+        """Create the counter from the current active count if it does not exist yet"""
+        if await counters.find_one({"id": self.key}) is None:
+            active = await registrations.count(ACTIVE_FILTER)
+            try:
+                await counters.insert({"id": self.key, "value": active})
+            except DuplicateKeyError:
+                # Another worker created it first
+                pass
+
+    async def reserve(self, counters: Repository, registrations: Repository) -> bool:
+        """Take a slot; False when the limit is reached"""
+        taken = await counters.increment({"id": self.key, "value": {"$lt": self.limit}}, "value", 1)
+        if taken is None and await counters.find_one({"id": self.key}) is None:
+            await self.ensure(counters, registrations)
+            taken = await counters.increment({"id": self.key, "value": {"$lt": self.limit}}, "value", 1)
+        return taken is not None
+
+    async def active(self, counters: Repository, registrations: Repository) -> int:
+        """Slots currently taken, across all workers"""
+        counter = await counters.find_one({"id": self.key})
+        if counter is None:
+            await self.ensure(counters, registrations)
+            counter = await counters.find_one({"id": self.key})
+        return counter["value"]
+
+    async def release(self, counters: Repository):
+        await counters.increment({"id": self.key, "value": {"$gt": 0}}, "value", -1)
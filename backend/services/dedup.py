@@ -0,0 +1,233 @@
+"""
+Duplicate-delegate detection with normalized blocking keys.
+
+The unique email index misses the same doctor registering under a clinic and
+a personal address, or typing the passport number with different spacing.
+Every registration therefore stores normalized keys in `dedupKeys` (one
+multikey index, see indexes.py):
+
+- passport:<number>: letters and digits only, upper case
+- phone:<last 10 digits>: the mobile number without country code or punctuation
+- name:<phonetic>:<date of birth>: Soundex of every name part (titles
+  dropped, in sorted order) plus the date of birth
+
+Registrations sharing a key are candidates, and `classify` decides what the
+shared kinds of key mean: the same passport, or the same phone and name+DOB,
+is the same delegate; a shared phone or name+DOB alone (colleagues at one
+clinic, namesakes) is only a possible duplicate for an admin to review.
+
+On create, one indexed query per new key finds the candidates
+(`find_candidates`). Over a whole collection, `scan` blocks on the keys with
+pandas: one (id, key) row per key, a self-join within each key, and the
+shared kinds summed per pair, so only registrations in the same bucket are
+ever compared and the cost grows with the number of registrations rather
+than with pairs of them (tools/dedup_scan.py). Both skip a key shared by more
+than DEDUP_MAX_BLOCK registrations. Documents written before the keys
+existed get them from the registrations v2 migration (migrations.py).
+"""
+import asyncio
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from repositories.base import Repository
+
+DEDUP_MAX_CANDIDATES = int(os.environ.get('DEDUP_MAX_CANDIDATES', '20'))
+# A key shared by more registrations than this (a clinic switchboard number) says nothing about identity
+DEDUP_MAX_BLOCK = int(os.environ.get('DEDUP_MAX_BLOCK', '50'))
+
+DEDUP_FIELDS = ("passportNumber", "mobile", "fullName", "dateOfBirth")
+DUPLICATE = "duplicate"
+POSSIBLE = "possible"
+
+TITLES = {"dr", "prof", "mr", "mrs", "ms", "miss", "md"}
+_SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in {"1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r"}.items()
+    for letter in letters
+}
+
+
+def soundex(word: str) -> str:
+    """American Soundex of an ASCII word ("Sharma" and "Sarma" are both S650)"""
+    word = "".join(letter for letter in word.lower() if "a" <= letter <= "z")
+    if not word:
+        return ""
+    code = word[0].upper()
+    previous = _SOUNDEX_CODES.get(word[0], "")
+    for letter in word[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+        if letter not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def _birth_date(value) -> Optional[str]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        # Stored dates are naive UTC; an aware value must land on the same day
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return None
+
+
+def passport_key(value: Optional[str]) -> Optional[str]:
+    number = re.sub(r"[^A-Z0-9]", "", (value or "").upper())
+    return f"passport:{number}" if len(number) >= 6 else None
+
+
+def phone_key(value: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", value or "")
+    return f"phone:{digits[-10:]}" if len(digits) >= 10 else None
+
+
+def name_key(full_name: Optional[str], date_of_birth) -> Optional[str]:
+    birth_date = _birth_date(date_of_birth)
+    ascii_name = unicodedata.normalize("NFKD", full_name or "").encode("ascii", "ignore").decode().lower()
+    parts = [part for part in re.split(r"[^a-z]+", ascii_name) if part and part not in TITLES]
+    if not parts or birth_date is None:
+        return None
+    return f"name:{'-'.join(sorted(soundex(part) for part in parts))}:{birth_date}"
+
+
+def dedup_keys(document: dict) -> List[str]:
+    """The blocking keys of a registration document"""
+    keys = (
+        passport_key(document.get("passportNumber")),
+        phone_key(document.get("mobile")),
+        name_key(document.get("fullName"), document.get("dateOfBirth")),
+    )
+    return [key for key in keys if key is not None]
+
+
+def _kind(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+KINDS = ("passport", "phone", "name")
+# One bit per kind, so the kinds a pair shares add up to a mask (scan)
+_KIND_BITS = {kind: 1 << index for index, kind in enumerate(KINDS)}
+
+
+def _kinds(mask: int) -> Set[str]:
+    return {kind for kind, bit in _KIND_BITS.items() if mask & bit}
+
+
+def classify(kinds: Set[str]) -> Optional[str]:
+    """What sharing these kinds of key means: DUPLICATE, POSSIBLE or nothing"""
+    if "passport" in kinds or {"phone", "name"} <= kinds:
+        return DUPLICATE
+    return POSSIBLE if kinds else None
+
+
+@dataclass
+class Match:
+    id: str
+    verdict: str
+    kinds: Set[str]
+
+
+async def find_candidates(registrations: Repository, keys: List[str], exclude_id: Optional[str] = None) -> List[Match]:
+    """Active registrations sharing a key with `keys`, strongest first
+
+    Each key is looked up on its own, so colleagues filling a shared phone
+    number's results cannot push a passport match out of them; a key shared
+    by more than DEDUP_MAX_BLOCK registrations is ignored, as in `scan`.
+    """
+    if not keys:
+        return []
+    blocks = await asyncio.gather(*(
+        registrations.find(
+            {"dedupKeys": key, "registrationStatus": {"$ne": "cancelled"}},
+            limit=DEDUP_MAX_BLOCK + 1,
+            fields=["id"]
+        )
+        for key in keys
+    ))
+    shared: Dict[str, Set[str]] = defaultdict(set)
+    for key, block in zip(keys, blocks):
+        if len(block) > DEDUP_MAX_BLOCK:
+            continue
+        for candidate in block:
+            if candidate["id"] != exclude_id:
+                shared[candidate["id"]].add(_kind(key))
+    matches = [Match(id, classify(kinds), kinds) for id, kinds in shared.items()]
+    matches.sort(key=lambda match: match.verdict != DUPLICATE)
+    return matches[:DEDUP_MAX_CANDIDATES]
+
+
+@dataclass
+class ScanResult:
+    scanned: int = 0
+    # Registrations that are the same delegate, each group sorted
+    groups: List[List[str]] = field(default_factory=list)
+    # (id, id, shared kinds) for pairs that only possibly are
+    possible: List[Tuple[str, str, List[str]]] = field(default_factory=list)
+    # (key kind, registrations sharing it) for keys shared by more than max_block
+    oversized: List[Tuple[str, int]] = field(default_factory=list)
+
+
+def scan(documents: Iterable[dict], max_block: int = DEDUP_MAX_BLOCK) -> ScanResult:
+    """Duplicate groups and possible pairs among `documents` (each needs `id` plus
+    `dedupKeys` or the fields they are computed from)"""
+    # Only the batch tool scans, so the API workers do not pay for importing pandas
+    import pandas as pd
+
+    result = ScanResult()
+    ids: List[str] = []
+    keys: List[str] = []
+    bits: List[int] = []
+    for document in documents:
+        result.scanned += 1
+        document_keys = document["dedupKeys"] if "dedupKeys" in document else dedup_keys(document)
+        ids.extend([document["id"]] * len(document_keys))
+        keys.extend(document_keys)
+        bits.extend(_KIND_BITS[_kind(key)] for key in document_keys)
+
+    rows = pd.DataFrame({"id": ids, "key": keys, "bit": bits}).drop_duplicates()
+    sizes = rows.groupby("key")["id"].transform("size")
+    for key, size in rows.loc[sizes > max_block, "key"].value_counts().items():
+        result.oversized.append((_kind(key), int(size)))
+    rows = rows[(sizes >= 2) & (sizes <= max_block)]
+
+    # Every pair within a block once, with the kinds it shares as a bit mask
+    pairs = rows.merge(rows, on=["key", "bit"], suffixes=("_a", "_b"))
+    pairs = pairs[pairs["id_a"] < pairs["id_b"]]
+    masks = pairs.groupby(["id_a", "id_b"], sort=False)["bit"].sum()
+    verdicts = masks.map({mask: classify(_kinds(mask)) for mask in masks.unique()})
+    duplicates = verdicts[verdicts == DUPLICATE].index
+    possible = masks[verdicts == POSSIBLE]
+
+    # Union-find over the definite pairs, so A=B and B=C is one group
+    parent: Dict[str, str] = {}
+
+    def root(node: str) -> str:
+        while parent.get(node, node) != node:
+            parent[node] = parent.get(parent[node], parent[node])
+            node = parent[node]
+        return node
+
+    for first, second in duplicates:
+        parent[root(second)] = root(first)
+    for (first, second), mask in possible.items():
+        if root(first) != root(second):
+            result.possible.append((first, second, sorted(_kinds(int(mask)))))
+    groups: Dict[str, Set[str]] = defaultdict(set)
+    for node in parent:
+        top = root(node)
+        groups[top].update((node, top))
+    result.groups = sorted(sorted(members) for members in groups.values())
+    return result
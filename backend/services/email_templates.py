@@ -0,0 +1,95 @@
+from string import Template
+
+# Raw template sources, keyed by template name. Placeholders use
+# string.Template syntax ($name / ${name}) so rendering never evaluates code.
+TEMPLATE_SOURCES = {
+    "registration_confirmation": {
+        "subject": "KICON 2025 - Registration received (${registration_id})",
+        "body": """Dear ${fullName},
+
+Thank you for registering for KICON: Shine & Smile 2025, the Indo-Korean Medical Convention
+in Incheon, South Korea (November 24-26, 2025).
+
+Registration ID: ${registration_id}
+Specialty: ${specialty}
+
+To confirm your seat, please complete the advance payment of USD 1,500 and send the
+payment proof quoting your Registration ID. Bank details are available at
+/api/payments/bank-details.
+
+Warm regards,
+KICON 2025 Organizing Team
+""",
+    },
+    "payment_verified": {
+        "subject": "KICON 2025 - Payment verified (${registration_id})",
+        "body": """Dear ${fullName},
+
+We have verified your payment for KICON 2025.
+
+Registration ID: ${registration_id}
+Transaction ID: ${transaction_id}
+Payment status: ${payment_status}
+
+We look forward to welcoming you in Incheon.
+
+Warm regards,
+KICON 2025 Organizing Team
+""",
+    },
+    "balance_due": {
+        "subject": "KICON 2025 - Balance payment due by ${due_date}",
+        "body": """Dear ${fullName},
+
+Our records show the balance payment for your KICON 2025 package is still outstanding.
+
+Registration ID: ${registration_id}
+Current payment status: ${paymentStatus}
+Balance due date: ${due_date}
+
+Please transfer the balance and share the payment proof quoting your Registration ID.
+
+Warm regards,
+KICON 2025 Organizing Team
+""",
+    },
+    "pre_travel_reminder": {
+        "subject": "KICON 2025 - Travel checklist for Incheon (${event_start})",
+        "body": """Dear ${fullName},
+
+KICON: Shine & Smile 2025 starts on ${event_start}. Before you travel, please make sure you have:
+
+- Your passport (valid for at least 6 months after the event)
+- Your Korean visa approval
+- Your Registration ID: ${registration_id}
+
+Airport transfers, accommodation and meals are included in your package. Reach our team
+on the contacts listed at /api/static/contact-info if anything changes.
+
+Safe travels,
+KICON 2025 Organizing Team
+""",
+    },
+}
+
+
+class EmailTemplate:
+    """A subject/body template pair compiled once and rendered per message"""
+
+    def __init__(self, name: str, subject: str, body: str):
+        self.name = name
+        self.subject = Template(subject)
+        self.body = Template(body)
+
+    def render(self, context: dict) -> tuple:
+        """Render (subject, body); unknown placeholders are left untouched"""
+        return self.subject.safe_substitute(context), self.body.safe_substitute(context)
+
+
+def compile_templates(sources: dict = None) -> dict:
+    """Compile every template source into an EmailTemplate"""
+    sources = sources or TEMPLATE_SOURCES
+    return {
+        name: EmailTemplate(name, source["subject"], source["body"])
+        for name, source in sources.items()
+    }
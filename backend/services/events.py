@@ -0,0 +1,51 @@
+"""
+In-process notifications of writes made through this worker.
+
+Handlers publish an Event after a write went through; whatever keeps derived
+state (the admin dashboard snapshot, ...) subscribes instead of every handler
+knowing about every consumer. Subscribers are plain callables run inside
+`publish()`, so they must only record or schedule work, never block; an
+exception in one is logged and does not reach the handler or the others.
+
+Only writes made through this worker are seen. Consumers that must also
+reflect other workers' writes refresh on a timer as well.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Event:
+    entity: str  # registration | payment | contact
+    action: str  # created | updated | cancelled
+    id: str
+    # The document as stored after the write, when the handler has it
+    document: Optional[dict] = None
+    # For updates: the document as read before the write
+    before: Optional[dict] = None
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers: List[Callable[[Event], None]] = []
+
+    def subscribe(self, callback: Callable[[Event], None]):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Event], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, event: Event):
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Event subscriber failed on {event.entity} {event.action}: {type(e).__name__}: {str(e)}")
+
+
+events = EventBus()
@@ -0,0 +1,197 @@
+"""
+Live feed of registration, payment and inquiry changes for the admin UI.
+
+Every change becomes one compact delta, serialized once and sent to every
+admin connected to /api/admin/live:
+
+    {"type": "delta", "seq": 42, "entity": "payment", "action": "status_changed",
+     "id": "...", "at": "...", "changes": {"payment_status": "completed", ...}}
+
+- created: `data` holds the fields the admin lists show
+- updated / status_changed: `changes` holds only the fields whose value
+  changed; status_changed when one of them is a status field
+
+`seq` grows by one per delta. A client that reconnects or sees a gap reloads
+its lists (e.g. from /api/admin/dashboard) and applies deltas from there.
+
+Deltas come from the write handlers through services/events.py, so an admin
+only sees writes made through the worker it is connected to. With
+ADMIN_LIVE_SOURCE=change_stream (MongoDB replica set required) every worker
+watches one change stream on the three collections instead and sees every
+write, whichever worker made it.
+
+Every connection has its own send queue of ADMIN_LIVE_QUEUE_SIZE deltas and
+fan-out never waits on a socket: a connection whose queue is full cannot keep
+up, and it is closed with 1013 (try again later) rather than buffering
+without bound or holding back the others.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from monitoring.metrics import gauge_lines
+from services.events import Event
+
+logger = logging.getLogger(__name__)
+
+ADMIN_LIVE_QUEUE_SIZE = int(os.environ.get('ADMIN_LIVE_QUEUE_SIZE', '256'))
+ADMIN_LIVE_MAX_CONNECTIONS = int(os.environ.get('ADMIN_LIVE_MAX_CONNECTIONS', '100'))
+
+COLLECTION_ENTITIES = {"registrations": "registration", "payments": "payment", "contacts": "contact"}
+# What the admin lists show for a new item
+SUMMARY_FIELDS: Dict[str, List[str]] = {
+    "registration": ["id", "fullName", "email", "specialty", "registrationStatus", "paymentStatus", "registrationDate"],
+    "payment": ["id", "registration_id", "payment_status", "transaction_id", "total_inr_amount", "created_date"],
+    "contact": ["id", "name", "email", "subject", "inquiryType", "status", "createdDate"],
+}
+STATUS_FIELDS = {"registrationStatus", "paymentStatus", "payment_status", "status"}
+# Bumped on every write (or by a schema upgrade, see migrations.py), so never a change worth sending
+IGNORED_FIELDS = {"_id", "lastUpdated", "last_updated", "schemaVersion", "dedupKeys"}
+
+CLOSE_TOO_SLOW = 1013
+CLOSE_GOING_AWAY = 1001
+
+
+def build_delta(entity: str, action: str, entity_id: str, document: Optional[dict],
+                changes: Optional[dict]) -> Optional[dict]:
+    """The delta for one change; None when nothing an admin sees changed"""
+    delta = {"type": "delta", "entity": entity, "id": entity_id, "at": datetime.utcnow()}
+    if action == "created":
+        document = document or {}
+        delta["action"] = "created"
+        delta["data"] = {field: document.get(field) for field in SUMMARY_FIELDS[entity]}
+        return delta
+    changes = {field: value for field, value in (changes or {}).items() if field not in IGNORED_FIELDS}
+    if not changes:
+        return None
+    delta["action"] = "status_changed" if STATUS_FIELDS.intersection(changes) else "updated"
+    delta["changes"] = changes
+    return delta
+
+
+class LiveConnection:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = asyncio.Event()
+        self.close_code = CLOSE_GOING_AWAY
+
+    def close(self, code: int):
+        if not self.closed.is_set():
+            self.close_code = code
+            self.closed.set()
+
+
+class LiveFeed:
+    def __init__(self, queue_size: int, max_connections: int):
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self.connections: Set[LiveConnection] = set()
+        self.seq = 0
+        self.dropped = 0
+        self.source = "events"
+        self._task: Optional[asyncio.Task] = None
+
+    def connect(self) -> Optional[LiveConnection]:
+        """A new connection, or None when max_connections are open"""
+        if len(self.connections) >= self.max_connections:
+            return None
+        connection = LiveConnection(self.queue_size)
+        self.connections.add(connection)
+        return connection
+
+    def disconnect(self, connection: LiveConnection):
+        self.connections.discard(connection)
+
+    def broadcast(self, delta: dict):
+        self.seq += 1
+        message = json.dumps(jsonable_encoder({**delta, "seq": self.seq}), separators=(",", ":"))
+        for connection in self.connections:
+            if connection.closed.is_set():
+                continue
+            try:
+                connection.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.warning(f"Admin live connection fell {self.queue_size} deltas behind, closing it")
+                connection.close(CLOSE_TOO_SLOW)
+
+    def on_event(self, event: Event):
+        """Event subscriber (the default source)"""
+        changes = None
+        if event.action != "created" and event.document is not None:
+            before = event.before or {}
+            changes = {field: value for field, value in event.document.items() if before.get(field) != value}
+        delta = build_delta(event.entity, event.action, event.id, event.document, changes)
+        if delta is not None:
+            self.broadcast(delta)
+
+    def watch(self, database):
+        """Source deltas from a MongoDB change stream instead of this worker's events"""
+        self.source = "change_stream"
+        self._task = asyncio.create_task(self._watch(database), name="admin-live-change-stream")
+
+    def _on_change(self, change: dict):
+        entity = COLLECTION_ENTITIES.get(change["ns"]["coll"])
+        document = change.get("fullDocument") or {}
+        if entity is None or document.get("id") is None:
+            # Deleted before the lookup, or not one of ours
+            return
+        if change["operationType"] == "insert":
+            delta = build_delta(entity, "created", document["id"], document, None)
+        elif change["operationType"] == "update":
+            delta = build_delta(entity, "updated", document["id"], document,
+                                change["updateDescription"]["updatedFields"])
+        else:
+            delta = build_delta(entity, "updated", document["id"], document,
+                                {field: document.get(field) for field in SUMMARY_FIELDS[entity]})
+        if delta is not None:
+            self.broadcast(delta)
+
+    async def _watch(self, database):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(COLLECTION_ENTITIES)},
+            "operationType": {"$in": ["insert", "update", "replace"]},
+        }}]
+        resume_token = None
+        while True:
+            try:
+                async with database.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                    logger.info("Admin live feed watching the change stream")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self._on_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Admin live change stream failed: {type(e).__name__}: {str(e)}")
+                if getattr(e, "code", None) == 286:
+                    # ChangeStreamHistoryLost: the token is gone from the oplog; continue from now
+                    resume_token = None
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """Stop watching and close every connection"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for connection in self.connections:
+            connection.close(CLOSE_GOING_AWAY)
+
+    def collect(self):
+        """Metrics collector: open admin live connections and slow consumers dropped"""
+        yield from gauge_lines("kicon_admin_live_connections", "Open admin live feed connections", (),
+                               [(len(self.connections),)])
+        yield from gauge_lines("kicon_admin_live_dropped", "Admin live feed connections closed for falling behind", (),
+                               [(self.dropped,)])
+
+    def stats(self) -> dict:
+        return {"source": self.source, "connections": len(self.connections), "seq": self.seq, "dropped": self.dropped}
+
+
+live_feed = LiveFeed(queue_size=ADMIN_LIVE_QUEUE_SIZE, max_connections=ADMIN_LIVE_MAX_CONNECTIONS)
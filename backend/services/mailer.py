@@ -0,0 +1,345 @@
+"""
+Pooled, batched SMTP delivery engine.
+
+Each provider owns a fixed number of worker tasks and every worker keeps one
+persistent SMTP connection open, so the pool size is also the provider's
+concurrency cap. Workers drain the provider queue in batches, reuse their
+connection for the whole batch and pace themselves with a shared token bucket
+so provider rate limits are respected.
+"""
+import asyncio
+import logging
+import os
+import smtplib
+import ssl
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+
+from monitoring.metrics import gauge_lines
+from services.email_templates import compile_templates
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SMTPProvider:
+    name: str
+    host: str
+    port: int = 587
+    username: Optional[str] = None
+    password: Optional[str] = None
+    use_tls: bool = True
+    sender: str = "KICON 2025 <noreply@kicon2025.com>"
+    max_connections: int = 4
+    rate_per_second: float = 10.0
+    batch_size: int = 20
+    timeout: float = 30.0
+    idle_timeout: float = 60.0
+    max_attempts: int = 3
+
+
+@dataclass
+class OutgoingMail:
+    to: str
+    subject: str
+    body: str
+    template: str = ""
+    attempts: int = 0
+    # Resolved with True/False once delivered or given up on (deliver() only)
+    result: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    def resolve(self, delivered: bool):
+        if self.result is not None and not self.result.done():
+            self.result.set_result(delivered)
+
+
+class RateLimiter:
+    """Async token bucket shared by all workers of one provider
+
+    `capacity` is the largest burst; a worker takes a whole batch's tokens at
+    once, so it must be at least the provider's batch size.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 1):
+        if self.rate <= 0:
+            return
+        if tokens > self.capacity:
+            # The bucket never holds that many tokens: waiting would never end
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of {self.capacity:g}")
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class SMTPConnection:
+    """A single persistent SMTP session, used from a worker thread"""
+
+    def __init__(self, provider: SMTPProvider):
+        self.provider = provider
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        provider = self.provider
+        smtp = smtplib.SMTP(provider.host, provider.port, timeout=provider.timeout)
+        if provider.use_tls:
+            smtp.starttls(context=ssl.create_default_context())
+        if provider.username:
+            smtp.login(provider.username, provider.password or "")
+        self._smtp = smtp
+
+    def _ensure_connected(self):
+        if self._smtp is None:
+            self._connect()
+        elif time.monotonic() - self._last_used > self.provider.idle_timeout:
+            # Providers silently drop idle sessions; probe before reusing
+            try:
+                self._smtp.noop()
+            except smtplib.SMTPException:
+                self.close()
+                self._connect()
+
+    def send_batch(self, batch: List[OutgoingMail]) -> List[OutgoingMail]:
+        """Send every message over this connection; return the ones that failed"""
+        failed = []
+        for mail in batch:
+            message = EmailMessage()
+            message["From"] = self.provider.sender
+            message["To"] = mail.to
+            message["Subject"] = mail.subject
+            message.set_content(mail.body)
+            try:
+                self._ensure_connected()
+                self._smtp.send_message(message)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # Connection went away mid-batch: reconnect once and retry
+                self.close()
+                try:
+                    self._connect()
+                    self._smtp.send_message(message)
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.warning(f"SMTP send to {mail.to} failed after reconnect: {str(e)}")
+                    failed.append(mail)
+            except smtplib.SMTPException as e:
+                logger.warning(f"SMTP send to {mail.to} failed: {str(e)}")
+                failed.append(mail)
+            self._last_used = time.monotonic()
+        return failed
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class ProviderPool:
+    """Queue, rate limiter and connection-owning workers for one provider"""
+
+    def __init__(self, provider: SMTPProvider, queue_size: int):
+        self.provider = provider
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.limiter = RateLimiter(provider.rate_per_second,
+                                   capacity=max(provider.rate_per_second, provider.batch_size, 1.0))
+        self.sent = 0
+        self.failed = 0
+        self._workers: List[asyncio.Task] = []
+        self._connections: List[SMTPConnection] = []
+
+    def start(self):
+        for index in range(self.provider.max_connections):
+            connection = SMTPConnection(self.provider)
+            self._connections.append(connection)
+            self._workers.append(asyncio.create_task(
+                self._worker(connection),
+                name=f"smtp-{self.provider.name}-{index}"
+            ))
+
+    async def _next_batch(self) -> List[OutgoingMail]:
+        batch = [await self.queue.get()]
+        while len(batch) < self.provider.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _worker(self, connection: SMTPConnection):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.limiter.acquire(len(batch))
+                failed = await asyncio.to_thread(connection.send_batch, batch)
+                self.sent += len(batch) - len(failed)
+                failed_ids = {id(mail) for mail in failed}
+                for mail in batch:
+                    if id(mail) not in failed_ids:
+                        mail.resolve(True)
+                for mail in failed:
+                    mail.attempts += 1
+                    if mail.attempts < self.provider.max_attempts and not self.queue.full():
+                        self.queue.put_nowait(mail)
+                    else:
+                        self.failed += 1
+                        mail.resolve(False)
+                        logger.error(f"Giving up on {mail.template or 'email'} to {mail.to}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += len(batch)
+                for mail in batch:
+                    mail.resolve(False)
+                logger.error(f"SMTP worker error on provider {self.provider.name}: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        # Release anyone still awaiting deliver() on undelivered mail
+        while not self.queue.empty():
+            self.queue.get_nowait().resolve(False)
+            self.queue.task_done()
+        for connection in self._connections:
+            await asyncio.to_thread(connection.close)
+        self._connections.clear()
+
+
+class MailEngine:
+    """Front door for notification emails: render, route and enqueue"""
+
+    def __init__(self, providers: List[SMTPProvider], queue_size: int = 10000):
+        self.providers = {provider.name: provider for provider in providers}
+        self.default_provider = providers[0].name if providers else None
+        self.queue_size = queue_size
+        self.templates: Dict = {}
+        self._pools: Dict[str, ProviderPool] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.default_provider is not None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._pools)
+
+    @classmethod
+    def from_env(cls) -> "MailEngine":
+        """Build the engine from SMTP_* environment variables (disabled without SMTP_HOST)"""
+        host = os.environ.get('SMTP_HOST')
+        if not host:
+            return cls([])
+        provider = SMTPProvider(
+            name=os.environ.get('SMTP_PROVIDER', 'default'),
+            host=host,
+            port=int(os.environ.get('SMTP_PORT', '587')),
+            username=os.environ.get('SMTP_USERNAME'),
+            password=os.environ.get('SMTP_PASSWORD'),
+            use_tls=os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true',
+            sender=os.environ.get('SMTP_FROM', SMTPProvider.sender),
+            max_connections=int(os.environ.get('SMTP_MAX_CONNECTIONS', '4')),
+            rate_per_second=float(os.environ.get('SMTP_RATE_PER_SECOND', '10')),
+            batch_size=int(os.environ.get('SMTP_BATCH_SIZE', '20')),
+        )
+        return cls([provider], queue_size=int(os.environ.get('SMTP_QUEUE_SIZE', '10000')))
+
+    async def start(self):
+        """Compile templates and start one worker pool per provider"""
+        self.templates = compile_templates()
+        for name, provider in self.providers.items():
+            pool = ProviderPool(provider, self.queue_size)
+            pool.start()
+            self._pools[name] = pool
+        if self.enabled:
+            logger.info(f"Mail engine started with providers: {', '.join(self.providers)}")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Give queued mail a chance to go out, then close every connection"""
+        if not self._pools:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Mail engine stopped with undelivered messages in the queue")
+        for pool in self._pools.values():
+            await pool.stop()
+        self._pools.clear()
+
+    async def join(self):
+        """Wait until every queued message has been delivered or given up on"""
+        await asyncio.gather(*(pool.queue.join() for pool in self._pools.values()))
+
+    def _route(self, provider: Optional[str]) -> Optional[ProviderPool]:
+        pool = self._pools.get(provider or self.default_provider)
+        if pool is None and self.running:
+            logger.error(f"Unknown mail provider: {provider}")
+        return pool
+
+    def _render(self, template: str, to: str, context: dict) -> OutgoingMail:
+        subject, body = self.templates[template].render(context)
+        return OutgoingMail(to=to, subject=subject, body=body, template=template)
+
+    def send_template(self, template: str, to: str, context: dict, provider: Optional[str] = None) -> bool:
+        """Render a template and enqueue it without waiting; returns False if dropped"""
+        pool = self._route(provider)
+        if pool is None:
+            return False
+        try:
+            pool.queue.put_nowait(self._render(template, to, context))
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Mail queue full, dropping {template} to {to}")
+            return False
+
+    async def deliver(self, template: str, to: str, context: dict, provider: Optional[str] = None) -> bool:
+        """Enqueue with backpressure and wait until the message is actually delivered"""
+        pool = self._route(provider)
+        if pool is None:
+            return False
+        mail = self._render(template, to, context)
+        mail.result = asyncio.get_running_loop().create_future()
+        await pool.queue.put(mail)
+        return await mail.result
+
+    def collect(self):
+        """Metrics collector: queue depth and delivery counts per provider"""
+        stats = self.stats()
+        for state in ("queued", "sent", "failed"):
+            yield from gauge_lines(
+                f"kicon_mail_{state}", f"Mail engine messages {state} per provider",
+                ("provider",), [(name, values[state]) for name, values in stats.items()]
+            )
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "queued": pool.queue.qsize(),
+                "sent": pool.sent,
+                "failed": pool.failed,
+                "connections": pool.provider.max_connections,
+            }
+            for name, pool in self._pools.items()
+        }
+
+
+mail_engine = MailEngine.from_env()
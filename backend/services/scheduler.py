@@ -0,0 +1,182 @@
+"""
+Minimal in-process asyncio scheduler with cron-style jobs.
+
+Schedules use the classic five fields (minute hour day-of-month month
+day-of-week) with *, lists, ranges and steps. As in cron, when both day
+fields are restricted a day matches if either does ("0 9 1 * 1" is the 1st
+and every Monday). All times are UTC. Each job runs
+as its own task so a long campaign never delays other jobs, and a job is never
+started again while its previous run is still in progress.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# (min, max) for minute, hour, day-of-month, month, day-of-week (0 = Sunday)
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_field(expression: str, low: int, high: int) -> set:
+    values = set()
+    for part in expression.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = end = int(part)
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field '{expression}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Parsed five-field cron expression"""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            _parse_field(field, low, high) for field, (low, high) in zip(fields, _FIELD_RANGES)
+        ]
+        self._either_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        return day or weekday if self._either_day else day and weekday
+
+    def matches(self, moment: datetime) -> bool:
+        return (
+            moment.minute in self.minutes
+            and moment.hour in self.hours
+            and moment.month in self.months
+            and self._day_matches(moment)
+        )
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # A year of minutes is the longest a valid expression can need
+        for _ in range(366 * 24 * 60):
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute in self.minutes:
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+class ScheduledJob:
+    def __init__(self, name: str, schedule: CronSchedule, func: Callable[[datetime], Awaitable]):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.running: Optional[asyncio.Task] = None
+
+
+class Scheduler:
+    """Runs registered jobs on their cron schedules inside the event loop"""
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        # One-off tasks started through spawn(), cancelled with the scheduler
+        self._spawned: Set[asyncio.Task] = set()
+
+    def add_job(self, name: str, cron: str, func: Callable[[datetime], Awaitable]):
+        """Register `func(scheduled_time)` to run whenever `cron` matches"""
+        self.jobs[name] = ScheduledJob(name, CronSchedule(cron), func)
+
+    def start(self):
+        if self._task is None:
+            now = datetime.utcnow()
+            for job in self.jobs.values():
+                job.next_run = job.schedule.next_after(now)
+            self._task = asyncio.create_task(self._loop(), name="scheduler")
+            logger.info(f"Scheduler started with jobs: {', '.join(self.jobs) or 'none'}")
+
+    async def stop(self):
+        running = [job.running for job in self.jobs.values() if job.running] + list(self._spawned)
+        if self._task is not None:
+            running.append(self._task)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        self._task = None
+
+    def spawn(self, name: str, coroutine: Awaitable) -> asyncio.Task:
+        """Run a one-off coroutine (e.g. a resumed campaign) that stop() cancels and awaits"""
+        task = asyncio.create_task(self._run_once(name, coroutine), name=name)
+        self._spawned.add(task)
+        task.add_done_callback(self._spawned.discard)
+        return task
+
+    def run_now(self, name: str) -> asyncio.Task:
+        """Start a job immediately, outside its schedule"""
+        return self._launch(self.jobs[name], datetime.utcnow())
+
+    def _launch(self, job: ScheduledJob, scheduled: datetime) -> Optional[asyncio.Task]:
+        if job.running and not job.running.done():
+            logger.warning(f"Skipping job {job.name}: previous run still in progress")
+            return None
+        job.last_run = scheduled
+        job.running = asyncio.create_task(self._run(job, scheduled), name=f"job-{job.name}")
+        return job.running
+
+    async def _run(self, job: ScheduledJob, scheduled: datetime):
+        await self._run_once(job.name, job.func(scheduled))
+
+    async def _run_once(self, name: str, coroutine: Awaitable):
+        try:
+            await coroutine
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled job {name} failed: {str(e)}")
+
+    async def _loop(self):
+        while True:
+            now = datetime.utcnow()
+            due: List[ScheduledJob] = [job for job in self.jobs.values() if job.next_run <= now]
+            for job in due:
+                self._launch(job, job.next_run)
+                job.next_run = job.schedule.next_after(now)
+            upcoming = min((job.next_run for job in self.jobs.values()), default=None)
+            delay = (upcoming - datetime.utcnow()).total_seconds() if upcoming else 60
+            await asyncio.sleep(max(min(delay, 60), 0.5))
+
+    def status(self) -> list:
+        return [
+            {
+                "name": job.name,
+                "cron": job.schedule.expression,
+                "next_run": job.next_run.isoformat() if job.next_run else None,
+                "last_run": job.last_run.isoformat() if job.last_run else None,
+                "running": bool(job.running and not job.running.done()),
+            }
+            for job in self.jobs.values()
+        ]
+
+
+scheduler = Scheduler()
@@ -0,0 +1,118 @@
+"""
+Application settings, read once from the environment (and backend/.env).
+
+`create_app(settings)` installs the settings it is given with `use_settings`;
+modules that need configuration at runtime (database, storage) call
+`get_settings()` instead of reading os.environ at import, so importing the
+app never needs MONGO_URL and tests can build an app from explicit settings.
+
+backend/.env (or the file named by ENV_FILE) is loaded when this module is
+imported, without overriding variables already set. Module-level constants
+elsewhere (ADMIN_API_KEY, SMTP_*, TRACE_*, DASHBOARD_*) are read at import,
+so entry points import this module before any route or service module.
+"""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(os.environ.get('ENV_FILE') or ROOT_DIR / '.env')
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+@dataclass
+class Settings:
+    mongo_url: str = ""
+    db_name: str = ""
+    # mongo | memory (see storage.py)
+    storage_backend: str = "mongo"
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+    # memory (per process) | mongo (shared token buckets)
+    rate_limit_backend: str = "memory"
+    rate_limit_proxy_hops: int = 0
+    campaigns_enabled: bool = False
+    # events (writes through this worker) | change_stream (every write; MongoDB replica set), see services/live_feed.py
+    admin_live_source: str = "events"
+    # Worker processes serving the app (see serve.py)
+    workers: int = 1
+    # Connections all workers may open together; split evenly unless mongo_max_pool_size is set
+    mongo_pool_budget: Optional[int] = None
+    # Motor pool and timeouts; None keeps the value from MONGO_URL or the driver default
+    mongo_min_pool_size: Optional[int] = None
+    mongo_max_pool_size: Optional[int] = None
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_connect_timeout_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: Optional[int] = None
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    # How long startup may spend opening minPoolSize connections
+    mongo_warm_up_timeout_ms: int = 10000
+    # Ping timeout of each /api/health/ready check
+    health_ping_timeout_ms: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from environment variables (backend/.env included, see above)"""
+        return cls(
+            mongo_url=os.environ.get('MONGO_URL', ''),
+            db_name=os.environ.get('DB_NAME', ''),
+            storage_backend=os.environ.get('STORAGE_BACKEND', 'mongo'),
+            cors_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+            rate_limit_backend=os.environ.get('RATE_LIMIT_BACKEND', 'memory'),
+            rate_limit_proxy_hops=int(os.environ.get('RATE_LIMIT_PROXY_HOPS', '0')),
+            campaigns_enabled=os.environ.get('CAMPAIGNS_ENABLED', 'false').lower() == 'true',
+            admin_live_source=os.environ.get('ADMIN_LIVE_SOURCE', 'events'),
+            workers=int(os.environ.get('WEB_CONCURRENCY', '1')),
+            mongo_pool_budget=_optional_int('MONGO_POOL_BUDGET'),
+            mongo_min_pool_size=_optional_int('MONGO_MIN_POOL_SIZE'),
+            mongo_max_pool_size=_optional_int('MONGO_MAX_POOL_SIZE'),
+            mongo_max_idle_time_ms=_optional_int('MONGO_MAX_IDLE_TIME_MS'),
+            mongo_connect_timeout_ms=_optional_int('MONGO_CONNECT_TIMEOUT_MS'),
+            mongo_server_selection_timeout_ms=_optional_int('MONGO_SERVER_SELECTION_TIMEOUT_MS'),
+            mongo_socket_timeout_ms=_optional_int('MONGO_SOCKET_TIMEOUT_MS'),
+            mongo_wait_queue_timeout_ms=_optional_int('MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+            mongo_warm_up_timeout_ms=int(os.environ.get('MONGO_WARM_UP_TIMEOUT_MS', '10000')),
+            health_ping_timeout_ms=int(os.environ.get('HEALTH_PING_TIMEOUT_MS', '1000')),
+        )
+
+    def mongo_client_options(self) -> dict:
+        """Keyword arguments for the Motor client (only the ones that are set)"""
+        max_pool_size = self.mongo_max_pool_size
+        if max_pool_size is None and self.mongo_pool_budget:
+            max_pool_size = max(self.mongo_pool_budget // max(self.workers, 1), 1)
+        min_pool_size = self.mongo_min_pool_size
+        if min_pool_size is not None and max_pool_size is not None:
+            min_pool_size = min(min_pool_size, max_pool_size)
+        options = {
+            "minPoolSize": min_pool_size,
+            "maxPoolSize": max_pool_size,
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+        }
+        return {name: value for name, value in options.items() if value is not None}
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """The active settings (read from the environment on first use)"""
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
+
+
+def use_settings(settings: Settings):
+    global _settings
+    _settings = settings
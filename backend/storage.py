@@ -0,0 +1,146 @@
+"""
+Storage backend selection and FastAPI dependencies.
+
+Settings.storage_backend (STORAGE_BACKEND) picks the backend: "mongo" (the
+default) serves the routes from MongoDB through Motor; "memory" keeps
+everything in process, which lets the whole API run under TestClient or a
+benchmark with no database. Route handlers ask for the repositories they need:
+
+    async def handler(registrations: Repository = Depends(get_registrations)): ...
+
+and tests or benchmarks can swap the backend with `use_storage(MemoryStorage())`.
+
+Collections with schema migrations (migrations.py) are served through
+VersionedRepository, which upgrades old documents as they are read.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from fastapi import Depends
+
+from migrations import MIGRATIONS
+from repositories.base import Repository
+from repositories.memory import MemoryRepository
+from repositories.versioned import VersionedRepository
+from services.batch_writer import schema_upgrade_writer
+from settings import get_settings
+
+COLLECTIONS = ("registrations", "payments", "contacts", "status_checks", "counters", "campaign_runs")
+
+
+class Storage(ABC):
+    backend = ""
+
+    def __init__(self, repositories: dict):
+        repositories = {
+            name: VersionedRepository(repository, on_upgrade=schema_upgrade_writer.add) if name in MIGRATIONS else repository
+            for name, repository in repositories.items()
+        }
+        self.registrations: Repository = repositories["registrations"]
+        self.payments: Repository = repositories["payments"]
+        self.contacts: Repository = repositories["contacts"]
+        self.status_checks: Repository = repositories["status_checks"]
+        # Small documents updated atomically by every worker (e.g. delegate capacity)
+        self.counters: Repository = repositories["counters"]
+        # Checkpoints and leases of reminder campaign runs (services/campaigns.py)
+        self.campaign_runs: Repository = repositories["campaign_runs"]
+
+    async def prepare(self):
+        """Called once at startup before serving"""
+
+    @abstractmethod
+    def partition(self, name: str) -> Repository:
+        """Repository of a time-partitioned collection such as audit_log_2025_10"""
+
+    @abstractmethod
+    async def partitions(self, prefix: str) -> List[str]:
+        """Names of the existing partitions of `prefix`"""
+
+    async def prepare_partition(self, prefix: str, name: str):
+        """Called before the first write to a partition"""
+
+
+class MongoStorage(Storage):
+    backend = "mongo"
+
+    def __init__(self, database):
+        from repositories.mongo import MongoRepository
+        super().__init__({name: MongoRepository(database, name) for name in COLLECTIONS})
+        self.database = database
+
+    async def prepare(self):
+        from indexes import ensure_indexes
+        await ensure_indexes(self.database)
+
+    def partition(self, name: str) -> Repository:
+        from repositories.mongo import MongoRepository
+        return MongoRepository(self.database, name)
+
+    async def partitions(self, prefix: str) -> List[str]:
+        return await self.database.list_collection_names(filter={"name": {"$regex": f"^{prefix}_"}})
+
+    async def prepare_partition(self, prefix: str, name: str):
+        from indexes import ensure_partition_indexes
+        await ensure_partition_indexes(self.database, prefix, name)
+
+
+class MemoryStorage(Storage):
+    backend = "memory"
+
+    def __init__(self):
+        super().__init__({name: MemoryRepository(name) for name in COLLECTIONS})
+        self._partitions: Dict[str, MemoryRepository] = {}
+
+    def partition(self, name: str) -> Repository:
+        if name not in self._partitions:
+            self._partitions[name] = MemoryRepository(name)
+        return self._partitions[name]
+
+    async def partitions(self, prefix: str) -> List[str]:
+        return [name for name in self._partitions if name.startswith(f"{prefix}_")]
+
+
+_storage: Optional[Storage] = None
+
+
+def current_storage() -> Storage:
+    """The configured backend (created on first use)"""
+    global _storage
+    if _storage is None:
+        if get_settings().storage_backend == 'memory':
+            _storage = MemoryStorage()
+        else:
+            from database import get_db
+            _storage = MongoStorage(get_db())
+    return _storage
+
+
+def use_storage(storage: Storage):
+    """Replace the backend (tests, benchmarks)"""
+    global _storage
+    _storage = storage
+
+
+# Dependencies are async so FastAPI calls them inline instead of in its threadpool
+async def get_storage() -> Storage:
+    return current_storage()
+
+
+async def get_registrations(storage: Storage = Depends(get_storage)) -> Repository:
+    return storage.registrations
+
+
+async def get_payments(storage: Storage = Depends(get_storage)) -> Repository:
+    return storage.payments
+
+
+async def get_contacts(storage: Storage = Depends(get_storage)) -> Repository:
+    return storage.contacts
+
+
+async def get_status_checks(storage: Storage = Depends(get_storage)) -> Repository:
+    return storage.status_checks
+
+
+async def get_counters(storage: Storage = Depends(get_storage)) -> Repository:
+    return storage.counters
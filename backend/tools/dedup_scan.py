@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Duplicate-delegate scan over the whole registrations collection.
+
+Streams every active registration's blocking keys (services/dedup.py) and
+blocks on them with pandas: registrations are only compared with the others
+in the same key bucket, so 100k registrations take about a second rather
+than the 5 billion comparisons of checking every pair. Reports the groups of
+registrations that are the same delegate (same passport, or same phone and
+name+DOB) and the pairs that possibly are; `--flag` stores the other ids of
+each in `possibleDuplicateOf` for the admins, as create_registration does for
+new registrations.
+
+Registrations written before the keys existed get them computed on the fly
+(the registrations v2 migration); run tools.migrate_schema to store them.
+
+Run from the backend directory:
+    python -m tools.dedup_scan --mongo-url mongodb://localhost:27017 --db kicon --output duplicates.json
+    python -m tools.dedup_scan --preset 100k --duplicate-rate 0.02   # in-process synthetic data, no MongoDB
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Set
+
+from repositories.base import UpdateOperation
+from services.dedup import DEDUP_MAX_BLOCK, ScanResult, scan
+from tools.synthetic_data import PRESETS
+
+
+async def load_keys(storage, include_cancelled: bool = False, batch_size: int = 5000) -> List[dict]:
+    """id and dedupKeys of every (active) registration"""
+    filter = {} if include_cancelled else {"registrationStatus": {"$ne": "cancelled"}}
+    return [document async for document in storage.registrations.stream(
+        filter, fields=["id", "dedupKeys"], batch_size=batch_size
+    )]
+
+
+async def flag(storage, result: ScanResult, batch_size: int = 500) -> int:
+    """Store the ids each registration possibly duplicates in `possibleDuplicateOf`"""
+    others: Dict[str, Set[str]] = defaultdict(set)
+    for group in result.groups:
+        for member in group:
+            others[member].update(other for other in group if other != member)
+    for first, second, _ in result.possible:
+        others[first].add(second)
+        others[second].add(first)
+    operations = [UpdateOperation({"id": id}, {"possibleDuplicateOf": sorted(ids)}) for id, ids in others.items()]
+    modified = 0
+    for start in range(0, len(operations), batch_size):
+        modified += await storage.registrations.bulk_update(operations[start:start + batch_size])
+    return modified
+
+
+async def run(args) -> dict:
+    if args.preset:
+        from storage import MemoryStorage
+        from tools.synthetic_data import load_repositories
+
+        storage = MemoryStorage()
+        preset = PRESETS[args.preset]
+        print(f"🌱 Generating {preset.registrations} registrations ({args.duplicate_rate:.0%} registered twice)")
+        await load_repositories(storage, preset, seed=args.seed, duplicate_rate=args.duplicate_rate)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from storage import MongoStorage
+
+        storage = MongoStorage(AsyncIOMotorClient(args.mongo_url)[args.db])
+
+    started = time.perf_counter()
+    documents = await load_keys(storage, include_cancelled=args.include_cancelled)
+    loaded = time.perf_counter()
+    result = scan(documents, max_block=args.max_block)
+    scanned = time.perf_counter()
+
+    duplicates = sum(len(group) - 1 for group in result.groups)
+    print(f"🔍 {result.scanned} registrations: {len(result.groups)} duplicate groups ({duplicates} extra "
+          f"registrations), {len(result.possible)} possible pairs")
+    print(f"   load {loaded - started:.2f}s, scan {scanned - loaded:.2f}s")
+    for kind, size in result.oversized:
+        print(f"⚠️  A {kind} key shared by {size} registrations was skipped (over --max-block {args.max_block})")
+
+    report = {
+        "generated": datetime.utcnow().isoformat(),
+        "scanned": result.scanned,
+        "groups": result.groups,
+        "possible": [{"ids": [first, second], "shared": kinds} for first, second, kinds in result.possible],
+        "oversized": [{"kind": kind, "registrations": size} for kind, size in result.oversized],
+        "load_seconds": round(loaded - started, 3),
+        "scan_seconds": round(scanned - loaded, 3),
+    }
+    if args.flag:
+        report["flagged"] = await flag(storage, result)
+        print(f"🏷️  Flagged {report['flagged']} registrations")
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate delegate registrations")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="kicon")
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="scan generated data in memory instead")
+    parser.add_argument("--duplicate-rate", type=float, default=0.02, help="with --preset")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--include-cancelled", action="store_true")
+    parser.add_argument("--max-block", type=int, default=DEDUP_MAX_BLOCK,
+                        help="skip keys shared by more registrations than this")
+    parser.add_argument("--flag", action="store_true", help="store possibleDuplicateOf on the registrations found")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
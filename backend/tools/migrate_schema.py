@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Bulk schema migration: upgrade whole collections to the current schema version.
+
+Walks a collection in `id` order (the unique id index) `--batch-size`
+documents at a time, upgrades the ones below the current version with the
+migrations in migrations.py and writes each batch with one unordered
+bulk_write. Meant to run against the live database after a deploy:
+- resumable: the last id of every written batch is checkpointed in the
+  counters collection, so an interrupted run continues where it stopped
+  (`--restart` starts over); a finished run is not repeated until a newer
+  schema version is deployed
+- throttled: at most `--rate` documents per second, so the migration does
+  not compete with the API for the cluster
+- conditional: an update only applies while the document is unchanged since
+  it was read; one a handler wrote in between is counted as a conflict and
+  left to the upgrade on read or the next run
+
+Run from the backend directory:
+    python -m tools.migrate_schema --mongo-url mongodb://localhost:27017 --db kicon
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from migrations import MIGRATIONS, SCHEMA_VERSION_FIELD, current_version, upgrade, write_back
+
+CHECKPOINT_PREFIX = "schema_migration:"
+
+
+async def migrate_collection(storage, collection: str, batch_size: int = 500, rate: float = 0,
+                             restart: bool = False, dry_run: bool = False,
+                             progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Upgrade every document of one collection; returns the run's counts"""
+    repository = getattr(storage, collection)
+    # The stored documents, not the ones VersionedRepository upgrades on read
+    stored = getattr(repository, "inner", repository)
+    target = current_version(collection)
+    checkpoint_id = f"{CHECKPOINT_PREFIX}{collection}"
+
+    checkpoint = await storage.counters.find_one({"id": checkpoint_id})
+    if checkpoint is None:
+        checkpoint = {"id": checkpoint_id, "version": target, "last_id": None, "completed": None}
+        if not dry_run:
+            await storage.counters.insert(checkpoint)
+    elif restart or checkpoint.get("version") != target:
+        checkpoint.update(version=target, last_id=None, completed=None)
+    stats = {
+        "collection": collection, "version": target, "resumed_from": checkpoint["last_id"],
+        "scanned": 0, "upgraded": 0, "conflicts": 0, "skipped": bool(checkpoint.get("completed")),
+    }
+    if stats["skipped"]:
+        return stats
+
+    last_id = checkpoint["last_id"]
+    while True:
+        started = time.monotonic()
+        filter = {SCHEMA_VERSION_FIELD: {"$ne": target}}
+        if last_id is not None:
+            filter["id"] = {"$gt": last_id}
+        documents = await stored.find(filter, sort=("id", 1), limit=batch_size)
+        if not documents:
+            break
+        operations = []
+        for document in documents:
+            upgraded = upgrade(collection, document)
+            operation = write_back(document, upgraded) if upgraded is not None else None
+            if operation is not None:
+                operations.append(operation)
+        modified = len(operations) if dry_run else await stored.bulk_update(operations)
+        last_id = documents[-1]["id"]
+        stats["scanned"] += len(documents)
+        stats["upgraded"] += modified
+        stats["conflicts"] += len(operations) - modified
+        if not dry_run:
+            await storage.counters.update_one({"id": checkpoint_id}, {
+                "version": target, "last_id": last_id, "completed": None, "updated": datetime.utcnow()
+            })
+        if progress:
+            progress(stats)
+        if rate:
+            pause = len(documents) / rate - (time.monotonic() - started)
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+    if not dry_run:
+        await storage.counters.update_one({"id": checkpoint_id}, {"completed": datetime.utcnow()})
+    return stats
+
+
+async def run(args) -> list:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from storage import MongoStorage
+
+    storage = MongoStorage(AsyncIOMotorClient(args.mongo_url)[args.db])
+    collections = [args.collection] if args.collection else list(MIGRATIONS)
+
+    def report(stats: dict):
+        print(f"  {stats['collection']:14} {stats['scanned']:>9} scanned {stats['upgraded']:>9} upgraded "
+              f"{stats['conflicts']:>6} conflicts", end="\r")
+
+    results = []
+    for collection in collections:
+        started = time.perf_counter()
+        stats = await migrate_collection(storage, collection, batch_size=args.batch_size, rate=args.rate,
+                                         restart=args.restart, dry_run=args.dry_run, progress=report)
+        elapsed = time.perf_counter() - started
+        if stats["skipped"]:
+            print(f"⏭️  {collection}: already at version {stats['version']} (--restart to run again)")
+        else:
+            print(f"✅ {collection}: {stats['upgraded']} of {stats['scanned']} scanned upgraded to version "
+                  f"{stats['version']}, {stats['conflicts']} conflicts, {elapsed:.1f}s" + " " * 20)
+        results.append(stats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade stored documents to the current schema version")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="kicon")
+    parser.add_argument("--collection", choices=sorted(MIGRATIONS), help="one collection instead of all")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=2000, help="max documents per second, 0 for no limit")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first id")
+    parser.add_argument("--dry-run", action="store_true", help="count what would be upgraded without writing")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print("🔍 Dry run: nothing is written")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
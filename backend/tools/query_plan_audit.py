@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Query-plan audit for the route queries.
+
+Replays the filter/sort/limit shapes issued by routes/registrations.py,
+routes/payments.py and routes/contacts.py through explain("executionStats")
+against a seeded local database, builds the same indexes the app builds at
+startup, and reports the winning plan, keys/docs examined versus returned and
+any COLLSCAN or in-memory SORT stage.
+
+Exits non-zero when a hot query collection-scans, sorts in memory, or (with
+--baseline) examines noticeably more documents per result than before, so it
+can gate a benchmark run.
+
+Run from the backend directory:
+    python -m tools.query_plan_audit --mongo-url mongodb://localhost:27017 --preset 100k
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pymongo import MongoClient
+
+from indexes import INDEXES
+from migrations import current_version
+from tools.synthetic_data import PRESETS, load
+
+
+@dataclass
+class QueryShape:
+    name: str
+    collection: str
+    command: str  # "find" or "count"
+    filter: dict
+    sort: Optional[dict] = None
+    limit: int = 0
+    skip: int = 0
+    hot: bool = True
+    source: str = ""
+
+
+# Mirrors the literal queries in the route modules; keep in sync when they change
+QUERY_SHAPES = [
+    QueryShape("registration_by_email", "registrations", "find", {"email": "<email>"}, limit=1,
+               source="registrations.create_registration / check_email_exists"),
+    QueryShape("registration_by_id", "registrations", "find", {"id": "<registration_id>"}, limit=1,
+               source="registrations.get/update/cancel, payments.*"),
+    QueryShape("active_registration_count", "registrations", "count", {"registrationStatus": {"$ne": "cancelled"}},
+               source="registrations.create_registration"),
+    QueryShape("registration_list", "registrations", "find", {}, sort={"registrationDate": -1}, limit=100,
+               source="registrations.get_all_registrations"),
+    QueryShape("registration_list_by_status", "registrations", "find", {"registrationStatus": "pending"},
+               sort={"registrationDate": -1}, limit=100, source="registrations.get_all_registrations?status="),
+    QueryShape("registration_count_by_status", "registrations", "count", {"registrationStatus": "confirmed"},
+               source="registrations.get_registration_stats"),
+    QueryShape("registration_count_by_specialty", "registrations", "count", {"specialty": "dentistry"},
+               source="registrations.get_registration_stats"),
+    QueryShape("campaign_balance_recipients", "registrations", "find",
+               {"paymentStatus": {"$in": ["unpaid", "advance_paid"]}, "registrationStatus": {"$ne": "cancelled"}},
+               sort={"id": 1}, limit=200, source="services.campaigns"),
+    QueryShape("payment_by_registration", "payments", "find", {"registration_id": "<registration_id>"}, limit=1,
+               source="payments.get_payment_info / create_payment_record"),
+    QueryShape("payment_by_id", "payments", "find", {"id": "<payment_id>"}, limit=1,
+               source="payments.update_payment"),
+    QueryShape("payment_list", "payments", "find", {}, sort={"created_date": -1}, limit=50,
+               source="payments.get_all_payments"),
+    QueryShape("payment_list_by_status", "payments", "find", {"payment_status": "pending"},
+               sort={"created_date": -1}, limit=50, source="payments.get_all_payments?status="),
+    QueryShape("payment_count_by_status", "payments", "count", {"payment_status": "completed"},
+               source="payments.get_payment_statistics"),
+    QueryShape("completed_payments", "payments", "find", {"payment_status": "completed"},
+               source="payments.get_payment_statistics", hot=False),
+    QueryShape("contact_by_id", "contacts", "find", {"id": "<contact_id>"}, limit=1,
+               source="contacts.get_contact / update_contact_status"),
+    QueryShape("contact_list", "contacts", "find", {}, sort={"createdDate": -1}, limit=50,
+               source="contacts.get_all_contacts"),
+    QueryShape("contact_list_by_status", "contacts", "find", {"status": "open"}, sort={"createdDate": -1}, limit=50,
+               source="contacts.get_all_contacts?status="),
+    QueryShape("contact_list_by_type", "contacts", "find", {"inquiryType": "technical"}, sort={"createdDate": -1},
+               limit=50, source="contacts.get_all_contacts?inquiry_type="),
+    QueryShape("contact_count_by_status", "contacts", "count", {"status": "open"},
+               source="contacts.get_contact_stats"),
+    QueryShape("recent_contacts", "contacts", "count", {"createdDate": {"$gte": datetime.utcnow() - timedelta(days=7)}},
+               source="contacts.get_contact_stats"),
+    QueryShape("status_checks_since", "status_checks", "find", {"timestamp": {"$gt": datetime.utcnow() - timedelta(days=1)}},
+               sort={"timestamp": 1}, limit=1000, source="server.list_status_checks?since="),
+    QueryShape("schema_migration_batch", "registrations", "find",
+               {"schemaVersion": {"$ne": current_version("registrations")}, "id": {"$gt": "<registration_id>"}},
+               sort={"id": 1}, limit=500, source="tools.migrate_schema", hot=False),
+    QueryShape("registration_dedup_candidates", "registrations", "find",
+               {"dedupKeys": "passport:K1234567", "registrationStatus": {"$ne": "cancelled"}},
+               limit=51, source="registrations.create_registration (services.dedup.find_candidates, once per key)"),
+]
+
+
+def resolve_placeholders(db, shape: QueryShape) -> dict:
+    """Swap <...> placeholders for real ids so point lookups hit actual documents"""
+    sample = {
+        "<registration_id>": (db.registrations.find_one({}, {"id": 1}) or {}).get("id"),
+        "<email>": (db.registrations.find_one({}, {"email": 1}) or {}).get("email"),
+        "<payment_id>": (db.payments.find_one({}, {"id": 1}) or {}).get("id"),
+        "<contact_id>": (db.contacts.find_one({}, {"id": 1}) or {}).get("id"),
+    }
+    return {key: sample.get(value, value) if isinstance(value, str) else value for key, value in shape.filter.items()}
+
+
+def _walk(plan: dict):
+    yield plan
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            yield from _walk(plan[child_key])
+    for child in plan.get("inputStages", []):
+        yield from _walk(child)
+
+
+def plan_stages(plan: dict) -> List[str]:
+    """Flatten a winning plan tree into stage names, root first"""
+    return [stage_plan.get("stage", "?") for stage_plan in _walk(plan)]
+
+
+def explain(db, shape: QueryShape) -> dict:
+    query = resolve_placeholders(db, shape)
+    if shape.command == "count":
+        command = {"count": shape.collection, "query": query}
+    else:
+        command = {"find": shape.collection, "filter": query}
+        if shape.sort:
+            command["sort"] = shape.sort
+        if shape.limit:
+            command["limit"] = shape.limit
+        if shape.skip:
+            command["skip"] = shape.skip
+    result = db.command({"explain": command, "verbosity": "executionStats"})
+    winning = result["queryPlanner"]["winningPlan"]
+    stats = result["executionStats"]
+    stages = plan_stages(winning)
+    returned = stats.get("nReturned", 0)
+    docs_examined = stats.get("totalDocsExamined", 0)
+    index_names = sorted({
+        stage_plan.get("indexName") for stage_plan in _walk(winning) if stage_plan.get("indexName")
+    })
+    return {
+        "name": shape.name,
+        "collection": shape.collection,
+        "source": shape.source,
+        "hot": shape.hot,
+        "stages": stages,
+        "indexes": index_names,
+        "collscan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "returned": returned,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_examined": docs_examined,
+        "examined_per_returned": round(docs_examined / max(returned, 1), 2),
+        "millis": stats.get("executionTimeMillis", 0),
+    }
+
+
+def find_regressions(reports: List[dict], baseline: Optional[dict], ratio_tolerance: float) -> List[str]:
+    problems = []
+    previous = {report["name"]: report for report in (baseline or {}).get("queries", [])}
+    for report in reports:
+        if not report["hot"]:
+            continue
+        if report["collscan"]:
+            problems.append(f"{report['name']}: COLLSCAN ({report['docs_examined']} docs examined)")
+        if report["in_memory_sort"]:
+            problems.append(f"{report['name']}: in-memory SORT")
+        before = previous.get(report["name"])
+        if before and report["examined_per_returned"] > before["examined_per_returned"] * ratio_tolerance + 1:
+            problems.append(
+                f"{report['name']}: docs examined per result {before['examined_per_returned']} -> "
+                f"{report['examined_per_returned']}"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit query plans of the hot route queries")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="kicon_plan_audit")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="10k", help="synthetic dataset size")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--no-seed", action="store_true", help="audit the existing data as-is")
+    parser.add_argument("--no-indexes", action="store_true", help="skip building the app's indexes")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--ratio-tolerance", type=float, default=1.5)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_url)
+    db = client[args.db]
+
+    if not args.no_seed:
+        print(f"🌱 Seeding the {args.preset} synthetic dataset into {args.db}")
+        load(db, PRESETS[args.preset], seed=args.seed, build_indexes=False)
+    if not args.no_indexes:
+        for collection, models in INDEXES.items():
+            db[collection].create_indexes(models)
+
+    reports = [explain(db, shape) for shape in QUERY_SHAPES]
+
+    print(f"\n{'QUERY':34} {'PLAN':36} {'RET':>6} {'KEYS':>7} {'DOCS':>7} {'MS':>5}")
+    print("-" * 100)
+    for report in reports:
+        flag = "❌" if report["hot"] and (report["collscan"] or report["in_memory_sort"]) else "✅"
+        plan = " <- ".join(report["stages"])
+        print(f"{flag} {report['name']:32} {plan[:36]:36} {report['returned']:>6} "
+              f"{report['keys_examined']:>7} {report['docs_examined']:>7} {report['millis']:>5}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    problems = find_regressions(reports, baseline, args.ratio_tolerance)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"generated": datetime.utcnow().isoformat(), "preset": args.preset, "queries": reports},
+                      handle, indent=2, default=str)
+
+    if problems:
+        print("\n⚠️  Query plan regressions:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n🎉 All hot queries use index scans without in-memory sorts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Cold-start and import-time profile of the API.
+
+Every measurement runs in a fresh interpreter so nothing is already imported
+or connected:
+
+- the import profile runs `python -X importtime -c "import server"` and
+  attributes the self time of every module to its top-level package, which
+  shows where the import budget goes (fastapi, pymongo, our own routes, ...);
+- the cold start times `import server` (module import plus create_app), the
+  lifespan startup (indexes, pool warm-up, caches) and the first served
+  request, and reports the median over several runs.
+
+Run from the backend directory:
+    python -m tools.startup_profile --backend memory --runs 5
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=kicon python -m tools.startup_profile --backend mongo
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line
+COLD_START_PROBE = """
+import json, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(server.app)
+client.__enter__()
+ready = time.perf_counter()
+response = client.get(PATH)
+served = time.perf_counter()
+client.__exit__(None, None, None)
+print(json.dumps({
+    "status": response.status_code,
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (served - ready) * 1000,
+    "total_ms": (served - started) * 1000,
+    "phases_ms": server.app.state.startup["phases_ms"],
+}))
+"""
+
+
+def _environment(backend: str) -> dict:
+    env = dict(os.environ, STORAGE_BACKEND=backend, LOG_LEVEL="WARNING")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def import_profile(backend: str, runs: int) -> dict:
+    """Median self time (ms) per top-level package across runs"""
+    samples = defaultdict(list)
+    totals = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import server"],
+            cwd=BACKEND_DIR, env=_environment(backend), capture_output=True, text=True, check=True
+        )
+        per_package = defaultdict(float)
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            per_package[name.split(".")[0]] += int(self_us) / 1000
+            if name == "server":
+                totals.append(int(cumulative_us) / 1000)
+        for package, milliseconds in per_package.items():
+            samples[package].append(milliseconds)
+    packages = {package: statistics.median(values + [0.0] * (runs - len(values))) for package, values in samples.items()}
+    return {"total_ms": statistics.median(totals), "packages": packages}
+
+
+def cold_start(backend: str, path: str, runs: int) -> dict:
+    results = []
+    for _ in range(runs):
+        launched = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", f"PATH = {path!r}\n{COLD_START_PROBE}"],
+            cwd=BACKEND_DIR, env=_environment(backend), capture_output=True, text=True, check=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        # Includes interpreter start-up, which the in-process timers cannot see
+        result["process_ms"] = (time.perf_counter() - launched) * 1000
+        results.append(result)
+    summary = {
+        key: statistics.median(result[key] for result in results)
+        for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms", "process_ms")
+    }
+    summary["status"] = results[-1]["status"]
+    summary["phases_ms"] = results[-1]["phases_ms"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and cold-start profile")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--path", default="/api/registrations/stats/summary", help="first request to serve")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the import profile")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"📦 Import profile ({args.runs} runs, median self time per package)")
+    imports = import_profile(args.backend, args.runs)
+    ranked = sorted(imports["packages"].items(), key=lambda item: item[1], reverse=True)
+    for package, milliseconds in ranked[:args.top]:
+        print(f"  {package:<28} {milliseconds:8.1f} ms")
+    print(f"  {'import server (cumulative)':<28} {imports['total_ms']:8.1f} ms\n")
+
+    print(f"🚀 Cold start to first served request ({args.backend} backend, GET {args.path})")
+    result = cold_start(args.backend, args.path, args.runs)
+    for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms", "process_ms"):
+        print(f"  {key:<28} {result[key]:8.1f} ms")
+    for phase, milliseconds in result["phases_ms"].items():
+        print(f"    startup.{phase:<19} {milliseconds:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({"imports": imports, "cold_start": result}, output, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
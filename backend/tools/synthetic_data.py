@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic dataset generator for scale testing.
+
+Produces documents shaped exactly like the route handlers store them
+(`Registration(...).dict()` etc.) with realistic distributions: specialty and
+nationality mixes, registration dates clustered after opening and before the
+deadline, payment status correlated with registration status, contacts with
+a weekday/business-hours bias and a steady stream of status checks.
+
+Documents are built as plain dicts for speed; every Nth document (default one
+per thousand, `--validate-every 1` for all) is round-tripped through the
+Pydantic model so drift from the models fails loudly. Batches are generated
+lazily and written with `insert_many` from a thread pool, so 1M records never
+sit in memory at once.
+
+The same seed always produces the same data. Used by the load benchmark and
+the query-plan audit; standalone:
+
+    python -m tools.synthetic_data --mongo-url mongodb://localhost:27017 --db kicon_scale --preset 100k
+"""
+import argparse
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Iterator, List, Optional
+
+from indexes import INDEXES
+from migrations import SCHEMA_VERSION_FIELD, current_version
+from models.Contact import Contact
+from models.Payment import Payment
+from models.Registration import Registration
+from services.dedup import dedup_keys
+
+
+@dataclass
+class Preset:
+    registrations: int
+    contacts: int
+    status_checks: int
+    payment_ratio: float = 0.8  # registrations that have a payment record
+
+
+PRESETS = {
+    "1k": Preset(registrations=1_000, contacts=500, status_checks=1_000),
+    "10k": Preset(registrations=10_000, contacts=5_000, status_checks=10_000),
+    "100k": Preset(registrations=100_000, contacts=50_000, status_checks=100_000),
+    "1m": Preset(registrations=1_000_000, contacts=500_000, status_checks=1_000_000),
+}
+
+SPECIALTIES = (["dermatology", "dentistry", "cosmetology", "other"], [40, 35, 20, 5])
+NATIONALITIES = (
+    ["Indian", "South Korean", "Nepalese", "Bangladeshi", "Sri Lankan", "Emirati", "Singaporean", "Thai"],
+    [70, 10, 4, 4, 3, 3, 3, 3],
+)
+GENDERS = (["male", "female", "other"], [52, 47, 1])
+FOOD = (["vegetarian", "non-vegetarian", "both"], [45, 35, 20])
+INTERESTS = ["Dental Equipment", "Skincare Devices", "Cosmetic Products"]
+REGISTRATION_STATUS = (["pending", "confirmed", "cancelled"], [55, 35, 10])
+# Delegate payment status given registration status
+DELEGATE_PAYMENT = {
+    "pending": (["unpaid", "advance_paid", "full_paid"], [80, 15, 5]),
+    "confirmed": (["unpaid", "advance_paid", "full_paid"], [5, 45, 50]),
+    "cancelled": (["unpaid", "advance_paid", "full_paid"], [85, 10, 5]),
+}
+# Payment record status given delegate payment status
+PAYMENT_RECORD = {
+    "unpaid": (["pending", "failed"], [85, 15]),
+    "advance_paid": (["partial", "completed"], [80, 20]),
+    "full_paid": (["completed"], [1]),
+}
+INQUIRY_TYPES = (["general", "registration", "accommodation", "technical"], [45, 30, 15, 10])
+INQUIRY_STATUS = (["open", "responded", "closed"], [50, 30, 20])
+DESIGNATIONS = ["Consultant", "Senior Consultant", "Dentist", "Dermatologist", "Clinic Director", "Resident", "Surgeon"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Pune", "Kolkata", "Seoul", "Busan", "Kathmandu"]
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Meera", "Arjun", "Kavya", "Rahul", "Sneha",
+               "Min-jun", "Seo-yeon", "Ji-ho", "Ha-eun", "Sanjay", "Divya", "Nikhil", "Pooja", "Karan", "Isha"]
+LAST_NAMES = ["Sharma", "Patel", "Reddy", "Iyer", "Nair", "Gupta", "Singh", "Mehta", "Kim", "Lee", "Park",
+              "Choi", "Rao", "Das", "Joshi", "Kapoor", "Menon", "Shah", "Bose", "Verma"]
+STATUS_CLIENTS = ["frontend", "uptime-probe", "admin-dashboard", "mobile-web", "load-balancer"]
+
+
+def _pick(rng: random.Random, choices) -> str:
+    values, weights = choices
+    return rng.choices(values, weights)[0]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _phone(rng: random.Random, nationality: str) -> str:
+    prefix = "+82" if nationality == "South Korean" else "+91"
+    return f"{prefix}{rng.randint(7000000000, 9999999999)}"
+
+
+class DatasetGenerator:
+    """Deterministic document factory; one instance per (seed, window)"""
+
+    def __init__(self, seed: int = 2025, window_end: Optional[datetime] = None, window_days: int = 120,
+                 duplicate_rate: float = 0.0):
+        self.seed = seed
+        self.window_end = window_end or datetime.utcnow()
+        self.window_start = self.window_end - timedelta(days=window_days)
+        self.duplicate_rate = duplicate_rate
+
+    def _rng(self, stream: str, batch: int) -> random.Random:
+        # Independent stream per collection and batch, so batches can be generated in any order
+        return random.Random(f"{self.seed}:{stream}:{batch}")
+
+    def _registration_date(self, rng: random.Random) -> datetime:
+        span = (self.window_end - self.window_start).total_seconds()
+        roll = rng.random()
+        if roll < 0.3:
+            # Opening rush: first week
+            offset = rng.expovariate(1 / (3 * 86400))
+        elif roll < 0.7:
+            # Deadline rush: last two weeks
+            offset = span - rng.expovariate(1 / (5 * 86400))
+        else:
+            offset = rng.uniform(0, span)
+        return self.window_start + timedelta(seconds=min(max(offset, 0), span))
+
+    def _business_hours(self, rng: random.Random) -> datetime:
+        moment = self.window_start + timedelta(seconds=rng.uniform(0, (self.window_end - self.window_start).total_seconds()))
+        if moment.weekday() >= 5 and rng.random() < 0.7:
+            moment -= timedelta(days=moment.weekday() - 4)
+        return moment.replace(hour=min(23, max(0, int(rng.gauss(8, 3)))))  # UTC ~ IST office hours
+
+    def registration(self, index: int, rng: random.Random, person: Optional[dict] = None) -> dict:
+        person = person or {
+            "first": rng.choice(FIRST_NAMES),
+            "last": rng.choice(LAST_NAMES),
+            "nationality": _pick(rng, NATIONALITIES),
+            "gender": _pick(rng, GENDERS),
+            "dateOfBirth": self.window_end.replace(hour=0, minute=0, second=0, microsecond=0)
+                           - timedelta(days=int(min(max(rng.gauss(40, 9), 26), 66) * 365.25)),
+            "passportNumber": f"{rng.choice('KLMNPRSTUVWZ')}{rng.randint(1000000, 9999999)}",
+        }
+        registered = self._registration_date(rng)
+        status = _pick(rng, REGISTRATION_STATUS)
+        age = (registered - person["dateOfBirth"]).days // 365
+        city = rng.choice(CITIES)
+        document = {
+            "id": _uuid(rng),
+            "fullName": f"Dr. {person['first']} {person['last']}",
+            "gender": person["gender"],
+            "dateOfBirth": person["dateOfBirth"],
+            "nationality": person["nationality"],
+            "passportNumber": person["passportNumber"],
+            "passportExpiry": datetime(rng.randint(2027, 2035), rng.randint(1, 12), rng.randint(1, 28)),
+            "mobile": _phone(rng, person["nationality"]),
+            "email": f"{person['first'].lower()}.{person['last'].lower()}.{index}@example.com",
+            "specialty": _pick(rng, SPECIALTIES),
+            "yearsOfPractice": max(0, min(50, age - 26 - rng.randint(0, 4))),
+            "clinicName": f"{person['last']} {rng.choice(['Skin', 'Dental', 'Aesthetics', 'Smile'])} Clinic",
+            "clinicAddress": f"{rng.randint(1, 400)} {rng.choice(['MG Road', 'Park Street', 'Ring Road', 'Main Street'])}, {city}",
+            "company": rng.choice([None, None, "Shine Health Pvt Ltd", "Smile Care Group"]),
+            "designation": rng.choice(DESIGNATIONS),
+            "interests": rng.sample(INTERESTS, rng.randint(0, len(INTERESTS))),
+            "mou": rng.random() < 0.15,
+            "foodPreference": _pick(rng, FOOD),
+            "emergencyContact": _phone(rng, person["nationality"]),
+            "allergies": rng.choice([None] * 9 + ["Peanuts"]),
+            "specialAssistance": rng.random() < 0.03,
+            "registrationStatus": status,
+            "paymentStatus": _pick(rng, DELEGATE_PAYMENT[status]),
+            "termsAccepted": True,
+            "registrationDate": registered,
+            "lastUpdated": registered + timedelta(hours=rng.expovariate(1 / 48)),
+            SCHEMA_VERSION_FIELD: current_version("registrations"),
+        }
+        document["dedupKeys"] = dedup_keys(document)
+        return document
+
+    def payment(self, registration: dict, rng: random.Random) -> dict:
+        status = _pick(rng, PAYMENT_RECORD[registration["paymentStatus"]])
+        created = registration["registrationDate"] + timedelta(hours=rng.expovariate(1 / 72))
+        paid = created + timedelta(hours=rng.expovariate(1 / 24)) if status in ("partial", "completed") else None
+        return {
+            "id": _uuid(rng),
+            "registration_id": registration["id"],
+            "payment_method": "bank_transfer",
+            "payment_status": status,
+            "usd_amount": 3000.0,
+            "inr_base_amount": 270000.0,
+            "gst_amount": 13500.0,
+            "total_inr_amount": 283500.0,
+            "transaction_id": f"HDFC{rng.randint(10 ** 11, 10 ** 12 - 1)}" if paid else None,
+            "payment_proof_url": None,
+            "payment_date": paid,
+            "verification_date": paid + timedelta(hours=rng.expovariate(1 / 12)) if status == "completed" else None,
+            "verified_by": "finance-team" if status == "completed" else None,
+            "bank_account_number": "50200073668320",
+            "bank_name": "HDFC BANK",
+            "created_date": created,
+            "last_updated": paid or created,
+            "payment_notes": None,
+            "admin_notes": None,
+            SCHEMA_VERSION_FIELD: current_version("payments"),
+        }
+
+    def contact(self, index: int, rng: random.Random) -> dict:
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created = self._business_hours(rng)
+        return {
+            "id": _uuid(rng),
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}.{index}@example.org",
+            "phone": f"+91{rng.randint(7000000000, 9999999999)}" if rng.random() < 0.6 else None,
+            "subject": rng.choice(["Registration query", "Hotel booking help", "Visa invitation letter",
+                                   "Payment confirmation", "Exhibitor enquiry"]),
+            "message": "Hello, could you please share more details about this? Thank you.",
+            "inquiryType": _pick(rng, INQUIRY_TYPES),
+            "status": _pick(rng, INQUIRY_STATUS),
+            "createdDate": created,
+            "lastUpdated": created,
+            SCHEMA_VERSION_FIELD: current_version("contacts"),
+        }
+
+    def status_check(self, rng: random.Random) -> dict:
+        return {
+            "id": _uuid(rng),
+            "client_name": rng.choice(STATUS_CLIENTS),
+            "timestamp": self.window_start + timedelta(seconds=rng.uniform(0, (self.window_end - self.window_start).total_seconds())),
+        }
+
+    def registration_batch(self, batch: int, start: int, count: int, payment_ratio: float):
+        """Registrations [start, start+count) and their payment records"""
+        rng = self._rng("registrations", batch)
+        registrations, payments = [], []
+        previous = None
+        for index in range(start, start + count):
+            if previous is not None and rng.random() < self.duplicate_rate:
+                # Same person registering again under another email
+                registration = self.registration(index, rng, person=previous)
+            else:
+                registration = self.registration(index, rng)
+            previous = {
+                "first": registration["fullName"].split()[1], "last": registration["fullName"].split()[-1],
+                "nationality": registration["nationality"], "gender": registration["gender"],
+                "dateOfBirth": registration["dateOfBirth"], "passportNumber": registration["passportNumber"],
+            }
+            registrations.append(registration)
+            if rng.random() < payment_ratio:
+                payments.append(self.payment(registration, rng))
+        return registrations, payments
+
+    def contact_batch(self, batch: int, start: int, count: int) -> List[dict]:
+        rng = self._rng("contacts", batch)
+        return [self.contact(index, rng) for index in range(start, start + count)]
+
+    def status_check_batch(self, batch: int, count: int) -> List[dict]:
+        rng = self._rng("status_checks", batch)
+        return [self.status_check(rng) for _ in range(count)]
+
+
+def _validate(collection: str, document: dict):
+    model = {"registrations": Registration, "payments": Payment, "contacts": Contact}.get(collection)
+    if model is not None:
+        model(**document)
+    elif not (document.get("id") and document.get("client_name") and isinstance(document.get("timestamp"), datetime)):
+        raise ValueError(f"Invalid {collection} document: {document}")
+
+
+def _batches(total: int, batch_size: int) -> Iterator[tuple]:
+    for batch, start in enumerate(range(0, total, batch_size)):
+        yield batch, start, min(batch_size, total - start)
+
+
+def load(db, preset: Preset, seed: int = 2025, batch_size: int = 5000, parallelism: int = 4,
+         validate_every: int = 1000, drop: bool = True, build_indexes: bool = True,
+         duplicate_rate: float = 0.0, progress: Optional[Callable[[str, int], None]] = None) -> dict:
+    """Generate and bulk-load a preset into a (sync pymongo) database; returns inserted counts"""
+    generator = DatasetGenerator(seed=seed, duplicate_rate=duplicate_rate)
+    collections = ("registrations", "payments", "contacts", "status_checks")
+    if drop:
+        for name in collections:
+            db[name].drop()
+    counts = dict.fromkeys(collections, 0)
+    # Bound batches generated-but-not-yet-written so memory stays flat at 1M
+    in_flight = BoundedSemaphore(parallelism * 2)
+    seen = dict.fromkeys(collections, 0)
+    counts_lock = Lock()
+
+    def write(name: str, documents: List[dict]):
+        try:
+            if documents:
+                db[name].insert_many(documents, ordered=False)
+            with counts_lock:
+                counts[name] += len(documents)
+                written = counts[name]
+            if progress:
+                progress(name, written)
+        finally:
+            in_flight.release()
+
+    def submit(pool, name: str, documents: List[dict]):
+        for document in documents:
+            if validate_every and seen[name] % validate_every == 0:
+                _validate(name, document)
+            seen[name] += 1
+        in_flight.acquire()
+        return pool.submit(write, name, documents)
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="dataset-loader") as pool:
+        for batch, start, count in _batches(preset.registrations, batch_size):
+            registrations, payments = generator.registration_batch(batch, start, count, preset.payment_ratio)
+            futures.append(submit(pool, "registrations", registrations))
+            futures.append(submit(pool, "payments", payments))
+        for batch, start, count in _batches(preset.contacts, batch_size):
+            futures.append(submit(pool, "contacts", generator.contact_batch(batch, start, count)))
+        for batch, _, count in _batches(preset.status_checks, batch_size):
+            futures.append(submit(pool, "status_checks", generator.status_check_batch(batch, count)))
+        for future in futures:
+            future.result()
+
+    if build_indexes:
+        for collection, models in INDEXES.items():
+            if collection in collections:
+                db[collection].create_indexes(models)
+    return counts
+
+
+async def load_repositories(storage, preset: Preset, seed: int = 2025, batch_size: int = 5000,
+                            duplicate_rate: float = 0.0) -> dict:
+    """Generate a preset straight into repositories (e.g. storage.MemoryStorage for in-process runs)"""
+    generator = DatasetGenerator(seed=seed, duplicate_rate=duplicate_rate)
+    counts = dict.fromkeys(("registrations", "payments", "contacts", "status_checks"), 0)
+    for batch, start, count in _batches(preset.registrations, batch_size):
+        registrations, payments = generator.registration_batch(batch, start, count, preset.payment_ratio)
+        counts["registrations"] += await storage.registrations.insert_many(registrations)
+        counts["payments"] += await storage.payments.insert_many(payments)
+    for batch, start, count in _batches(preset.contacts, batch_size):
+        counts["contacts"] += await storage.contacts.insert_many(generator.contact_batch(batch, start, count))
+    for batch, _, count in _batches(preset.status_checks, batch_size):
+        counts["status_checks"] += await storage.status_checks.insert_many(generator.status_check_batch(batch, count))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and bulk-load a synthetic KICON dataset")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="kicon_scale")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="10k")
+    parser.add_argument("--registrations", type=int, help="override the preset's registration count")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--validate-every", type=int, default=1000, help="model-validate every Nth document, 0 to skip")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of delegates registered twice")
+    parser.add_argument("--keep", action="store_true", help="append instead of dropping the collections first")
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    preset = PRESETS[args.preset]
+    if args.registrations:
+        scale = args.registrations / preset.registrations
+        preset = Preset(args.registrations, int(preset.contacts * scale), int(preset.status_checks * scale),
+                        preset.payment_ratio)
+
+    db = MongoClient(args.mongo_url)[args.db]
+    print(f"🌱 Loading {args.preset} ({preset.registrations} registrations, {preset.contacts} contacts, "
+          f"{preset.status_checks} status checks) into {args.db}")
+    started = time.perf_counter()
+    counts = load(db, preset, seed=args.seed, batch_size=args.batch_size, parallelism=args.parallelism,
+                  validate_every=args.validate_every, drop=not args.keep, duplicate_rate=args.duplicate_rate)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for name, count in counts.items():
+        print(f"  {name:15} {count:>10}")
+    print(f"\n✅ {total} documents in {elapsed:.1f}s ({total / elapsed:.0f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OTLP/HTTP trace collector, plus a trace viewer.
+
+`serve` accepts the JSON batches OTLPHttpExporter posts to /v1/traces and
+appends each span as one line to a file, in the same format FileExporter
+writes. `show` reads such a file and prints each trace as an indented tree
+with per-span durations, e.g. how a slow POST /api/payments splits between
+validation, each Mongo command and serialization.
+
+Run from the backend directory:
+    python -m tools.trace_collector serve --port 4318 --output /tmp/kicon-traces.jsonl
+    python -m tools.trace_collector show /tmp/kicon-traces.jsonl --route "POST /api/payments" --slowest 5
+"""
+import argparse
+import json
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(output: str):
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            lines = []
+            for resource_spans in payload.get("resourceSpans", []):
+                service = next(
+                    (item["value"].get("stringValue") for item in resource_spans.get("resource", {}).get("attributes", [])
+                     if item["key"] == "service.name"),
+                    None
+                )
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    lines.extend(json.dumps({"service": service, **span}) + "\n" for span in scope_spans.get("spans", []))
+            with open(output, "a", encoding="utf-8") as trace_file:
+                trace_file.write("".join(lines))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    return CollectorHandler
+
+
+def load_traces(path: str) -> dict:
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["traceId"]].append(span)
+    return traces
+
+
+def _duration_ms(span: dict) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def _attributes(span: dict) -> dict:
+    return {item["key"]: next(iter(item["value"].values())) for item in span.get("attributes", [])}
+
+
+def print_trace(spans: list):
+    children = defaultdict(list)
+    ids = {span["spanId"] for span in spans}
+    roots = []
+    for span in sorted(spans, key=lambda item: int(item["startTimeUnixNano"])):
+        if span.get("parentSpanId") in ids:
+            children[span["parentSpanId"]].append(span)
+        else:
+            roots.append(span)
+
+    def walk(span, depth):
+        attributes = _attributes(span)
+        detail = ""
+        if "db.collection" in attributes:
+            detail = f"  {attributes['db.collection']} {attributes.get('db.statement', '')}"
+        status = " ❌" if span.get("status", {}).get("code") == 2 else ""
+        print(f"{'  ' * depth}{span['name']:<{40 - 2 * depth}} {_duration_ms(span):>9.2f} ms{status}{detail}")
+        for child in children[span["spanId"]]:
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local trace collector and viewer")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="accept OTLP/HTTP JSON batches")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=4318)
+    serve.add_argument("--output", default="/tmp/kicon-traces.jsonl")
+    show = commands.add_parser("show", help="print trace trees from a span file")
+    show.add_argument("path")
+    show.add_argument("--route", help="only traces whose root span has this name, e.g. 'POST /api/payments'")
+    show.add_argument("--slowest", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(args.output))
+        print(f"📡 Collecting traces on http://{args.host}:{args.port}/v1/traces -> {args.output}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    traces = load_traces(args.path)
+    ranked = []
+    for spans in traces.values():
+        root = next((span for span in spans if "parentSpanId" not in span), None) or spans[0]
+        if args.route and root["name"] != args.route:
+            continue
+        ranked.append((_duration_ms(root), spans))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+
+    print(f"🔎 {len(ranked)} traces, showing the {min(args.slowest, len(ranked))} slowest\n")
+    for _, spans in ranked[:args.slowest]:
+        print_trace(spans)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,11 @@ import { Card, CardContent, CardHeader, CardTitle } from "./ui/card";
 import { Button } from "./ui/button";
 import { Input } from "./ui/input";
 import { Label } from "./ui/label";
-import { Lock, User } from "lucide-react";
+import { KeyRound, Lock, User } from "lucide-react";
 import { useToast } from "../hooks/use-toast";
 
 const AdminLogin = ({ onLogin }) => {
-  const [credentials, setCredentials] = useState({ username: "", password: "" });
+  const [credentials, setCredentials] = useState({ username: "", password: "", apiKey: "" });
   const [loading, setLoading] = useState(false);
   const { toast } = useToast();
 
@@ -18,6 +18,8 @@ const AdminLogin = ({ onLogin }) => {
     // Simple authentication - in production, this should be more secure
     if (credentials.username === "admin" && credentials.password === "kicon2025admin") {
       localStorage.setItem("adminLoggedIn", "true");
+      // Sent as X-Admin-Key by the dashboard; the API checks it, not the demo credentials
+      localStorage.setItem("adminKey", credentials.apiKey);
       onLogin(true);
       toast({
         title: "Login Successful",
@@ -82,6 +84,24 @@ const AdminLogin = ({ onLogin }) => {
               </div>
             </div>
 
+            <div>
+              <Label htmlFor="apiKey" className="text-sm font-medium text-gray-700">
+                Admin API Key
+              </Label>
+              <div className="relative mt-1">
+                <KeyRound className="absolute left-3 top-1/2 transform -translate-y-1/2 h-4 w-4 text-gray-400" />
+                <Input
+                  id="apiKey"
+                  type="password"
+                  value={credentials.apiKey}
+                  onChange={(e) => setCredentials({...credentials, apiKey: e.target.value})}
+                  placeholder="Enter the server's ADMIN_API_KEY"
+                  className="pl-10"
+                  required
+                />
+              </div>
+            </div>
+
             <Button
               type="submit"
               disabled={loading}
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "../components/ui/card";
 import { Button } from "../components/ui/button";
 import { Input } from "../components/ui/input";
@@ -33,6 +33,12 @@ const AdminDashboard = () => {
   const [specialtyFilter, setSpecialtyFilter] = useState("all");
   const [isLoggedIn, setIsLoggedIn] = useState(false);
   const { toast } = useToast();
+  // Server time of this admin's latest change, and the refetch waiting for a snapshot that includes it
+  const latestWrite = useRef(0);
+  const pendingRefetch = useRef(null);
+
+  // Snapshot and record timestamps are naive UTC ISO strings with microseconds
+  const serverTime = (iso) => Date.parse(`${iso.slice(0, 23)}Z`);
 
   useEffect(() => {
     // Check if already logged in
@@ -51,25 +57,31 @@ const AdminDashboard = () => {
     try {
       const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
-      // Fetch registrations
-      const regResponse = await fetch(`${BACKEND_URL}/api/registrations`);
-      const regData = await regResponse.json();
-      if (regData.success) {
-        setRegistrations(regData.data);
-      }
-
-      // Fetch registration stats
-      const statsResponse = await fetch(`${BACKEND_URL}/api/registrations/stats/summary`);
-      const statsData = await statsResponse.json();
-      if (statsData.success) {
-        setStats(statsData.data);
+      // One precomputed snapshot: registrations, registration stats and payment stats
+      const dashboardResponse = await fetch(`${BACKEND_URL}/api/admin/dashboard`, {
+        headers: { "X-Admin-Key": localStorage.getItem("adminKey") || "" }
+      });
+      if (dashboardResponse.status === 403) {
+        handleLogout();
+        toast({
+          title: "Admin key rejected",
+          description: "Log in again with the server's admin API key",
+          variant: "destructive"
+        });
+        return;
       }
-
-      // Fetch payment stats
-      const paymentResponse = await fetch(`${BACKEND_URL}/api/payments/stats/summary`);
-      const paymentData = await paymentResponse.json();
-      if (paymentData.success) {
-        setPaymentStats(paymentData.data);
+      const dashboardData = await dashboardResponse.json();
+      if (dashboardData.success) {
+        // Any worker may answer with a snapshot built before our latest change: keep what is shown
+        // (including the optimistic update) and look again once the snapshot has been rebuilt
+        if (serverTime(dashboardData.data.generated_at) < latestWrite.current) {
+          clearTimeout(pendingRefetch.current);
+          pendingRefetch.current = setTimeout(fetchData, dashboardData.data.refresh_interval_seconds * 1000);
+          return;
+        }
+        setRegistrations(dashboardData.data.recent_registrations);
+        setStats(dashboardData.data.registrations);
+        setPaymentStats(dashboardData.data.payments);
       }
 
     } catch (error) {
@@ -99,7 +111,12 @@ const AdminDashboard = () => {
           title: "Success",
           description: `Registration status updated to ${newStatus}`
         });
-        fetchData(); // Refresh data
+        // Show the change right away; the stats follow once a snapshot built after it is served
+        setRegistrations((current) =>
+          current.map((registration) => (registration.id === registrationId ? result.data : registration))
+        );
+        latestWrite.current = Math.max(latestWrite.current, serverTime(result.data.lastUpdated));
+        fetchData();
       }
     } catch (error) {
       toast({
@@ -172,6 +189,8 @@ const AdminDashboard = () => {
 
   const handleLogout = () => {
     localStorage.removeItem("adminLoggedIn");
+    localStorage.removeItem("adminKey");
+    clearTimeout(pendingRefetch.current);
     setIsLoggedIn(false);
     toast({
       title: "Logged Out",
@@ -0,0 +1,66 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# The backend modules import each other as top-level packages (run from backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+@pytest.fixture
+def memory_storage():
+    """A fresh in-memory backend, installed for the duration of the test"""
+    import storage
+    previous = storage._storage
+    storage.use_storage(storage.MemoryStorage())
+    try:
+        yield storage.current_storage()
+    finally:
+        storage.use_storage(previous)
+
+
+@pytest.fixture
+def client(memory_storage):
+    """TestClient over the whole app (lifespan included) on the in-memory backend"""
+    from fastapi.testclient import TestClient
+    from server import create_app
+    from settings import Settings
+    with TestClient(create_app(Settings(storage_backend="memory"))) as client:
+        yield client
+
+
+def registration_payload(index: int) -> dict:
+    return {
+        "fullName": f"Dr. Test Delegate {index}",
+        "gender": "female",
+        "dateOfBirth": "1985-04-12T00:00:00",
+        "nationality": "Indian",
+        "passportNumber": f"T{1000000 + index}",
+        "passportExpiry": "2031-06-30T00:00:00",
+        "mobile": f"+9198{index:08d}",
+        "email": f"delegate{index}@example.com",
+        "specialty": "dentistry",
+        "yearsOfPractice": 8,
+        "clinicName": "Test Smile Clinic",
+        "clinicAddress": "42 MG Road, Bengaluru, Karnataka 560001",
+        "designation": "Consultant",
+        "interests": ["Dental Equipment"],
+        "foodPreference": "vegetarian",
+        "emergencyContact": f"+9197{index:08d}",
+        "termsAccepted": True,
+    }
+
+
+@pytest.fixture
+def register(client, monkeypatch):
+    """Create registrations through the API (the real deadline may have passed); returns the stored record"""
+    import routes.registrations
+    monkeypatch.setattr(routes.registrations, "REGISTRATION_DEADLINE", datetime(2100, 1, 1))
+
+    def register(index: int, **fields) -> dict:
+        response = client.post("/api/registrations", json={**registration_payload(index), **fields})
+        assert response.status_code == 200, response.text
+        return response.json()["data"]
+
+    return register
@@ -0,0 +1,93 @@
+"""
+Admission control: requests beyond a class's concurrency queue in FIFO order,
+and a full queue or an expired queue deadline is shed with 503.
+"""
+import asyncio
+
+import pytest
+
+from middleware.admission import (
+    AdmissionControlMiddleware, AdmissionController, ClassLimiter, Rejected, RouteClass
+)
+
+
+def test_full_queue_is_shed_and_slots_are_handed_over_in_order():
+    limiter = ClassLimiter(RouteClass("test_writes", concurrency=1, max_queue=1, queue_timeout=5))
+
+    async def scenario():
+        order = []
+        await limiter.acquire()
+
+        async def waiter(name):
+            await limiter.acquire()
+            order.append(name)
+
+        first = asyncio.create_task(waiter("first"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected):
+            await limiter.acquire()
+        limiter.release()
+        await first
+        limiter.release()
+        return order
+
+    assert asyncio.run(scenario()) == ["first"]
+    assert limiter.stats()["active"] == 0
+    assert limiter.rejected == 1 and limiter.admitted == 2
+
+
+def test_queue_deadline_rejects_without_leaking_the_slot():
+    limiter = ClassLimiter(RouteClass("test_reads", concurrency=1, max_queue=5, queue_timeout=0.05))
+
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(Rejected) as rejection:
+            await limiter.acquire()
+        limiter.release()
+        return rejection.value.retry_after
+
+    assert asyncio.run(scenario()) >= 1
+    assert limiter.timed_out == 1
+    assert limiter.active == 0 and limiter.queued == 0
+
+
+def test_middleware_sheds_only_the_saturated_class():
+    controller = AdmissionController(
+        [RouteClass("test_admin", 1, 0, 1), RouteClass("test_delegate", 4, 4, 1)],
+        [("test_admin", "GET", r"/api/admin/.*")],
+        default="test_delegate"
+    )
+    release = None
+
+    async def app(scope, receive, send):
+        if scope["path"].startswith("/api/admin"):
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AdmissionControlMiddleware(app, controller)
+
+    async def request(path: str) -> dict:
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({"type": "http", "method": "GET", "path": path, "headers": []}, None, send)
+        return messages[0]
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        slow = asyncio.create_task(request("/api/admin/registrations"))
+        await asyncio.sleep(0)
+        shed = await request("/api/admin/registrations")
+        served = await request("/api/registrations/count")
+        release.set()
+        return shed, served, await slow
+
+    shed, served, slow = asyncio.run(scenario())
+    assert shed["status"] == 503
+    assert dict(shed["headers"])[b"x-admission-class"] == b"test_admin"
+    assert served["status"] == 200 and slow["status"] == 200
+    assert controller.stats()["test_admin"]["rejected"] == 1
@@ -0,0 +1,86 @@
+"""
+Audit log: partly written batches are retried without duplicates, entries
+that cannot be stored are dropped and logged, and the history is admin only.
+"""
+import asyncio
+import logging
+
+import security
+from repositories.memory import MemoryRepository
+from services.audit import AuditLog
+from storage import MemoryStorage
+
+
+class FlakyPartition(MemoryRepository):
+    """Writes only the first half of a batch before failing, `failures` times"""
+
+    def __init__(self, name: str, failures: int):
+        super().__init__(name)
+        self.failures = failures
+        self.calls = 0
+
+    async def insert_many(self, documents):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            await super().insert_many(documents[:len(documents) // 2])
+            raise ConnectionError("connection reset mid-batch")
+        return await super().insert_many(documents)
+
+
+class FlakyStorage(MemoryStorage):
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def partition(self, name: str):
+        if name not in self._partitions:
+            self._partitions[name] = FlakyPartition(name, self.failures)
+        return self._partitions[name]
+
+
+def record(log: AuditLog, count: int):
+    for index in range(count):
+        log.record("registration", f"reg-{index}", {"designation": "Resident"}, {"designation": "Consultant"})
+
+
+def test_partial_write_is_retried_without_duplicates():
+    storage = FlakyStorage(failures=1)
+    log = AuditLog(batch_size=10, flush_interval=60, max_pending=100, max_attempts=3)
+
+    async def scenario():
+        log.start(storage)
+        record(log, 6)
+        await log.stop()
+        [name] = await storage.partitions("audit_log")
+        return storage.partition(name)
+
+    partition = asyncio.run(scenario())
+    assert partition.calls == 2
+    assert asyncio.run(partition.count({})) == 6
+    assert log.stats()["written"] == 6 and log.stats()["dropped"] == 0
+
+
+def test_entries_are_logged_when_every_attempt_fails(caplog):
+    storage = FlakyStorage(failures=5)
+    log = AuditLog(batch_size=10, flush_interval=60, max_pending=100, max_attempts=2)
+
+    async def scenario():
+        log.start(storage)
+        record(log, 2)
+        await log.stop()
+
+    with caplog.at_level(logging.ERROR, logger="services.audit"):
+        asyncio.run(scenario())
+    assert log.stats()["dropped"] == 2
+    assert sum("Audit entry not stored (write failed)" in message for message in caplog.messages) == 2
+    assert any('"entity_id": "reg-1"' in message for message in caplog.messages)
+
+
+def test_history_requires_the_admin_key(client, monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_KEY", "test-admin-key")
+
+    assert client.get("/api/audit/registration/reg-1").status_code == 403
+    assert client.get("/api/audit/registration/reg-1", headers={"X-Admin-Key": "wrong"}).status_code == 403
+    response = client.get("/api/audit/registration/reg-1", headers={"X-Admin-Key": "test-admin-key"})
+    assert response.status_code == 200 and response.json()["data"] == []
@@ -0,0 +1,79 @@
+"""
+Seat availability over SSE: the current value first, a new frame after each
+registration event, keepalives while idle, and every stream ended on stop.
+"""
+import asyncio
+import json
+import time
+
+from services.availability import KEEPALIVE_FRAME, AvailabilityBroadcaster
+from services.events import Event
+
+
+def parse(frame: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    return {"id": int(fields["id"]), "event": fields["event"], **json.loads(fields["data"])}
+
+
+def test_stream_sends_current_value_then_changes():
+    seats = {"remaining": 10}
+    loads = []
+
+    async def load():
+        loads.append(dict(seats))
+        return dict(seats)
+
+    broadcaster = AvailabilityBroadcaster(refresh_interval=60, min_interval=0, keepalive=0.1, max_stream_seconds=60)
+
+    async def scenario():
+        await broadcaster.start(load)
+        stream = broadcaster.stream()
+        assert (await anext(stream)).startswith(b"retry: ")
+        first = parse(await anext(stream))
+
+        # Only registrations change the seat count
+        broadcaster.on_event(Event("contact", "created", "c1", {}))
+        assert await anext(stream) == KEEPALIVE_FRAME
+        seats["remaining"] = 9
+        broadcaster.on_event(Event("registration", "created", "r1", {}))
+        second = parse(await asyncio.wait_for(anext(stream), timeout=1))
+
+        clients = broadcaster.clients
+        await broadcaster.stop()
+        remaining = [frame async for frame in stream]
+        return first, second, clients, remaining
+
+    first, second, clients, remaining = asyncio.run(scenario())
+    assert first["event"] == "availability" and first["id"] == 1 and first["remaining"] == 10
+    assert second["id"] == 2 and second["remaining"] == 9
+    assert len(loads) == 2
+    assert clients == 1 and broadcaster.clients == 0
+    assert remaining == []
+
+
+def test_unchanged_value_is_not_broadcast():
+    async def load():
+        return {"remaining": 5}
+
+    broadcaster = AvailabilityBroadcaster(refresh_interval=60, min_interval=0, keepalive=60, max_stream_seconds=60)
+
+    async def scenario():
+        await broadcaster.start(load)
+        await broadcaster.refresh()
+        await broadcaster.stop()
+
+    asyncio.run(scenario())
+    assert broadcaster.version == 1
+
+
+def test_registration_through_the_api_updates_availability(client, register):
+    before = client.get("/api/registrations/availability").json()["data"]
+    register(1)
+
+    # Refreshed by the broadcaster in the background, after at most AVAILABILITY_MIN_REFRESH_SECONDS
+    deadline = time.monotonic() + 3
+    after = before
+    while after["version"] == before["version"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+        after = client.get("/api/registrations/availability").json()["data"]
+    assert after["available_spots"] == before["available_spots"] - 1
@@ -0,0 +1,109 @@
+"""
+Reminder campaigns on the in-memory backend: a run checkpoints, retries its
+failed deliveries and completes once; resumed runs are stopped with the
+scheduler.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from services import campaigns
+from services.scheduler import Scheduler
+
+
+class FakeMailer:
+    running = True
+
+    def __init__(self, fail_once=(), block: asyncio.Event = None):
+        self.sent = []
+        self.fail_once = set(fail_once)
+        self.block = block
+
+    async def deliver(self, template: str, to: str, context: dict) -> bool:
+        if self.block is not None:
+            await self.block.wait()
+        if to in self.fail_once:
+            self.fail_once.discard(to)
+            return False
+        self.sent.append(to)
+        return True
+
+
+def registration(index: int, status: str) -> dict:
+    return {
+        "id": f"reg-{index:03d}", "email": f"delegate{index}@example.com", "fullName": f"Delegate {index}",
+        "paymentStatus": status, "registrationStatus": "pending"
+    }
+
+
+def test_run_retries_failures_and_completes_once(memory_storage, monkeypatch):
+    mailer = FakeMailer(fail_once={"delegate3@example.com"})
+    monkeypatch.setattr(campaigns, "mail_engine", mailer)
+    monkeypatch.setattr(campaigns, "CAMPAIGN_BATCH_SIZE", 2)
+    campaign = campaigns.CAMPAIGNS["balance_payment_reminder"]
+    scheduled = datetime.combine(campaign.active_from, datetime.min.time())
+
+    async def scenario():
+        await memory_storage.registrations.insert_many(
+            [registration(index, "full_paid" if index % 4 == 0 else "unpaid") for index in range(1, 9)]
+        )
+        summary = await campaigns.run_campaign(campaign, scheduled)
+        again = await campaigns.run_campaign(campaign, scheduled)
+        return summary, again, await memory_storage.campaign_runs.find_one({"id": summary["id"]})
+
+    summary, again, run = asyncio.run(scenario())
+
+    assert summary["sent"] == 6 and summary["failed"] == 0
+    assert sorted(mailer.sent) == sorted(f"delegate{index}@example.com" for index in (1, 2, 3, 5, 6, 7))
+    assert run["status"] == "completed" and run["last_id"] == "reg-007" and run["failed_ids"] == []
+    # A completed run is returned as is instead of being sent again
+    assert again["status"] == "completed" and len(mailer.sent) == 6
+
+
+def test_live_lease_of_another_worker_is_respected(memory_storage, monkeypatch):
+    mailer = FakeMailer()
+    monkeypatch.setattr(campaigns, "mail_engine", mailer)
+    campaign = campaigns.CAMPAIGNS["pre_travel_reminder"]
+    scheduled = datetime.combine(campaign.active_from, datetime.min.time())
+    run_id = f"{campaign.name}:{scheduled.date().isoformat()}"
+
+    async def scenario(lease_until: datetime):
+        await memory_storage.campaign_runs.update_one({"id": run_id}, {"owner": "other:1", "lease_until": lease_until})
+        return await campaigns.run_campaign(campaign, scheduled)
+
+    async def setup():
+        await memory_storage.registrations.insert({**registration(1, "unpaid"), "registrationStatus": "confirmed"})
+        await memory_storage.campaign_runs.insert({
+            "id": run_id, "campaign": campaign.name, "run_date": scheduled.date().isoformat(), "status": "running"
+        })
+
+    asyncio.run(setup())
+    assert asyncio.run(scenario(datetime.utcnow() + timedelta(minutes=5))) is None
+    assert mailer.sent == []
+    # Once that lease expires this worker takes the run over
+    assert asyncio.run(scenario(datetime.utcnow() - timedelta(minutes=5)))["sent"] == 1
+
+
+def test_resumed_runs_are_cancelled_when_the_scheduler_stops(memory_storage, monkeypatch):
+    scheduler = Scheduler()
+    monkeypatch.setattr(campaigns, "scheduler", scheduler)
+    campaign = campaigns.CAMPAIGNS["pre_travel_reminder"]
+    run_date = campaign.active_from.isoformat()
+
+    async def scenario():
+        mailer = FakeMailer(block=asyncio.Event())
+        monkeypatch.setattr(campaigns, "mail_engine", mailer)
+        await memory_storage.registrations.insert({**registration(1, "unpaid"), "registrationStatus": "confirmed"})
+        await memory_storage.campaign_runs.insert({
+            "id": f"{campaign.name}:{run_date}", "campaign": campaign.name, "run_date": run_date,
+            "status": "running", "owner": "crashed:1", "lease_until": datetime.utcnow() - timedelta(minutes=1)
+        })
+        await campaigns.resume_interrupted_runs()
+        [task] = list(scheduler._spawned)
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        await asyncio.wait_for(scheduler.stop(), timeout=1)
+        return task
+
+    task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert not scheduler._spawned
@@ -0,0 +1,49 @@
+"""
+Shared delegate capacity: concurrent reservations never overbook, and
+releases never take the counter below zero.
+"""
+import asyncio
+
+from repositories.memory import MemoryRepository
+from services.capacity import Capacity
+
+
+def repositories():
+    return MemoryRepository("counters"), MemoryRepository("registrations")
+
+
+def test_concurrent_reservations_stop_at_the_limit():
+    counters, registrations = repositories()
+    capacity = Capacity("test_delegates", limit=5)
+
+    async def scenario():
+        # Two already active, one cancelled: the counter starts at 2
+        await registrations.insert_many([
+            {"id": "r1", "email": "r1@example.com", "registrationStatus": "confirmed"},
+            {"id": "r2", "email": "r2@example.com", "registrationStatus": "pending"},
+            {"id": "r3", "email": "r3@example.com", "registrationStatus": "cancelled"},
+        ])
+        results = await asyncio.gather(*(capacity.reserve(counters, registrations) for _ in range(10)))
+        return results, await capacity.active(counters, registrations)
+
+    results, active = asyncio.run(scenario())
+    assert results.count(True) == 3
+    assert active == 5
+
+
+def test_release_never_goes_below_zero():
+    counters, registrations = repositories()
+    capacity = Capacity("test_delegates", limit=2)
+
+    async def scenario():
+        assert await capacity.reserve(counters, registrations)
+        for _ in range(3):
+            await capacity.release(counters)
+        after_releases = await capacity.active(counters, registrations)
+        # The freed slots can all be taken again, and no more
+        reserved = [await capacity.reserve(counters, registrations) for _ in range(3)]
+        return after_releases, reserved
+
+    after_releases, reserved = asyncio.run(scenario())
+    assert after_releases == 0
+    assert reserved == [True, True, False]
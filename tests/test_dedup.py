@@ -0,0 +1,93 @@
+"""
+Duplicate-delegate detection: Soundex and the normalized blocking keys, the
+pairwise verdicts, and grouping across chains of matches.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from repositories.memory import MemoryRepository
+from services import dedup
+from services.dedup import DUPLICATE, POSSIBLE, dedup_keys, find_candidates, name_key, scan, soundex
+
+
+def test_soundex():
+    assert [soundex(word) for word in ("Robert", "Rupert", "Ashcraft", "Tymczak", "Pfister", "Lee")] == [
+        "R163", "R163", "A261", "T522", "P236", "L000"
+    ]
+    assert soundex("Sharma") == soundex("Sarma") == "S650"
+    assert soundex("") == "" and soundex("123") == ""
+
+
+def test_blocking_keys_ignore_formatting():
+    first = {"passportNumber": "z 1234567", "mobile": "+91 98450-12345",
+             "fullName": "Dr. Priya Sharma", "dateOfBirth": "1985-04-12T00:00:00"}
+    second = {"passportNumber": "Z1234567", "mobile": "098450 12345",
+              "fullName": "SARMA priya", "dateOfBirth": datetime(1985, 4, 12)}
+    assert dedup_keys(first) == dedup_keys(second) == [
+        "passport:Z1234567", "phone:9845012345", "name:P600-S650:1985-04-12"
+    ]
+    # An aware date of birth lands on its UTC day
+    evening = datetime(1985, 4, 12, 22, 0, tzinfo=timezone(timedelta(hours=-4)))
+    assert name_key("Priya Sharma", evening).endswith(":1985-04-13")
+    # Too short to identify anyone, or nothing left but a title
+    assert dedup_keys({"passportNumber": "A1", "mobile": "12345", "fullName": "Dr.", "dateOfBirth": "1985-04-12"}) == []
+
+
+def registration(id: str, passport: str, mobile: str, name: str, birth: str = "1985-04-12") -> dict:
+    return {"id": id, "passportNumber": passport, "mobile": mobile, "fullName": name, "dateOfBirth": birth}
+
+
+def test_scan_groups_chains_of_duplicates():
+    result = scan([
+        # a and b: same phone and name+DOB (a new passport)
+        registration("a", "K1111111", "+91 9845012345", "Dr. Priya Sharma"),
+        registration("b", "K2222222", "9845012345", "Priya Sarma"),
+        # c: b's passport with other contact details
+        registration("c", "K 2222222", "+91 9000000000", "P. Sharma-Iyer", birth="1985-12-04"),
+        # d: a colleague on the clinic phone
+        registration("d", "K4444444", "9845012345", "Rahul Verma", birth="1979-01-01"),
+        # e: a namesake with the same birthday
+        registration("e", "K5555555", "9111111111", "Priya Sharma", birth="1985-04-12"),
+    ])
+    assert result.scanned == 5
+    assert result.groups == [["a", "b", "c"]]
+    assert sorted(result.possible) == [
+        ("a", "d", ["phone"]), ("a", "e", ["name"]), ("b", "d", ["phone"]), ("b", "e", ["name"])
+    ]
+
+
+def test_scan_skips_oversized_blocks():
+    names = ["Rahul Verma", "Meena Iyer", "Arjun Nair", "Kavya Rao"]
+    switchboard = [registration(f"r{index}", f"K{index:07d}", "+91 8000000000", name)
+                   for index, name in enumerate(names)]
+    result = scan(switchboard, max_block=3)
+    assert result.possible == [] and result.groups == []
+    assert result.oversized == [("phone", 4)]
+
+
+def test_find_candidates_ranks_duplicates_and_skips_crowded_keys(monkeypatch):
+    monkeypatch.setattr(dedup, "DEDUP_MAX_BLOCK", 2)
+    registrations = MemoryRepository("registrations")
+    stored = [
+        registration("same-passport", "K1111111", "9000000001", "Anil Rao", birth="1970-01-01"),
+        registration("namesake", "K2222222", "9000000002", "Priya Sharma"),
+        registration("colleague-1", "K3333333", "9845012345", "Rahul Verma", birth="1979-01-01"),
+        registration("colleague-2", "K4444444", "9845012345", "Meena Iyer", birth="1981-01-01"),
+        registration("colleague-3", "K5555555", "9845012345", "Arjun Nair", birth="1983-01-01"),
+        {**registration("cancelled", "K1111111", "9000000003", "Anil Rao"), "registrationStatus": "cancelled"},
+    ]
+    new = registration("new", "K-1111111", "+91 9845012345", "Dr. Priya Sharma")
+
+    async def scenario():
+        await registrations.insert_many([
+            {"email": f"{document['id']}@example.com", "registrationStatus": "pending", **document,
+             "dedupKeys": dedup_keys(document)}
+            for document in stored
+        ])
+        return await find_candidates(registrations, dedup_keys(new), exclude_id="new")
+
+    matches = asyncio.run(scenario())
+    # The clinic phone is shared by three registrations, more than the block limit
+    assert [(match.id, match.verdict, match.kinds) for match in matches] == [
+        ("same-passport", DUPLICATE, {"passport"}), ("namesake", POSSIBLE, {"name"})
+    ]
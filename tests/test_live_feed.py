@@ -0,0 +1,69 @@
+"""
+Admin live feed over WebSocket: the admin key is required, writes arrive as
+deltas, and a connection that falls behind is closed with 1013.
+"""
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import security
+from services.live_feed import CLOSE_TOO_SLOW, live_feed
+
+ADMIN_KEY = "test-admin-key"
+
+
+@pytest.fixture(autouse=True)
+def admin_key(monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_API_KEY", ADMIN_KEY)
+
+
+def test_bad_key_is_rejected(client):
+    for url in ("/api/admin/live", "/api/admin/live?key=wrong"):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(url) as websocket:
+                websocket.receive_text()
+        assert closed.value.code == 1008
+    assert live_feed.stats()["connections"] == 0
+
+
+def test_writes_arrive_as_deltas(client, register):
+    with client.websocket_connect("/api/admin/live", headers={"X-Admin-Key": ADMIN_KEY}) as websocket:
+        hello = websocket.receive_json()
+        assert hello["type"] == "hello"
+
+        registration = register(1)
+        created = websocket.receive_json()
+        assert (created["entity"], created["action"], created["id"]) == ("registration", "created", registration["id"])
+        assert created["seq"] == hello["seq"] + 1
+        assert created["data"]["email"] == "delegate1@example.com"
+
+        # The payment record created by the first payment info read is published too
+        assert client.get(f"/api/payments/info/{registration['id']}").status_code == 200
+        payment = websocket.receive_json()
+        assert (payment["entity"], payment["action"]) == ("payment", "created")
+        assert payment["data"]["registration_id"] == registration["id"]
+
+        client.put(f"/api/registrations/{registration['id']}", json={"registrationStatus": "confirmed"})
+        changed = websocket.receive_json()
+        assert changed["action"] == "status_changed" and changed["changes"]["registrationStatus"] == "confirmed"
+
+
+def test_slow_consumer_is_closed_with_too_slow(client, monkeypatch):
+    monkeypatch.setattr(live_feed, "queue_size", 2)
+    dropped = live_feed.dropped
+
+    def burst():
+        # All put on the queue before the connection's sender runs once
+        for index in range(5):
+            live_feed.broadcast({"type": "delta", "entity": "contact", "id": str(index), "action": "updated",
+                                 "changes": {"status": "resolved"}})
+
+    received = []
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(f"/api/admin/live?key={ADMIN_KEY}") as websocket:
+            websocket.receive_json()
+            client.portal.call(burst)
+            while True:
+                received.append(websocket.receive_json())
+    assert closed.value.code == CLOSE_TOO_SLOW
+    assert len(received) <= 2
+    assert live_feed.dropped == dropped + 1
@@ -0,0 +1,100 @@
+"""
+Mail engine against a local aiosmtpd sink: every message arrives, batches
+larger than the per-second rate still go out, and pacing holds.
+"""
+import asyncio
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from services.mailer import MailEngine, RateLimiter, SMTPProvider
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def sink():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    try:
+        yield controller
+    finally:
+        controller.stop()
+
+
+def make_engine(sink, **options) -> MailEngine:
+    provider = SMTPProvider(name="sink", host=sink.hostname, port=sink.port, use_tls=False, **options)
+    return MailEngine([provider], queue_size=1000)
+
+
+def context(index: int) -> dict:
+    return {"fullName": f"Dr. Delegate {index}", "registration_id": f"reg-{index}", "specialty": "dentistry"}
+
+
+async def send_all(engine: MailEngine, messages: int, timeout: float) -> float:
+    await engine.start()
+    try:
+        started = time.monotonic()
+        for index in range(messages):
+            assert engine.send_template("registration_confirmation", f"delegate{index}@example.com", context(index))
+        await asyncio.wait_for(engine.join(), timeout=timeout)
+        return time.monotonic() - started
+    finally:
+        await engine.stop()
+
+
+def test_pool_delivers_every_message(sink):
+    engine = make_engine(sink, max_connections=4, batch_size=5, rate_per_second=1000)
+    asyncio.run(send_all(engine, 200, timeout=30))
+
+    assert sorted(sink.handler.recipients) == sorted(f"delegate{index}@example.com" for index in range(200))
+    assert engine.stats() == {}
+
+
+def test_batch_larger_than_rate_is_delivered_and_paced(sink):
+    # The defaults: 20 per batch at 10 per second
+    engine = make_engine(sink, max_connections=1, batch_size=20, rate_per_second=10)
+    elapsed = asyncio.run(send_all(engine, 30, timeout=15))
+
+    assert len(sink.handler.recipients) == 30
+    # A burst of one full batch, then the remaining 10 at 10 per second
+    assert elapsed >= 0.9
+
+
+def test_deliver_waits_for_the_sink(sink):
+    engine = make_engine(sink, max_connections=2, batch_size=20, rate_per_second=10)
+
+    async def deliver():
+        await engine.start()
+        try:
+            return await asyncio.wait_for(
+                engine.deliver("registration_confirmation", "single@example.com", context(0)), timeout=10
+            )
+        finally:
+            await engine.stop()
+
+    assert asyncio.run(deliver()) is True
+    assert sink.handler.recipients == ["single@example.com"]
+
+
+def test_rate_limiter_rejects_a_request_over_capacity():
+    limiter = RateLimiter(rate=10, capacity=20)
+
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.acquire(21))
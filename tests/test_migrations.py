@@ -0,0 +1,96 @@
+"""
+Schema versions: documents are upgraded on read and written back only while
+unchanged, and tools/migrate_schema.py resumes from its checkpoint.
+"""
+import asyncio
+
+import pytest
+
+from migrations import SCHEMA_VERSION_FIELD, current_version
+from repositories.memory import MemoryRepository
+from repositories.versioned import VersionedRepository
+from tools.migrate_schema import migrate_collection
+
+
+def versioned(collection: str):
+    queued = []
+    inner = MemoryRepository(collection)
+    return VersionedRepository(inner, on_upgrade=queued.append), inner, queued
+
+
+def test_old_document_is_upgraded_on_read_and_written_back():
+    contacts, inner, queued = versioned("contacts")
+
+    async def scenario():
+        await inner.insert({"id": "c1", "name": "Dr. Kim", "createdDate": "2024-05-01"})
+        read = await contacts.find_one({"id": "c1"})
+        # Read again before the write-back: upgraded the same way, queued once
+        await contacts.find_one({"id": "c1"})
+        [(repository, operation)] = queued
+        modified = await repository.bulk_update([operation])
+        return read, modified, await inner.find_one({"id": "c1"})
+
+    read, modified, stored = asyncio.run(scenario())
+    assert read["inquiryType"] == "general" and read["lastUpdated"] == "2024-05-01"
+    assert read[SCHEMA_VERSION_FIELD] == current_version("contacts")
+    assert modified == 1 and stored == read
+
+
+def test_write_back_never_overwrites_a_newer_write():
+    contacts, inner, queued = versioned("contacts")
+
+    async def scenario():
+        await inner.insert({"id": "c1", "name": "Dr. Kim", "createdDate": "2024-05-01"})
+        await contacts.find_one({"id": "c1"})
+        # A handler sets a field the upgrade also sets before the write-back runs
+        await contacts.update_one({"id": "c1"}, {"inquiryType": "sponsorship"})
+        [(repository, operation)] = queued
+        return await repository.bulk_update([operation]), await inner.find_one({"id": "c1"})
+
+    modified, stored = asyncio.run(scenario())
+    assert modified == 0
+    assert stored["inquiryType"] == "sponsorship" and SCHEMA_VERSION_FIELD not in stored
+
+
+def test_projected_and_current_reads_are_not_written_back():
+    contacts, inner, queued = versioned("contacts")
+
+    async def scenario():
+        await inner.insert({"id": "c1", "name": "Dr. Kim", "createdDate": "2024-05-01"})
+        await contacts.insert({"id": "c2", "name": "Dr. Lee", "inquiryType": "general"})
+        projected = await contacts.find({"id": "c1"}, fields=["inquiryType"])
+        await contacts.find_one({"id": "c2"})
+        return projected
+
+    assert asyncio.run(scenario()) == [{"inquiryType": "general"}]
+    assert queued == []
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_bulk_migration_resumes_from_its_checkpoint(memory_storage):
+    stored = memory_storage.registrations.inner
+    documents = [
+        {"id": f"reg-{index:02d}", "email": f"d{index}@example.com", "specialty": "Dermatology"}
+        for index in range(10)
+    ]
+
+    def interrupt(stats):
+        raise Interrupted()
+
+    async def scenario():
+        await stored.insert_many(documents)
+        with pytest.raises(Interrupted):
+            await migrate_collection(memory_storage, "registrations", batch_size=3, progress=interrupt)
+        resumed = await migrate_collection(memory_storage, "registrations", batch_size=3)
+        again = await migrate_collection(memory_storage, "registrations", batch_size=3)
+        return resumed, again, await stored.find({}, sort=("id", 1))
+
+    resumed, again, upgraded = asyncio.run(scenario())
+    assert resumed["resumed_from"] == "reg-02"
+    assert resumed["scanned"] == 7 and resumed["upgraded"] == 7 and resumed["conflicts"] == 0
+    assert again["skipped"]
+    assert all(document[SCHEMA_VERSION_FIELD] == current_version("registrations") for document in upgraded)
+    assert {document["specialty"] for document in upgraded} == {"dermatology"}
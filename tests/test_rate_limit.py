@@ -0,0 +1,72 @@
+"""
+Token buckets: burst capacity, refill over time, isolation between keys and
+the 429 answer of the middleware.
+"""
+import asyncio
+import json
+
+from middleware.rate_limit import RateLimitMiddleware, RateLimitRule, TokenBuckets
+
+
+def test_bucket_allows_burst_then_refills():
+    rule = RateLimitRule("test_burst", "POST", r"/x", "3/second")
+    buckets = TokenBuckets(sweep_interval=1e9)
+
+    assert [buckets.take("k", rule, now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty: the next token arrives after 1/rate seconds
+    assert abs(buckets.take("k", rule, now=100.0) - 1 / 3) < 1e-9
+    assert buckets.take("k", rule, now=100.34) == 0.0
+    # Refill never exceeds capacity, however long the bucket was idle
+    assert [buckets.take("k", rule, now=1000.0) for _ in range(4)][-1] > 0
+
+
+def test_keys_are_isolated_and_idle_buckets_swept():
+    rule = RateLimitRule("test_keys", "POST", r"/x", "1/minute")
+    # Swept explicitly below rather than on the wall clock
+    buckets = TokenBuckets(sweep_interval=1e9)
+
+    assert buckets.take("a", rule, now=10.0) == 0.0
+    assert buckets.take("a", rule, now=11.0) > 0
+    assert buckets.take("b", rule, now=40.0) == 0.0
+    assert len(buckets) == 2
+    # A bucket idle for a full refill period is dropped: it would be full anyway
+    buckets.sweep(now=71.0)
+    assert len(buckets) == 1
+    buckets.sweep(now=100.0)
+    assert len(buckets) == 0
+
+
+def call(middleware: RateLimitMiddleware, path: str, body: dict, client: str = "10.0.0.1") -> dict:
+    scope = {"type": "http", "method": "POST", "path": path, "headers": [], "client": (client, 1234)}
+    payload = json.dumps(body).encode()
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0]
+
+
+def test_middleware_rejects_with_retry_after_per_body_key():
+    async def app(scope, receive, send):
+        # The body read by the limiter is replayed to the application
+        message = await receive()
+        assert json.loads(message["body"])["email"]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    rules = [RateLimitRule("test_email", "POST", r"/api/contacts", "2/hour", key="body:email")]
+    middleware = RateLimitMiddleware(app, rules)
+
+    statuses = [call(middleware, "/api/contacts", {"email": "A@example.com"})["status"] for _ in range(2)]
+    rejected = call(middleware, "/api/contacts", {"email": " a@example.com "})
+    assert statuses == [200, 200]
+    assert rejected["status"] == 429
+    assert int(dict(rejected["headers"])[b"retry-after"]) >= 1
+    assert call(middleware, "/api/contacts", {"email": "b@example.com"})["status"] == 200
+    # Other paths are not limited
+    assert call(middleware, "/api/other", {"email": "a@example.com"})["status"] == 200
@@ -0,0 +1,150 @@
+"""
+The Repository contract, run against every backend: filters, sorting and
+paging, projections, bulk updates, counters and unique indexes.
+
+The in-memory backend always runs; the MongoDB one runs when MONGO_TEST_URL
+points at a server it may create a scratch database on.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from indexes import INDEXES
+from repositories.base import DuplicateKeyError, UpdateOperation
+from repositories.memory import MemoryRepository
+
+DOCUMENTS = [
+    {"id": "c1", "status": "new", "score": 5, "tags": ["a", "b"], "city": "Seoul"},
+    {"id": "c2", "status": "resolved", "score": 9, "tags": ["b"]},
+    {"id": "c3", "status": "new", "score": 1, "tags": [], "city": "Delhi"},
+    {"id": "c4", "status": "closed", "score": "n/a", "tags": ["c"]},
+]
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def open_repository(request):
+    """Async factory of an empty repository for a collection, with that collection's indexes"""
+    if request.param == "memory":
+        async def open_memory(collection: str):
+            return MemoryRepository(collection)
+        return open_memory
+
+    url = os.environ.get("MONGO_TEST_URL")
+    if not url:
+        pytest.skip("MONGO_TEST_URL is not set")
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo import MongoClient
+    from repositories.mongo import MongoRepository
+    db_name = f"kicon_test_{uuid.uuid4().hex[:8]}"
+    request.addfinalizer(lambda: MongoClient(url).drop_database(db_name))
+
+    async def open_mongo(collection: str):
+        # Motor binds to the event loop it is created in, so each test opens its own client
+        client = AsyncIOMotorClient(url)
+        await client[db_name][collection].create_indexes(INDEXES[collection])
+        return MongoRepository(client[db_name], collection)
+    return open_mongo
+
+
+def run(open_repository, scenario, collection: str = "contacts"):
+    async def main():
+        repository = await open_repository(collection)
+        await repository.insert_many([dict(document) for document in DOCUMENTS])
+        return await scenario(repository)
+    return asyncio.run(main())
+
+
+def ids(documents) -> list:
+    return sorted(document["id"] for document in documents)
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({}, ["c1", "c2", "c3", "c4"]),
+    ({"status": "new"}, ["c1", "c3"]),
+    # An array field matches any of its elements
+    ({"tags": "b"}, ["c1", "c2"]),
+    ({"status": {"$ne": "new"}}, ["c2", "c4"]),
+    ({"status": {"$in": ["resolved", "closed"]}}, ["c2", "c4"]),
+    ({"status": {"$nin": ["new", "closed"]}}, ["c2"]),
+    # Range operators never match across types ("n/a")
+    ({"score": {"$gt": 4}}, ["c1", "c2"]),
+    ({"score": {"$gte": 5, "$lt": 9}}, ["c1"]),
+    ({"score": {"$lte": 1}}, ["c3"]),
+    # None matches a missing field
+    ({"city": None}, ["c2", "c4"]),
+    ({"city": {"$ne": None}}, ["c1", "c3"]),
+    ({"status": "new", "score": {"$gt": 2}}, ["c1"]),
+    ({"status": "archived"}, []),
+])
+def test_filters(open_repository, filter, expected):
+    async def scenario(repository):
+        return await repository.find(filter), await repository.count(filter)
+
+    found, count = run(open_repository, scenario)
+    assert ids(found) == expected
+    assert count == len(expected)
+
+
+def test_sort_skip_limit_and_fields(open_repository):
+    numeric = {"score": {"$gte": 0}}
+
+    async def scenario(repository):
+        return (
+            await repository.find(numeric, sort=("score", 1)),
+            await repository.find(numeric, sort=("score", -1), skip=1, limit=1, fields=["id", "score"]),
+            [document async for document in repository.stream(numeric, sort=("score", -1), limit=2, batch_size=1)],
+            await repository.find_one({"id": "c2"}),
+        )
+
+    ascending, page, streamed, one = run(open_repository, scenario)
+    assert [document["id"] for document in ascending] == ["c3", "c1", "c2"]
+    assert page == [{"id": "c1", "score": 5}]
+    assert [document["id"] for document in streamed] == ["c2", "c1"]
+    assert one == DOCUMENTS[1]
+
+
+def test_update_one_and_bulk_update(open_repository):
+    async def scenario(repository):
+        unchanged = await repository.update_one({"id": "c1"}, {"status": "new"})
+        updated = await repository.update_one({"id": "c1"}, {"status": "resolved"})
+        modified = await repository.bulk_update([
+            UpdateOperation({"id": "c2"}, {"score": 10}),
+            UpdateOperation({"id": "c3"}, {"status": "closed"}, unset=["city"]),
+            # Would duplicate c1's id: skipped without stopping the others
+            UpdateOperation({"id": "c4"}, {"id": "c1"}),
+            UpdateOperation({"id": "c9"}, {"status": "closed"}),
+        ])
+        return unchanged, updated, modified, await repository.find({}, sort=("id", 1))
+
+    unchanged, updated, modified, documents = run(open_repository, scenario)
+    assert (unchanged, updated, modified) == (0, 1, 2)
+    assert [document["id"] for document in documents] == ["c1", "c2", "c3", "c4"]
+    assert documents[0]["status"] == "resolved" and documents[1]["score"] == 10
+    assert documents[2]["status"] == "closed" and "city" not in documents[2]
+
+
+def test_unique_index_violations(open_repository):
+    async def scenario(repository):
+        with pytest.raises(DuplicateKeyError) as duplicate:
+            await repository.insert({"id": "c1", "status": "new"})
+        inserted = await repository.insert_many([{"id": "c2"}, {"id": "c5"}, {"id": "c6"}])
+        with pytest.raises(DuplicateKeyError):
+            await repository.update_one({"id": "c5"}, {"id": "c3"})
+        return duplicate.value, inserted, await repository.count({})
+
+    error, inserted, count = run(open_repository, scenario)
+    assert error.collection == "contacts" and error.fields == ("id",)
+    assert inserted == 2 and count == 6
+
+
+def test_conditional_increment(open_repository):
+    async def scenario(repository):
+        await repository.insert({"id": "seats", "value": 1})
+        taken = [await repository.increment({"id": "seats", "value": {"$lt": 2}}, "value", 1) for _ in range(2)]
+        return taken, await repository.find_one({"id": "seats"})
+
+    taken, counter = run(open_repository, scenario, collection="counters")
+    assert taken[0]["value"] == 2 and taken[1] is None
+    assert counter == {"id": "seats", "value": 2}
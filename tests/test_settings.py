@@ -0,0 +1,44 @@
+"""
+backend/.env is loaded before the modules that read their constants at import.
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+# A fresh interpreter, so every module reads the environment at import as it would in production
+APP_SCRIPT = textwrap.dedent("""
+    import sys
+    from fastapi.testclient import TestClient
+    from server import create_app
+
+    with TestClient(create_app()) as client:
+        statuses = [
+            client.get("/api/admin/dashboard").status_code,
+            client.get("/api/admin/dashboard", headers={"X-Admin-Key": "from-dotenv"}).status_code,
+        ]
+    # Not stdout: the app's log writer thread shares it
+    with open(sys.argv[1], "w") as output:
+        output.write(" ".join(map(str, statuses)))
+""")
+
+
+def test_admin_key_set_only_in_dotenv(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("ADMIN_API_KEY=from-dotenv\nSTORAGE_BACKEND=memory\n")
+    environment = {name: value for name, value in os.environ.items()
+                   if name not in ("ADMIN_API_KEY", "STORAGE_BACKEND")}
+    environment["ENV_FILE"] = str(env_file)
+
+    completed = subprocess.run(
+        [sys.executable, "-c", APP_SCRIPT, str(tmp_path / "statuses")], cwd=BACKEND_DIR, env=environment,
+        capture_output=True, text=True, timeout=60
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    without_key, with_key = (tmp_path / "statuses").read_text().split()
+    assert without_key == "403"
+    # 200, or 503 while the first snapshot is still being built: either way past the admin gate
+    assert with_key in ("200", "503")
@@ -0,0 +1,72 @@
+"""
+GET /api/status as NDJSON (limit, since, fields) and the batched writes
+behind POST /api/status.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from repositories.memory import MemoryRepository
+from services.batch_writer import BatchWriter
+
+START = datetime(2025, 1, 1, 9, 0, 0)
+
+
+def seed(memory_storage):
+    # Two checks share the third timestamp
+    checks = [
+        {"id": f"c{index}", "client_name": f"probe{index}", "timestamp": START + timedelta(seconds=second)}
+        for index, second in enumerate([0, 1, 2, 2, 3])
+    ]
+    asyncio.run(memory_storage.status_checks.insert_many(checks))
+
+
+def lines(response) -> list:
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_is_ordered_limited_and_resumable(client, memory_storage):
+    seed(memory_storage)
+
+    assert [check["id"] for check in lines(client.get("/api/status", params={"limit": 2}))] == ["c0", "c1"]
+    # A page never ends inside a timestamp, so resuming from its last one skips nothing
+    page = lines(client.get("/api/status", params={"limit": 3}))
+    assert [check["id"] for check in page] == ["c0", "c1", "c2", "c3"]
+    rest = lines(client.get("/api/status", params={"since": page[-1]["timestamp"]}))
+    assert [check["id"] for check in rest] == ["c4"]
+    # Offsets are converted to the naive UTC the timestamps are stored in
+    since = (START + timedelta(seconds=1, hours=2)).isoformat() + "+02:00"
+    assert [check["id"] for check in lines(client.get("/api/status", params={"since": since}))] == ["c2", "c3", "c4"]
+
+
+def test_fields_select_keys(client, memory_storage):
+    seed(memory_storage)
+
+    assert lines(client.get("/api/status", params={"fields": "client_name", "limit": 1})) == [{"client_name": "probe0"}]
+    assert client.get("/api/status", params={"fields": "client_name,secret"}).status_code == 400
+
+
+def test_buffered_status_checks_are_flushed_on_shutdown(client, memory_storage):
+    for index in range(3):
+        assert client.post("/api/status", json={"client_name": f"probe{index}"}).status_code == 200
+    # Leaving the client runs the lifespan shutdown, which stops the writer
+    client.__exit__(None, None, None)
+    assert asyncio.run(memory_storage.status_checks.count({})) == 3
+
+
+def test_writer_batches_and_bounds_its_buffer():
+    repository = MemoryRepository("status_checks")
+    writer = BatchWriter("test_checks", batch_size=2, flush_interval=60, max_pending=3)
+
+    async def scenario():
+        writer.start(repository)
+        for index in range(5):
+            assert writer.add({"id": f"c{index}"})
+        await writer.stop()
+        return await repository.count({})
+
+    # No flush interval elapsed: the fourth and fifth documents found the buffer full
+    assert asyncio.run(scenario()) == 3
+    assert writer.stats()["written"] == 3 and writer.stats()["dropped"] == 2
+    assert not writer.add({"id": "late"})